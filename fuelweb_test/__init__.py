@@ -11,25 +11,72 @@
 #    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
 #    License for the specific language governing permissions and limitations
 #    under the License.
+import atexit
 import functools
 import logging
 import traceback
 import os
+
+from six.moves import queue
+
+from fuelweb_test.helpers.log_handlers import CompressedRotatingFileHandler
+from fuelweb_test.helpers.log_handlers import QueueHandler
+from fuelweb_test.helpers.log_handlers import QueueListener
+from fuelweb_test.settings import LOG_ASYNC
+from fuelweb_test.settings import LOG_BACKUP_COUNT
+from fuelweb_test.settings import LOG_COMPRESS
+from fuelweb_test.settings import LOG_LEVELS
+from fuelweb_test.settings import LOG_MAX_SIZE
 from fuelweb_test.settings import LOGS_DIR
 
 if not os.path.exists(LOGS_DIR):
     os.makedirs(LOGS_DIR)
 
-logging.basicConfig(level=logging.DEBUG,
-                    format='%(asctime)s - %(levelname)s %(filename)s:'
-                    '%(lineno)d -- %(message)s',
-                    filename=os.path.join(LOGS_DIR, 'sys_test.log'),
-                    filemode='w')
+formatter = logging.Formatter('%(asctime)s - %(levelname)s %(filename)s:'
+                              '%(lineno)d -- %(message)s')
+
+log_path = os.path.join(LOGS_DIR, 'sys_test.log')
+if LOG_MAX_SIZE:
+    log_file = CompressedRotatingFileHandler(
+        log_path, LOG_MAX_SIZE * 1024 * 1024, LOG_BACKUP_COUNT, LOG_COMPRESS)
+else:
+    log_file = logging.FileHandler(log_path, mode='w')
+log_file.setFormatter(formatter)
+
+root_logger = logging.getLogger()
+root_logger.setLevel(logging.DEBUG)
+if LOG_ASYNC:
+    # The records are written to the file by the listener thread
+    log_handler = QueueHandler(queue.Queue())
+    log_listener = QueueListener(log_handler.queue, log_file)
+    log_listener.start()
+else:
+    log_handler = log_file
+    log_listener = None
+root_logger.addHandler(log_handler)
 
+
+def stop_log_listener():
+    """Write the queued records and log to the file without the queue,
+    so the records of the other atexit handlers are not lost
+    """
+    if log_listener is None:
+        return
+    log_listener.stop()
+    root_logger.removeHandler(log_handler)
+    root_logger.addHandler(log_file)
+
+atexit.register(stop_log_listener)
+
+for item in LOG_LEVELS.split(','):
+    if item.strip():
+        module, _, level = item.partition('=')
+        logging.getLogger(module.strip()).setLevel(level.strip().upper())
+
+# The console is written directly, QuietLogger changes its level and it
+# must be applied to the records logged inside the block only
 console = logging.StreamHandler()
 console.setLevel(logging.INFO)
-formatter = logging.Formatter('%(asctime)s - %(levelname)s %(filename)s:'
-                              '%(lineno)d -- %(message)s')
 console.setFormatter(formatter)
 
 logger = logging.getLogger(__name__)
@@ -0,0 +1,294 @@
+#    Copyright 2016 Mirantis, Inc.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Benchmarks of the client hot paths
+
+Nailgun benchmarks use the in-process fake Nailgun API, SSH benchmarks need
+the sshd set with BENCHMARK_SSH_HOST, BENCHMARK_SSH_LOGIN and
+BENCHMARK_SSH_PASSWORD and are skipped without it.
+"""
+
+from collections import namedtuple
+import os
+import sys
+
+from fuelweb_test.benchmarks.fake_nailgun import fake_nailgun
+from fuelweb_test.benchmarks.runner import benchmark
+from fuelweb_test.benchmarks.runner import SkipBenchmark
+
+NODES_SIZES = (10, 100, 1000)
+DATA_SIZES = (10, 100, 1000)
+LOG_SIZES = (1000, 10000, 100000)
+
+SSH_HOST = os.environ.get('BENCHMARK_SSH_HOST')
+SSH_LOGIN = os.environ.get('BENCHMARK_SSH_LOGIN', 'root')
+SSH_PASSWORD = os.environ.get('BENCHMARK_SSH_PASSWORD')
+
+DevopsNode = namedtuple('DevopsNode', ('name', 'interfaces'))
+DevopsInterface = namedtuple('DevopsInterface', ('mac_address',))
+
+
+class DevopsEnvironment(object):
+    """Devops environment with the nodes matching the fake Nailgun nodes"""
+
+    def __init__(self, nailgun, nodes_count):
+        self.nodes = {}
+        for index in range(1, nodes_count + 1):
+            name = 'slave-{0:02d}'.format(index)
+            self.nodes[name] = DevopsNode(name, [
+                DevopsInterface(nailgun.get_mac(index, i))
+                for i in range(nailgun.interfaces_count)])
+
+    def get_node(self, name):
+        return self.nodes[name]
+
+
+class Environment(object):
+    def __init__(self, d_env):
+        self.d_env = d_env
+
+
+def get_fuel_web(server, nodes_count):
+    """Return FuelWebClient using the fake Nailgun server"""
+    from fuelweb_test.models.fuel_web_client import FuelWebClient
+
+    fuel_web = FuelWebClient.__new__(FuelWebClient)
+    fuel_web.client = server.get_client()
+    fuel_web.admin_node_ip = server.server_address[0]
+    # pylint: disable=protected-access
+    fuel_web._environment = Environment(
+        DevopsEnvironment(server.nailgun, nodes_count))
+    # pylint: enable=protected-access
+    return fuel_web
+
+
+def add_cluster(nailgun, nodes_ids=(), roles=()):
+    with nailgun.lock:
+        cluster = nailgun.create_cluster({'name': 'benchmark'}, {})
+        for node_id in nodes_ids:
+            nailgun.nodes[node_id].update(cluster=cluster['id'],
+                                          roles=list(roles))
+    return cluster['id']
+
+
+@benchmark('fuel_web.get_nailgun_node_by_devops_node', NODES_SIZES)
+def get_nailgun_node_by_devops_node(size):
+    with fake_nailgun(nodes_count=size) as server:
+        fuel_web = get_fuel_web(server, size)
+        devops_node = fuel_web.environment.d_env.get_node(
+            'slave-{0:02d}'.format(size))
+        yield lambda: fuel_web.get_nailgun_node_by_devops_node(devops_node)
+
+
+@benchmark('fuel_web.update_nodes', NODES_SIZES)
+def update_nodes(size):
+    with fake_nailgun(nodes_count=size) as server:
+        fuel_web = get_fuel_web(server, size)
+        cluster_id = add_cluster(server.nailgun)
+        nodes = {'slave-{0:02d}'.format(i): ['controller'] if i <= 3
+                 else ['compute']
+                 for i in range(1, min(size, 5) + 1)}
+        yield lambda: fuel_web.update_nodes(cluster_id, nodes)
+
+
+@benchmark('fuel_web.task_wait', (1, 10, 100))
+def task_wait(size):
+    with fake_nailgun(nodes_count=10, task_polls=size) as server:
+        fuel_web = get_fuel_web(server, 10)
+        cluster_id = add_cluster(server.nailgun)
+
+        def wait_new_task():
+            with server.nailgun.lock:
+                task = server.nailgun.add_task('deploy', cluster_id)
+            fuel_web.task_wait(task, timeout=60, interval=0)
+
+        yield wait_new_task
+
+
+@benchmark('fuel_web.get_nailgun_cluster_nodes_by_roles', NODES_SIZES)
+def get_nailgun_cluster_nodes_by_roles(size):
+    with fake_nailgun(nodes_count=size) as server:
+        fuel_web = get_fuel_web(server, size)
+        nodes_ids = sorted(server.nailgun.nodes)
+        cluster_id = add_cluster(server.nailgun, nodes_ids[::2],
+                                 ['controller'])
+        with server.nailgun.lock:
+            for node_id in nodes_ids[1::2]:
+                server.nailgun.nodes[node_id].update(cluster=cluster_id,
+                                                     roles=['compute'])
+        yield lambda: fuel_web.get_nailgun_cluster_nodes_by_roles(
+            cluster_id, ['controller'])
+
+
+@benchmark('ssh_manager.execute_on_remote')
+def execute_on_remote(size):
+    if not SSH_HOST:
+        raise SkipBenchmark('BENCHMARK_SSH_HOST is not set')
+    from fuelweb_test.helpers.ssh_manager import use_environment
+
+    with use_environment('benchmark') as ssh_manager:
+        ssh_manager.initialize(SSH_HOST, SSH_LOGIN, SSH_PASSWORD)
+    try:
+        yield lambda: ssh_manager.execute_on_remote(SSH_HOST, 'true')
+    finally:
+        for remote in ssh_manager.connections.values():
+            remote.clear()
+        ssh_manager.connections.clear()
+
+
+@benchmark('ovs.ovs_decode_columns', DATA_SIZES)
+def ovs_decode_columns(size):
+    from fuelweb_test.helpers.ovs import ovs_decode_columns
+
+    data = {
+        'headings': ['_uuid', 'name', 'external_ids', 'other_config', 'tag',
+                     'interfaces'],
+        'data': [[['uuid', '5a1e2e74-0000-0000-0000-{0:012d}'.format(i)],
+                  'tap{0:08x}-00'.format(i),
+                  ['map', [['attached-mac', 'fa:16:3e:00:00:01'],
+                           ['iface-id', 'port-{0}'.format(i)],
+                           ['iface-status', 'active']]],
+                  ['map', [['net_uuid', 'net-{0}'.format(i % 10)]]],
+                  i % 4096,
+                  ['set', []]]
+                 for i in range(size)]}
+    yield lambda: ovs_decode_columns(data)
+
+
+def get_cibadmin_status_xml(nodes_count):
+    attributes = ('arch', 'cpu_cores', 'cpu_load', 'free_swap', 'os',
+                  'pingd', 'ram_free', 'ram_total', 'root_free',
+                  'var_log_free', 'rabbit-start-time')
+    nodes = []
+    for index in range(1, nodes_count + 1):
+        nvpairs = ''.join(
+            '<nvpair id="status-{0}-{1}" name="{1}" value="{2}"/>'.format(
+                index, name, index * 10)
+            for name in attributes)
+        nodes.append(
+            '<node_state id="{0}" uname="node-{0}.test.domain.local" '
+            'in_ccm="true" crmd="online"><transient_attributes id="{0}">'
+            '<instance_attributes id="status-{0}">{1}</instance_attributes>'
+            '</transient_attributes><lrm id="{0}"><lrm_resources/></lrm>'
+            '</node_state>'.format(index, nvpairs))
+    return '<status>{0}</status>'.format(''.join(nodes))
+
+
+def get_pcs_status_xml(nodes_count):
+    nodes = ''.join(
+        '<node name="node-{0}.test.domain.local" id="{0}" online="true" '
+        'standby="false" standby_onfail="false" maintenance="false" '
+        'pending="false" unclean="false" shutdown="false" '
+        'expected_up="true" is_dc="{1}" resources_running="{2}" '
+        'type="member"/>'.format(index, 'true' if index == 1 else 'false',
+                                 index % 30)
+        for index in range(1, nodes_count + 1))
+    resources = ''.join(
+        '<resource id="p_service_{0}" resource_agent="ocf::fuel:service" '
+        'role="Started" active="true" orphaned="false" managed="true" '
+        'failed="false" failure_ignored="false" nodes_running_on="1"/>'
+        .format(index) for index in range(nodes_count * 3))
+    return ('<crm_mon version="1.1.12"><summary/><nodes>{0}</nodes>'
+            '<resources>{1}</resources></crm_mon>'.format(nodes, resources))
+
+
+@benchmark('pacemaker.get_pacemaker_nodes_attributes', DATA_SIZES)
+def get_pacemaker_nodes_attributes(size):
+    from fuelweb_test.helpers.pacemaker import get_pacemaker_nodes_attributes
+
+    xml = get_cibadmin_status_xml(size)
+    yield lambda: get_pacemaker_nodes_attributes(xml)
+
+
+@benchmark('pacemaker.get_pcs_nodes', DATA_SIZES)
+def get_pcs_nodes(size):
+    from fuelweb_test.helpers.pacemaker import get_pcs_nodes
+
+    xml = get_pcs_status_xml(size)
+    yield lambda: get_pcs_nodes(xml)
+
+
+def import_fuel_logs():
+    path = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(
+        os.path.abspath(__file__)))), 'utils', 'jenkins')
+    if path not in sys.path:
+        sys.path.append(path)
+    # pylint: disable=import-error
+    import fuel_logs
+    # pylint: enable=import-error
+    return fuel_logs
+
+
+def get_astute_log(lines_count):
+    records = (
+        "{0} INFO [1]: Processing RPC call 'granular_deploy'",
+        "{0} DEBUG [1]: Data received by DeploymentProxyReporter to report "
+        "it up: {{'nodes': [{{'uid': '1', 'progress': 10}}]}}",
+        "{0} INFO [1]: Casting message to Nailgun: {{'method': "
+        "'deploy_resp', 'args': {{'task_uuid': 'uuid', 'status': 'ready'}}}}",
+        "{0} DEBUG [1]: Task time summary: netconfig with status "
+        "successful on node 1 took 00:01:02",
+        "{0} DEBUG [1]: 1: MC agent 'puppetd', method 'last_run_summary', "
+        "results:",
+        "{{:sender=>\"1\", :statuscode=>0, :data=>{{:status=>\"idling\"}}}}",
+        "{0} INFO [1]: Run hook ---\npriority: 100\ntype: upload_file",
+    )
+    return [(records[i % len(records)].format(
+        '2016-03-01T10:{0:02d}:{1:02d}'.format(i // 60 % 60, i % 60)) +
+        '\n').encode() for i in range(lines_count)]
+
+
+def get_puppet_log(lines_count):
+    records = (
+        'debug: Executing: /usr/bin/test -f /etc/hosts',
+        'notice: MODULAR: netconfig.pp',
+        'debug: /Stage[main]/Main/File[/etc/hosts]: '
+        'Starting to evaluate the resource',
+        'debug: /Stage[main]/Main/File[/etc/hosts]: Evaluated in 0.01 '
+        'seconds',
+        'info: Compiled catalog for node-1.test.domain.local in '
+        'environment production in 2.45 seconds',
+        'err: /Stage[main]/Main/Exec[restart]: Failed to call refresh',
+        'notice: Finished catalog run in 10.01 seconds',
+    )
+    return [('2016-03-01T10:{0:02d}:{1:02d}.{2:06d}+00:00 {3}\n'.format(
+        i // 60 % 60, i % 60, i, records[i % len(records)])).encode()
+        for i in range(lines_count)]
+
+
+@benchmark('fuel_logs.AstuteLog.parse', LOG_SIZES)
+def astute_log_parse(size):
+    fuel_logs = import_fuel_logs()
+    content = get_astute_log(size)
+    parser = fuel_logs.AstuteLog()
+
+    def parse():
+        parser.clear()
+        parser.parse(content)
+
+    yield parse
+
+
+@benchmark('fuel_logs.PuppetLog.parse', LOG_SIZES)
+def puppet_log_parse(size):
+    fuel_logs = import_fuel_logs()
+    content = get_puppet_log(size)
+    parser = fuel_logs.PuppetLog()
+    parser.log_name = 'node-1/puppet-apply.log'
+
+    def parse():
+        parser.clear()
+        parser.parse(content)
+
+    yield parse
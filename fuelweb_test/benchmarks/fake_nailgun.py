@@ -0,0 +1,563 @@
+#    Copyright 2016 Mirantis, Inc.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""In-process stand-in of the Nailgun, OSTF and Keystone API
+
+It implements the endpoints used by NailgunClient with the data kept in
+memory, so the client side (NailgunClient, FuelWebClient, HTTPClient) can be
+benchmarked without the Fuel master node. Usage::
+
+    with fake_nailgun(nodes_count=100, latency=0.001) as server:
+        client = server.get_client()
+        client.list_nodes()
+
+The context manager can be used as a pytest fixture body::
+
+    @pytest.fixture
+    def nailgun():
+        with fake_nailgun(nodes_count=1000) as server:
+            yield server
+"""
+
+from contextlib import contextmanager
+import itertools
+import json
+import re
+import threading
+import time
+import uuid
+
+# pylint: disable=import-error
+from six.moves import BaseHTTPServer
+from six.moves import socketserver
+from six.moves.urllib import parse
+# pylint: enable=import-error
+
+ROUTES = (
+    ('POST', r'/v2\.0/tokens', 'create_token'),
+    ('GET', r'/v2\.0/?', 'get_keystone_version'),
+    ('GET', r'/api/version/?', 'get_version'),
+    ('GET', r'/api/nodes/?', 'list_nodes'),
+    ('PUT', r'/api/nodes/?', 'update_nodes'),
+    ('PUT', r'/api/nodes/interfaces/?', 'update_nodes_interfaces'),
+    ('GET', r'/api/nodes/(\d+)/?', 'get_node'),
+    ('PUT', r'/api/nodes/(\d+)/?', 'update_node'),
+    ('DELETE', r'/api/nodes/(\d+)/?', 'delete_node'),
+    ('GET', r'/api/nodes/(\d+)/disks/?', 'get_node_disks'),
+    ('PUT', r'/api/nodes/(\d+)/disks/?', 'update_node_disks'),
+    ('GET', r'/api/nodes/(\d+)/interfaces/?', 'get_node_interfaces'),
+    ('GET', r'/api/clusters/?', 'list_clusters'),
+    ('POST', r'/api/clusters/?', 'create_cluster'),
+    ('GET', r'/api/clusters/(\d+)/?', 'get_cluster'),
+    ('PUT', r'/api/clusters/(\d+)/?', 'update_cluster'),
+    ('DELETE', r'/api/clusters/(\d+)/?', 'delete_cluster'),
+    ('GET', r'/api/clusters/(\d+)/attributes/?', 'get_cluster_attributes'),
+    ('PUT', r'/api/clusters/(\d+)/attributes/?',
+     'update_cluster_attributes'),
+    ('GET', r'/api/clusters/(\d+)/network_configuration/\w+/?',
+     'get_network_configuration'),
+    ('PUT', r'/api/clusters/(\d+)/network_configuration/\w+/?',
+     'update_network_configuration'),
+    ('PUT', r'/api/clusters/(\d+)/network_configuration/\w+/verify/?',
+     'verify_networks'),
+    ('PUT', r'/api/clusters/(\d+)/changes/?', 'deploy_changes'),
+    ('PUT', r'/api/clusters/(\d+)/(provision|deploy)/?', 'cluster_action'),
+    ('PUT', r'/api/clusters/(\d+)/(stop_deployment|reset)/?',
+     'cluster_action'),
+    ('GET', r'/api/tasks/?', 'list_tasks'),
+    ('GET', r'/api/tasks/(\d+)/?', 'get_task'),
+    ('GET', r'/api/releases/?', 'list_releases'),
+    ('GET', r'/api/releases/(\d+)/?', 'get_release'),
+    ('PUT', r'/api/releases/(\d+)/?', 'update_release'),
+    ('GET', r'/api/notifications/?', 'list_notifications'),
+    ('GET', r'/ostf/testsets/(\d+)/?', 'get_ostf_test_sets'),
+    ('GET', r'/ostf/tests/(\d+)/?', 'get_ostf_tests'),
+    ('GET', r'/ostf/testruns/last/(\d+)/?', 'get_ostf_test_runs'),
+    ('POST', r'/ostf/testruns/?', 'run_ostf_tests'),
+)
+
+RELEASES = (
+    {'name': 'Mitaka on Ubuntu 14.04', 'operating_system': 'Ubuntu'},
+    {'name': 'Mitaka on Ubuntu+UCA 14.04', 'operating_system': 'Ubuntu'},
+    {'name': 'Mitaka on CentOS 6.5', 'operating_system': 'CentOS'},
+)
+
+OSTF_TEST_SETS = ('sanity', 'smoke', 'ha', 'tests_platform')
+
+NETWORKS = ('fuelweb_admin', 'public', 'management', 'private', 'storage')
+
+
+class NotFound(Exception):
+    pass
+
+
+class FakeNailgun(object):
+    """State of the Fuel master and handlers of the API requests
+
+    :param nodes_count: number of discovered nodes
+    :param latency: delay of every response in seconds
+    :param latencies: delays of the responses of the handlers by name,
+        override latency
+    :param task_polls: number of reads of a task until it's finished, the
+        progress grows evenly
+    :param task_status: status of the finished tasks
+    :param ostf_polls: number of reads of a test run until it's finished
+    :param interfaces_count: number of interfaces of every node
+    """
+
+    def __init__(self, nodes_count=10, latency=0, latencies=None,
+                 task_polls=3, task_status='ready', ostf_polls=3,
+                 interfaces_count=6):
+        self.latency = latency
+        self.latencies = latencies or {}
+        self.task_polls = task_polls
+        self.task_status = task_status
+        self.ostf_polls = ostf_polls
+        self.interfaces_count = interfaces_count
+        self.lock = threading.RLock()
+        self.ids = itertools.count(1)
+        self.requests = 0
+        self.token = uuid.uuid4().hex
+        self.releases = {}
+        self.nodes = {}
+        self.clusters = {}
+        self.tasks = {}
+        self.testruns = {}
+        self.notifications = []
+        for release in RELEASES:
+            release_id = next(self.ids)
+            self.releases[release_id] = dict(
+                release, id=release_id, state='available',
+                version='mitaka-9.0', roles=['controller', 'compute',
+                                             'cinder', 'ceph-osd'])
+        for index in range(1, nodes_count + 1):
+            self.add_node(index)
+
+    @staticmethod
+    def get_mac(node_index, iface_index):
+        """Return MAC address of the interface of the node, it can be used
+        to make the matching devops nodes
+        """
+        return '64:{0:02x}:{1:02x}:{2:02x}:{3:02x}:{4:02x}'.format(
+            (node_index >> 24) & 0xff, (node_index >> 16) & 0xff,
+            (node_index >> 8) & 0xff, node_index & 0xff, iface_index)
+
+    def add_node(self, index):
+        node_id = next(self.ids)
+        interfaces = [
+            {'name': 'enp0s{0}'.format(i + 3),
+             'mac': self.get_mac(index, i),
+             'max_speed': None, 'current_speed': None}
+            for i in range(self.interfaces_count)]
+        self.nodes[node_id] = {
+            'id': node_id,
+            'name': 'Untitled ({0})'.format(interfaces[0]['mac'][-5:]),
+            'hostname': 'node-{0}'.format(node_id),
+            'fqdn': 'node-{0}.test.domain.local'.format(node_id),
+            'mac': interfaces[0]['mac'],
+            'ip': '10.109.0.{0}'.format(2 + index % 250),
+            'status': 'discover',
+            'online': True,
+            'error_type': None,
+            'cluster': None,
+            'group_id': None,
+            'roles': [],
+            'pending_roles': [],
+            'pending_addition': False,
+            'pending_deletion': False,
+            'meta': {'interfaces': interfaces,
+                     'disks': [{'name': 'vda', 'size': 53687091200}],
+                     'cpu': {'total': 2},
+                     'memory': {'total': 3221225472}},
+        }
+        return self.nodes[node_id]
+
+    def get(self, items, item_id):
+        try:
+            return items[int(item_id)]
+        except KeyError:
+            raise NotFound(item_id)
+
+    def add_task(self, name, cluster_id, nodes=None):
+        task_id = next(self.ids)
+        self.tasks[task_id] = {
+            'id': task_id, 'uuid': str(uuid.uuid4()), 'name': name,
+            'cluster': cluster_id, 'status': 'running', 'progress': 0,
+            'message': None, 'result': {}, 'polls': 0,
+            'nodes': nodes or [],
+        }
+        return self.task_view(self.tasks[task_id])
+
+    @staticmethod
+    def task_view(task):
+        return {k: v for k, v in task.items() if k not in ('polls', 'nodes')}
+
+    def finish_task(self, task):
+        task['status'] = self.task_status
+        task['progress'] = 100
+        if task['status'] != 'ready':
+            task['message'] = 'Task {0} failed'.format(task['name'])
+            return
+        cluster = self.clusters.get(task['cluster'])
+        if task['name'] == 'deploy' and cluster is not None:
+            cluster['status'] = 'operational'
+        if task['name'] in ('deploy', 'provision'):
+            for node_id in task['nodes']:
+                node = self.nodes[node_id]
+                node['status'] = ('provisioned' if task['name'] == 'provision'
+                                  else 'ready')
+                node['roles'] = sorted(set(node['roles'] +
+                                           node['pending_roles']))
+                node['pending_roles'] = []
+                node['pending_addition'] = False
+        if task['name'] == 'reset_environment' and cluster is not None:
+            cluster['status'] = 'new'
+            for node in self.nodes.values():
+                if node['cluster'] == cluster['id']:
+                    node['status'] = 'discover'
+
+    # Keystone
+
+    def create_token(self, data, query):
+        return {'access': {
+            'token': {'id': self.token, 'expires': '2100-01-01T00:00:00Z',
+                      'issued_at': '2016-01-01T00:00:00Z',
+                      'tenant': {'id': 'admin', 'name': 'admin',
+                                 'enabled': True}},
+            'user': {'id': 'admin', 'name': 'admin', 'username': 'admin',
+                     'roles': [{'name': 'admin'}], 'roles_links': []},
+            'serviceCatalog': [],
+            'metadata': {'is_admin': 0, 'roles': []}}}
+
+    def get_keystone_version(self, data, query):
+        return {'version': {'id': 'v2.0', 'status': 'stable',
+                            'updated': '2014-04-17T00:00:00Z',
+                            'links': [], 'media-types': []}}
+
+    # Nailgun
+
+    def get_version(self, data, query):
+        return {'release': '9.0', 'api': '1', 'feature_groups': []}
+
+    def list_nodes(self, data, query):
+        if 'cluster_id' in query:
+            cluster_id = int(query['cluster_id'][0])
+            return [node for node in self.nodes.values()
+                    if node['cluster'] == cluster_id]
+        return list(self.nodes.values())
+
+    def get_node(self, data, query, node_id):
+        return self.get(self.nodes, node_id)
+
+    def update_node(self, data, query, node_id):
+        node = self.get(self.nodes, node_id)
+        node.update(data)
+        return node
+
+    def update_nodes(self, data, query):
+        return [self.update_node(node_data, query, node_data['id'])
+                for node_data in data]
+
+    def delete_node(self, data, query, node_id):
+        self.nodes.pop(int(node_id), None)
+        return {}
+
+    def get_node_disks(self, data, query, node_id):
+        node = self.get(self.nodes, node_id)
+        return [{'id': disk['name'], 'name': disk['name'],
+                 'size': disk['size'] // 2 ** 20, 'volumes': []}
+                for disk in node['meta']['disks']]
+
+    def update_node_disks(self, data, query, node_id):
+        self.get(self.nodes, node_id)
+        return data
+
+    def get_node_interfaces(self, data, query, node_id):
+        node = self.get(self.nodes, node_id)
+        interfaces = []
+        for index, iface in enumerate(node['meta']['interfaces']):
+            networks = []
+            if index < len(NETWORKS):
+                networks.append({'id': index + 1, 'name': NETWORKS[index]})
+            interfaces.append({'id': index + 1, 'name': iface['name'],
+                               'mac': iface['mac'], 'type': 'ether',
+                               'assigned_networks': networks})
+        return interfaces
+
+    def update_nodes_interfaces(self, data, query):
+        return data
+
+    def list_clusters(self, data, query):
+        return list(self.clusters.values())
+
+    def create_cluster(self, data, query):
+        cluster_id = next(self.ids)
+        self.clusters[cluster_id] = dict(
+            {'net_provider': 'neutron', 'mode': 'ha_compact',
+             'status': 'new', 'fuel_version': '9.0'},
+            **data)
+        self.clusters[cluster_id]['id'] = cluster_id
+        return self.clusters[cluster_id]
+
+    def get_cluster(self, data, query, cluster_id):
+        return self.get(self.clusters, cluster_id)
+
+    def update_cluster(self, data, query, cluster_id):
+        cluster = self.get(self.clusters, cluster_id)
+        cluster.update(data)
+        return cluster
+
+    def delete_cluster(self, data, query, cluster_id):
+        cluster = self.clusters.pop(int(cluster_id), None)
+        if cluster is None:
+            raise NotFound(cluster_id)
+        for node in self.nodes.values():
+            if node['cluster'] == cluster['id']:
+                node.update(cluster=None, roles=[], pending_roles=[],
+                            status='discover')
+        return self.add_task('cluster_deletion', cluster['id'])
+
+    def get_cluster_attributes(self, data, query, cluster_id):
+        cluster = self.get(self.clusters, cluster_id)
+        if 'attributes' not in cluster:
+            cluster['attributes'] = {'editable': {
+                'syslog': {'syslog_server': {'value': ''},
+                           'syslog_port': {'value': '514'}},
+                'additional_components': {}}}
+        return cluster['attributes']
+
+    def update_cluster_attributes(self, data, query, cluster_id):
+        self.get(self.clusters, cluster_id)['attributes'] = data
+        return data
+
+    def get_network_configuration(self, data, query, cluster_id):
+        cluster = self.get(self.clusters, cluster_id)
+        if 'networks' not in cluster:
+            cluster['networks'] = {
+                'networking_parameters': {'segmentation_type': 'vlan',
+                                          'vlan_range': [1000, 1030],
+                                          'floating_ranges': []},
+                'networks': [{'id': index + 1, 'name': name,
+                              'cidr': '10.109.{0}.0/24'.format(index),
+                              'vlan_start': None,
+                              'ip_ranges': []}
+                             for index, name in enumerate(NETWORKS)]}
+        return cluster['networks']
+
+    def update_network_configuration(self, data, query, cluster_id):
+        self.get(self.clusters, cluster_id)['networks'] = data
+        return self.add_task('update_networks', int(cluster_id))
+
+    def verify_networks(self, data, query, cluster_id):
+        self.get(self.clusters, cluster_id)
+        return self.add_task('verify_networks', int(cluster_id))
+
+    def get_cluster_nodes_ids(self, cluster_id, query=None):
+        if query and query.get('nodes', [''])[0]:
+            return [int(i) for i in query['nodes'][0].split(',')]
+        return [node['id'] for node in self.nodes.values()
+                if node['cluster'] == cluster_id]
+
+    def deploy_changes(self, data, query, cluster_id):
+        cluster = self.get(self.clusters, cluster_id)
+        cluster['status'] = 'deployment'
+        return self.add_task('deploy', cluster['id'],
+                             self.get_cluster_nodes_ids(cluster['id']))
+
+    def cluster_action(self, data, query, cluster_id, action):
+        cluster = self.get(self.clusters, cluster_id)
+        name = {'reset': 'reset_environment'}.get(action, action)
+        return self.add_task(name, cluster['id'],
+                             self.get_cluster_nodes_ids(cluster['id'], query))
+
+    def list_tasks(self, data, query):
+        return [self.task_view(task) for task in self.tasks.values()]
+
+    def get_task(self, data, query, task_id):
+        task = self.get(self.tasks, task_id)
+        if task['status'] == 'running':
+            task['polls'] += 1
+            if task['polls'] >= self.task_polls:
+                self.finish_task(task)
+            else:
+                task['progress'] = 100 * task['polls'] // self.task_polls
+        return self.task_view(task)
+
+    def list_releases(self, data, query):
+        return list(self.releases.values())
+
+    def get_release(self, data, query, release_id):
+        return self.get(self.releases, release_id)
+
+    def update_release(self, data, query, release_id):
+        release = self.get(self.releases, release_id)
+        release.update(data)
+        return release
+
+    def list_notifications(self, data, query):
+        return self.notifications
+
+    # OSTF
+
+    def get_ostf_test_sets(self, data, query, cluster_id):
+        return [{'id': name, 'name': name} for name in OSTF_TEST_SETS]
+
+    def get_ostf_tests(self, data, query, cluster_id):
+        return [{'id': '{0}.test_{1}'.format(name, i), 'testset': name,
+                 'name': 'Test {0} {1}'.format(name, i)}
+                for name in OSTF_TEST_SETS for i in range(5)]
+
+    def get_ostf_test_runs(self, data, query, cluster_id):
+        runs = self.testruns.get(int(cluster_id), [])
+        for run in runs:
+            if run['status'] == 'running':
+                run['polls'] += 1
+                if run['polls'] >= self.ostf_polls:
+                    run['status'] = 'finished'
+                    for test in run['tests']:
+                        test['status'] = 'success'
+        return [{k: v for k, v in run.items() if k != 'polls'}
+                for run in runs]
+
+    def run_ostf_tests(self, data, query):
+        runs = []
+        for item in data:
+            cluster_id = int(item['metadata']['cluster_id'])
+            tests = [{'id': test['id'], 'name': test['name'],
+                      'status': 'running', 'message': '', 'taken': 1.0}
+                     for test in self.get_ostf_tests(None, None, cluster_id)
+                     if test['testset'] == item['testset'] and
+                     test['id'] in item.get('tests', [test['id']])]
+            run = {'id': next(self.ids), 'testset': item['testset'],
+                   'cluster_id': cluster_id, 'status': 'running',
+                   'tests': tests, 'polls': 0}
+            cluster_runs = self.testruns.setdefault(cluster_id, [])
+            cluster_runs[:] = [r for r in cluster_runs
+                               if r['testset'] != item['testset']]
+            cluster_runs.append(run)
+            runs.append({k: v for k, v in run.items() if k != 'polls'})
+        return runs
+
+    def handle(self, method, path):
+        """Return handler and its arguments for the request"""
+        for route_method, pattern, name in self.routes:
+            if route_method != method:
+                continue
+            m = pattern.match(path)
+            if m:
+                return name, m.groups()
+        raise NotFound(path)
+
+    routes = [(method, re.compile(pattern + '$'), name)
+              for method, pattern, name in ROUTES]
+
+
+class FakeNailgunHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, *args):
+        pass
+
+    def respond(self, code, body):
+        data = json.dumps(body).encode('utf-8')
+        self.send_response(code)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def process(self):
+        nailgun = self.server.nailgun
+        url = parse.urlparse(self.path)
+        length = int(self.headers.get('Content-Length') or 0)
+        data = self.rfile.read(length) if length else b''
+        try:
+            name, args = nailgun.handle(self.command, url.path)
+        except NotFound:
+            return self.respond(404, {'message': 'Not found'})
+        if (not url.path.startswith('/v2.0') and
+                self.headers.get('X-Auth-Token') != nailgun.token):
+            return self.respond(401, {'message': 'Unauthorized'})
+        delay = nailgun.latencies.get(name, nailgun.latency)
+        if delay:
+            time.sleep(delay)
+        try:
+            body = json.loads(data.decode('utf-8')) if data else None
+        except ValueError:
+            return self.respond(400, {'message': 'Invalid JSON'})
+        with nailgun.lock:
+            nailgun.requests += 1
+            try:
+                result = getattr(nailgun, name)(
+                    body, parse.parse_qs(url.query), *args)
+            except NotFound:
+                return self.respond(404, {'message': 'Not found'})
+            code = 201 if self.command == 'POST' else 200
+            self.respond(code, result)
+
+    do_GET = do_POST = do_PUT = do_DELETE = process
+
+
+class FakeNailgunServer(socketserver.ThreadingMixIn,
+                        BaseHTTPServer.HTTPServer):
+    """HTTP server of the FakeNailgun, it listens on the loopback interface
+    and the random port if the port isn't set
+    """
+    daemon_threads = True
+
+    def __init__(self, nailgun, host='127.0.0.1', port=0):
+        BaseHTTPServer.HTTPServer.__init__(self, (host, port),
+                                           FakeNailgunHandler)
+        self.nailgun = nailgun
+        self.thread = None
+
+    @property
+    def url(self):
+        return 'http://{0}:{1}'.format(*self.server_address[:2])
+
+    @property
+    def keystone_url(self):
+        return '{0}/v2.0'.format(self.url)
+
+    def start(self):
+        self.thread = threading.Thread(target=self.serve_forever)
+        self.thread.daemon = True
+        self.thread.start()
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+        self.thread.join()
+
+    def get_client(self):
+        """Return NailgunClient using the server"""
+        from fuelweb_test.models.nailgun_client import NailgunClient
+
+        client = NailgunClient(self.server_address[0])
+        client.client.url = self.url
+        client.client.keystone_url = self.keystone_url
+        client.keystone_url = self.keystone_url
+        client.client.authenticate()
+        return client
+
+
+@contextmanager
+def fake_nailgun(**kwargs):
+    """Run FakeNailgunServer with FakeNailgun created with the arguments"""
+    server = FakeNailgunServer(FakeNailgun(**kwargs))
+    server.start()
+    try:
+        yield server
+    finally:
+        server.stop()
@@ -0,0 +1,215 @@
+#    Copyright 2016 Mirantis, Inc.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Runner of the benchmarks of the fuelweb_test helpers
+
+Benchmark is a generator function registered with the benchmark decorator.
+It gets the input size, prepares the data, yields the function to measure
+and cleans up after the yield.
+
+usage: python -m fuelweb_test.benchmarks [-h] [-l] [-f FILTER] [-o OUTPUT]
+                                         [-c COMPARE] [--min-time MIN_TIME]
+                                         [--max-calls MAX_CALLS]
+"""
+
+from __future__ import division
+from __future__ import print_function
+
+import argparse
+from datetime import datetime
+import json
+import math
+import os
+import platform
+import re
+import subprocess
+import sys
+import timeit
+import traceback
+
+RESULTS_VERSION = 1
+
+BENCHMARKS = []
+
+
+class SkipBenchmark(Exception):
+    """Raised by the benchmark if it can't be run in this environment"""
+
+
+def benchmark(name, sizes=(None,)):
+    """Register the benchmark generator for every input size"""
+    def decorator(func):
+        for size in sizes:
+            full_name = name if size is None else '{0}[{1}]'.format(name,
+                                                                    size)
+            BENCHMARKS.append((full_name, func, size))
+        return func
+    return decorator
+
+
+def percentile(values, q):
+    """Return the percentile of the sorted values (nearest rank)"""
+    if not values:
+        return None
+    index = int(math.ceil(q / 100 * len(values))) - 1
+    return values[min(max(index, 0), len(values) - 1)]
+
+
+def measure(func, min_time=1.0, max_calls=10000, warmup=1):
+    """Call the function until min_time passed or max_calls done and
+    return statistics of the calls latency in seconds
+    """
+    timer = timeit.default_timer
+    for _ in range(warmup):
+        func()
+    latencies = []
+    start = timer()
+    while len(latencies) < max_calls:
+        call_start = timer()
+        func()
+        call_end = timer()
+        latencies.append(call_end - call_start)
+        if call_end - start >= min_time:
+            break
+    total = timer() - start
+    latencies.sort()
+    return {
+        'calls': len(latencies),
+        'total': total,
+        'calls_per_sec': len(latencies) / total if total else None,
+        'mean': sum(latencies) / len(latencies),
+        'min': latencies[0],
+        'p50': percentile(latencies, 50),
+        'p99': percentile(latencies, 99),
+        'max': latencies[-1],
+    }
+
+
+def run_benchmark(name, func, size, min_time, max_calls):
+    result = {'name': name, 'size': size}
+    generator = func(size)
+    try:
+        target = next(generator)
+        result.update(measure(target, min_time, max_calls))
+        result['status'] = 'ok'
+    except SkipBenchmark as e:
+        result.update(status='skipped', message=str(e))
+    except Exception:
+        result.update(status='error', message=traceback.format_exc())
+    finally:
+        generator.close()
+    return result
+
+
+def get_commit():
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', 'HEAD'], stderr=subprocess.STDOUT,
+            cwd=os.path.dirname(os.path.abspath(__file__))).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmarks(name_filter=None, min_time=1.0, max_calls=10000):
+    """Run the benchmarks with names matching the regular expression"""
+    # pylint: disable=unused-variable
+    from fuelweb_test.benchmarks import cases  # noqa
+    # pylint: enable=unused-variable
+
+    results = []
+    for name, func, size in BENCHMARKS:
+        if name_filter and not re.search(name_filter, name):
+            continue
+        result = run_benchmark(name, func, size, min_time, max_calls)
+        results.append(result)
+        if result['status'] == 'ok':
+            sys.stderr.write(
+                '{name:<55} {calls_per_sec:>10.1f}/s  p50 {p50_ms:>9.3f}ms  '
+                'p99 {p99_ms:>9.3f}ms\n'.format(
+                    p50_ms=result['p50'] * 1000,
+                    p99_ms=result['p99'] * 1000, **result))
+        else:
+            sys.stderr.write('{0:<55} {1}: {2}\n'.format(
+                name, result['status'],
+                result['message'].strip().splitlines()[-1]))
+    return {
+        'version': RESULTS_VERSION,
+        'commit': get_commit(),
+        'date': datetime.utcnow().isoformat(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'min_time': min_time,
+        'max_calls': max_calls,
+        'results': results,
+    }
+
+
+def compare(old, new):
+    """Return lines comparing median latencies of the same benchmarks"""
+    old_results = {r['name']: r for r in old['results']
+                   if r['status'] == 'ok'}
+    lines = ['{0:<55} {1:>12} {2:>12} {3:>8}'.format(
+        'benchmark', 'old p50 ms', 'new p50 ms', 'ratio')]
+    for result in new['results']:
+        old_result = old_results.get(result['name'])
+        if result['status'] != 'ok' or old_result is None:
+            continue
+        lines.append('{0:<55} {1:>12.3f} {2:>12.3f} {3:>8.2f}'.format(
+            result['name'], old_result['p50'] * 1000, result['p50'] * 1000,
+            result['p50'] / old_result['p50']))
+    return lines
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        prog='python -m fuelweb_test.benchmarks',
+        description='Measure calls/sec and p50/p99 latency of the '
+                    'fuelweb_test helpers')
+    parser.add_argument('-l', '--list', action='store_true',
+                        help='List the benchmarks and exit')
+    parser.add_argument('-f', '--filter', default=None,
+                        help='Run only benchmarks with names matching '
+                             'the regular expression')
+    parser.add_argument('-o', '--output', default=None,
+                        help='Write results as JSON to the file instead of '
+                             'stdout')
+    parser.add_argument('-c', '--compare', default=None,
+                        help='Compare with the results JSON of another run')
+    parser.add_argument('--min-time', type=float, default=1.0,
+                        help='Minimal time to run every benchmark, seconds')
+    parser.add_argument('--max-calls', type=int, default=10000,
+                        help='Maximal number of calls of every benchmark')
+    args = parser.parse_args()
+
+    if args.list:
+        # pylint: disable=unused-variable
+        from fuelweb_test.benchmarks import cases  # noqa
+        # pylint: enable=unused-variable
+        for name, _, _ in BENCHMARKS:
+            if not args.filter or re.search(args.filter, name):
+                print(name)
+        return
+
+    results = run_benchmarks(args.filter, args.min_time, args.max_calls)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+    else:
+        print(json.dumps(results, indent=2, sort_keys=True))
+    if args.compare:
+        with open(args.compare) as f:
+            old = json.load(f)
+        sys.stderr.write('\n'.join(compare(old, results)) + '\n')
+    if any(r['status'] == 'error' for r in results['results']):
+        sys.exit(1)
@@ -37,6 +37,8 @@ from fuelweb_test.helpers.checkers import check_snapshot_logs
 from fuelweb_test.helpers.checkers import check_stats_on_collector
 from fuelweb_test.helpers.checkers import check_stats_private_info
 from fuelweb_test.helpers.checkers import count_stats_on_collector
+from fuelweb_test.helpers.metrics import calls_recorder
+from fuelweb_test.helpers.profiler import profiler
 from fuelweb_test.helpers.regenerate_repo import CustomRepo
 from fuelweb_test.helpers.ssh_manager import SSHManager
 from fuelweb_test.helpers.utils import get_current_env
@@ -116,6 +118,8 @@ def log_snapshot_after_test(func):
         logger.info("\n" + "<" * 5 + "#" * 30 + "[ {} ]"
                     .format(func.__name__) + "#" * 30 + ">" * 5 + "\n{}"
                     .format(''.join(func.__doc__)))
+        calls_recorder.start_test(func.__name__)
+        profiler.start(func.__name__)
         try:
             result = func(*args, **kwargs)
         except SkipTest:
@@ -140,6 +144,9 @@ def log_snapshot_after_test(func):
                     logger.error("Fetching of diagnostic snapshot failed: {0}".
                                  format(traceback.format_exc()))
             return result
+        finally:
+            profiler.stop()
+            calls_recorder.finish_test()
     return wrapper
 
 
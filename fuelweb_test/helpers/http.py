@@ -18,11 +18,14 @@ import traceback
 from keystoneclient.v2_0 import Client as KeystoneClient
 from keystoneclient import exceptions
 # pylint: disable=import-error
+from six.moves.urllib import parse
 from six.moves.urllib import request
 from six.moves.urllib.error import HTTPError
 # pylint: enable=import-error
 
 from fuelweb_test import logger
+from fuelweb_test.helpers.metrics import calls_recorder
+from fuelweb_test.helpers.metrics import get_endpoint_template
 
 
 class HTTPClient(object):
@@ -93,16 +96,29 @@ class HTTPClient(object):
         return self._open(req)
 
     def _open(self, req):
+        url = req.get_full_url()
+        endpoint = url[len(self.url):] if url.startswith(self.url) else url
+        with calls_recorder.call('http', req.get_method(),
+                                 parse.urlparse(url).netloc,
+                                 get_endpoint_template(endpoint)) as call:
+            response = self._open_with_retries(req, call)
+            call.bytes = (len(req.data or '') +
+                          int(response.info().get('Content-Length') or 0))
+            return response
+
+    def _open_with_retries(self, req, call):
         try:
             return self._get_response(req)
         except HTTPError as e:
             if e.code == 401:
                 logger.warning('Authorization failure: {0}'.format(e.read()))
                 self.authenticate()
+                call.retries += 1
                 return self._get_response(req)
             elif e.code == 504:
                 logger.error("Got HTTP Error 504: "
                              "Gateway Time-out: {}".format(e.read()))
+                call.retries += 1
                 return self._get_response(req)
             else:
                 logger.error('{} code {} [{}]'.format(e.reason,
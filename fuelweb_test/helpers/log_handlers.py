@@ -0,0 +1,128 @@
+#    Copyright 2016 Mirantis, Inc.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Handlers writing the logs of the tests in the background thread
+
+The tests put the records to the queue with QueueHandler and QueueListener
+writes them to the file, so the test thread doesn't wait for the disk.
+QueueHandler and QueueListener are taken from logging.handlers, python 2
+doesn't have them and the simplified versions are used instead.
+
+This module must not import fuelweb_test, it's used to set up the logger.
+"""
+
+import copy
+import gzip
+import logging
+import logging.handlers
+import os
+import shutil
+import threading
+
+try:
+    from logging.handlers import QueueHandler
+    from logging.handlers import QueueListener
+except ImportError:
+    class QueueHandler(logging.Handler):
+        """Handler putting the records to the queue"""
+
+        def __init__(self, queue):
+            logging.Handler.__init__(self)
+            self.queue = queue
+
+        def prepare(self, record):
+            # The message is formatted here, the arguments may be changed
+            # by the caller before the listener writes the record
+            msg = self.format(record)
+            record = copy.copy(record)
+            record.message = msg
+            record.msg = msg
+            record.args = None
+            record.exc_info = None
+            record.exc_text = None
+            return record
+
+        def emit(self, record):
+            try:
+                self.queue.put_nowait(self.prepare(record))
+            except Exception:
+                self.handleError(record)
+
+    class QueueListener(object):
+        """Thread passing the records from the queue to the handlers"""
+
+        _sentinel = None
+
+        def __init__(self, queue, *handlers):
+            self.queue = queue
+            self.handlers = handlers
+            self._thread = None
+
+        def start(self):
+            self._thread = threading.Thread(target=self._monitor)
+            self._thread.daemon = True
+            self._thread.start()
+
+        def _monitor(self):
+            while True:
+                record = self.queue.get()
+                if record is self._sentinel:
+                    break
+                for handler in self.handlers:
+                    handler.handle(record)
+
+        def stop(self):
+            self.queue.put_nowait(self._sentinel)
+            self._thread.join()
+            self._thread = None
+
+
+class CompressedRotatingFileHandler(logging.handlers.RotatingFileHandler):
+    """Rotate the log when it's larger than max_bytes, gzip the backups
+
+    The log and the backups left by the previous run are removed when
+    the handler is created, like the log opened with the 'w' mode.
+    """
+
+    def __init__(self, filename, max_bytes, backup_count=5, compress=True):
+        self.compress = compress
+        self.baseFilename = os.path.abspath(filename)
+        for index in range(backup_count + 1):
+            path = self.get_backup_name(index) if index else filename
+            if os.path.exists(path):
+                os.remove(path)
+        logging.handlers.RotatingFileHandler.__init__(
+            self, filename, maxBytes=max_bytes, backupCount=backup_count)
+
+    def get_backup_name(self, index):
+        name = '{0}.{1}'.format(self.baseFilename, index)
+        return name + '.gz' if self.compress else name
+
+    def doRollover(self):
+        if not self.compress:
+            logging.handlers.RotatingFileHandler.doRollover(self)
+            return
+        if self.stream:
+            self.stream.close()
+            self.stream = None
+        if self.backupCount > 0:
+            for index in range(self.backupCount - 1, 0, -1):
+                source = self.get_backup_name(index)
+                if os.path.exists(source):
+                    os.rename(source, self.get_backup_name(index + 1))
+            with open(self.baseFilename, 'rb') as src:
+                with gzip.open(self.get_backup_name(1), 'wb', 6) as dst:
+                    shutil.copyfileobj(src, dst)
+            os.remove(self.baseFilename)
+        self.stream = self._open()
@@ -12,6 +12,8 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import threading
+
 
 class SingletonMeta(type):
     """Metaclass for Singleton
@@ -25,3 +27,23 @@ class SingletonMeta(type):
             cls._instances[cls] = super(
                 SingletonMeta, cls).__call__(*args, **kwargs)
         return cls._instances[cls]
+
+
+class KeyedSingletonMeta(type):
+    """Metaclass for classes with one instance per key
+
+    The key of the instance to return is taken from the _instance_key
+    class method called with the arguments of the constructor, so the
+    existing calls of the constructor get the instance for the current key
+    """
+    _instances = {}
+    _lock = threading.RLock()
+
+    def __call__(cls, *args, **kwargs):
+        key = (cls, cls._instance_key(*args, **kwargs))
+        if key not in cls._instances:
+            with cls._lock:
+                if key not in cls._instances:
+                    cls._instances[key] = super(
+                        KeyedSingletonMeta, cls).__call__(*args, **kwargs)
+        return cls._instances[key]
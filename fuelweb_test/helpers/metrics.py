@@ -0,0 +1,251 @@
+#    Copyright 2016 Mirantis, Inc.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Metrics of the HTTP and SSH calls made by the tests
+
+Every call is added to the aggregates of the current test: count, time,
+bytes, retries and errors with the latency histogram per operation, host
+and endpoint or command template, and to the list of the slowest calls.
+The aggregates are written to settings.CALLS_METRICS_PATH when the test is
+finished, one key per test.
+"""
+
+from __future__ import division
+
+import atexit
+from contextlib import contextmanager
+import heapq
+import itertools
+import json
+import os
+import re
+import threading
+import time
+import traceback
+
+from fuelweb_test import logger
+from fuelweb_test import settings
+
+HISTOGRAM_BOUNDS = (0.01, 0.05, 0.1, 0.5, 1, 5, 10, 30, 60)
+NO_TEST = '<no test>'
+
+ID_RE = re.compile(r'/\d+(?=/|$)')
+UUID_RE = re.compile(r'\b[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-'
+                     r'[0-9a-f]{12}\b', re.I)
+IP_RE = re.compile(r'\b\d{1,3}(\.\d{1,3}){3}\b')
+NUMBER_RE = re.compile(r'\b\d+\b')
+SPACES_RE = re.compile(r'\s+')
+COMMAND_MAX_LENGTH = 100
+
+
+def get_endpoint_template(endpoint):
+    """Return the endpoint without the query and with {id} for the ids"""
+    return ID_RE.sub('/{id}', endpoint.split('?', 1)[0])
+
+
+def get_command_template(cmd):
+    """Return the first line of the command with placeholders for the
+    uuids, addresses and numbers
+    """
+    cmd = cmd.strip().split('\n', 1)[0][:COMMAND_MAX_LENGTH * 2]
+    cmd = UUID_RE.sub('{uuid}', cmd)
+    cmd = IP_RE.sub('{ip}', cmd)
+    cmd = NUMBER_RE.sub('{n}', cmd)
+    return SPACES_RE.sub(' ', cmd)[:COMMAND_MAX_LENGTH]
+
+
+def get_path_size(path):
+    """Return size of the file or the files in the directory"""
+    if os.path.isfile(path):
+        return os.path.getsize(path)
+    size = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                size += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass
+    return size
+
+
+class TestCalls(object):
+    """Aggregates of the calls made by one test"""
+
+    def __init__(self, name, top=10):
+        self.name = name
+        self.top = top
+        self.started = time.time()
+        self.operations = {}
+        self.slowest = []
+        self.counter = itertools.count()
+
+    def add(self, call):
+        key = (call.kind, call.operation, call.host, call.name)
+        stats = self.operations.get(key)
+        if stats is None:
+            stats = self.operations[key] = {
+                'count': 0, 'time': 0.0, 'max': 0.0, 'bytes': 0,
+                'retries': 0, 'errors': 0,
+                'histogram': [0] * (len(HISTOGRAM_BOUNDS) + 1)}
+        stats['count'] += 1
+        stats['time'] += call.latency
+        stats['max'] = max(stats['max'], call.latency)
+        stats['bytes'] += call.bytes
+        stats['retries'] += call.retries
+        stats['errors'] += call.error is not None
+        for i, bound in enumerate(HISTOGRAM_BOUNDS):
+            if call.latency < bound:
+                stats['histogram'][i] += 1
+                break
+        else:
+            stats['histogram'][-1] += 1
+        item = (call.latency, next(self.counter), call.as_dict())
+        if len(self.slowest) < self.top:
+            heapq.heappush(self.slowest, item)
+        elif call.latency > self.slowest[0][0]:
+            heapq.heapreplace(self.slowest, item)
+
+    def as_dict(self):
+        operations = []
+        for (kind, operation, host, name), stats in self.operations.items():
+            histogram = dict(zip(
+                ['<{0}s'.format(b) for b in HISTOGRAM_BOUNDS] +
+                ['>={0}s'.format(HISTOGRAM_BOUNDS[-1])],
+                stats['histogram']))
+            operations.append(dict(
+                stats, kind=kind, operation=operation, host=host, name=name,
+                mean=stats['time'] / stats['count'], histogram=histogram))
+        operations.sort(key=lambda o: o['time'], reverse=True)
+        totals = {}
+        for operation in operations:
+            kind = totals.setdefault(operation['kind'],
+                                     {'count': 0, 'time': 0.0, 'bytes': 0})
+            for key in kind:
+                kind[key] += operation[key]
+        return {
+            'started': self.started,
+            'duration': time.time() - self.started,
+            'totals': totals,
+            'operations': operations,
+            'slowest': [item[2] for item in sorted(self.slowest,
+                                                   reverse=True)],
+        }
+
+
+class Call(object):
+    """Context manager measuring one call, the caller can set bytes and
+    retries inside the block
+    """
+
+    def __init__(self, recorder, kind, operation, host, name):
+        self.recorder = recorder
+        self.kind = kind
+        self.operation = operation
+        self.host = host
+        self.name = name
+        self.bytes = 0
+        self.retries = 0
+        self.error = None
+        self.started = 0
+        self.latency = 0
+
+    def __enter__(self):
+        self.started = time.time()
+        return self
+
+    def __exit__(self, exc_type, exc_value, exc_tb):
+        self.latency = time.time() - self.started
+        if exc_type is not None:
+            self.error = exc_type.__name__
+        self.recorder.add(self)
+
+    def as_dict(self):
+        return {'kind': self.kind, 'operation': self.operation,
+                'host': self.host, 'name': self.name,
+                'latency': self.latency, 'started': self.started,
+                'bytes': self.bytes, 'retries': self.retries,
+                'error': self.error}
+
+
+class CallsRecorder(object):
+    """Collect the calls of the running tests and write them to the file"""
+
+    def __init__(self, path, top=10, enabled=True):
+        self.path = path
+        self.top = top
+        self.enabled = enabled
+        self.lock = threading.Lock()
+        self.tests = []
+        self.default = TestCalls(NO_TEST, top)
+
+    def call(self, kind, operation, host, name):
+        return Call(self, kind, operation, host, name)
+
+    def add(self, call):
+        if not self.enabled:
+            return
+        with self.lock:
+            test = self.tests[-1] if self.tests else self.default
+            test.add(call)
+
+    def start_test(self, name):
+        with self.lock:
+            self.tests.append(TestCalls(name, self.top))
+
+    def finish_test(self):
+        with self.lock:
+            if not self.tests:
+                return
+            test = self.tests.pop()
+        if self.enabled and test.operations:
+            self.save(test)
+
+    @contextmanager
+    def test(self, name):
+        """Collect the calls made inside the block as the calls of the test
+        """
+        self.start_test(name)
+        try:
+            yield
+        finally:
+            self.finish_test()
+
+    def flush(self):
+        """Save the calls made outside of the tests"""
+        with self.lock:
+            test = self.default
+            self.default = TestCalls(NO_TEST, self.top)
+        if self.enabled and test.operations:
+            self.save(test)
+
+    def save(self, test):
+        try:
+            data = {}
+            if os.path.isfile(self.path):
+                with open(self.path) as f:
+                    data = json.load(f)
+            data[test.name] = test.as_dict()
+            tmp_path = '{0}.tmp'.format(self.path)
+            with open(tmp_path, 'w') as f:
+                json.dump(data, f, indent=2, sort_keys=True)
+            os.rename(tmp_path, self.path)
+        except Exception:
+            logger.error('Error storing calls metrics of {0}: {1}'.format(
+                test.name, traceback.format_exc()))
+
+
+calls_recorder = CallsRecorder(settings.CALLS_METRICS_PATH,
+                               settings.CALLS_METRICS_TOP,
+                               settings.CALLS_METRICS)
+atexit.register(calls_recorder.flush)
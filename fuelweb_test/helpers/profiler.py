@@ -0,0 +1,209 @@
+#    Copyright 2016 Mirantis, Inc.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Profiling of the tests and the system test steps
+
+It's disabled by default and enabled with the PROFILE setting or the
+--profile option of 'run_system_test.py run':
+
+cprofile  writes <test>.pstats, it can be read with pstats or converted
+          to the flamegraph with flameprof or gprof2dot
+sampling  samples the stack of the test thread every PROFILE_INTERVAL
+          seconds and writes <test>.collapsed, the input of flamegraph.pl
+
+The time of every profiled test is split into CPU time of the process and
+the rest, the time spent waiting for the network, the nodes and sleeps,
+in profile_summary.json. The files are written to settings.PROFILE_DIR.
+"""
+
+from __future__ import division
+
+from contextlib import contextmanager
+import cProfile
+import collections
+import json
+import os
+import re
+import sys
+import threading
+import time
+import traceback
+
+from fuelweb_test import logger
+from fuelweb_test import settings
+
+PROFILE_MODES = ('cprofile', 'sampling')
+SUMMARY_FILE = 'profile_summary.json'
+
+
+def get_cpu_time():
+    times = os.times()
+    return times[0] + times[1]
+
+
+def get_safe_name(name):
+    return re.sub(r'[^\w.-]+', '_', name).strip('_')
+
+
+class SamplingProfiler(object):
+    """Collect stacks of the thread with the period of the interval"""
+
+    def __init__(self, interval=0.01):
+        self.interval = interval
+        self.thread_id = None
+        self.samples = collections.Counter()
+        self.running = threading.Event()
+        self.sampler = None
+
+    @staticmethod
+    def get_stack(frame):
+        stack = []
+        while frame is not None:
+            code = frame.f_code
+            stack.append('{0}:{1}'.format(
+                os.path.splitext(os.path.basename(code.co_filename))[0],
+                code.co_name))
+            frame = frame.f_back
+        return ';'.join(reversed(stack))
+
+    def sample(self):
+        while self.running.is_set():
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is not None:
+                self.samples[self.get_stack(frame)] += 1
+            del frame
+            time.sleep(self.interval)
+
+    def enable(self):
+        self.thread_id = threading.current_thread().ident
+        self.running.set()
+        self.sampler = threading.Thread(target=self.sample)
+        self.sampler.daemon = True
+        self.sampler.start()
+
+    def disable(self):
+        self.running.clear()
+        self.sampler.join()
+
+    def dump_stats(self, path):
+        with open(path, 'w') as f:
+            for stack, count in sorted(self.samples.items()):
+                f.write('{0} {1}\n'.format(stack, count))
+
+
+class TestsProfiler(object):
+    """Profile the tests selected by the name pattern or the names
+
+    :param mode: one of PROFILE_MODES, the profiling is disabled if it's
+        empty
+    :param pattern: regular expression the test name is searched for
+    :param names: names of the tests to profile, all the tests are profiled
+        if neither the pattern nor the names are set
+    """
+
+    def __init__(self, mode=None, pattern=None, names=None, interval=0.01,
+                 path=None):
+        self.interval = interval
+        self.path = path
+        self.mode = None
+        self.pattern = None
+        self.names = None
+        self.active = []
+        self.configure(mode, pattern, names)
+
+    def configure(self, mode=None, pattern=None, names=None):
+        if mode and mode not in PROFILE_MODES:
+            raise ValueError('Unknown profile mode {0!r}, use one of '
+                             '{1}'.format(mode, ', '.join(PROFILE_MODES)))
+        self.mode = mode or None
+        self.pattern = re.compile(pattern) if pattern else None
+        # An empty set of names selects nothing, None selects all the tests
+        self.names = set(names) if names is not None else None
+
+    def is_selected(self, name):
+        if not self.mode:
+            return False
+        if self.pattern is None and self.names is None:
+            return True
+        return bool(self.pattern is not None and self.pattern.search(name) or
+                    self.names is not None and name in self.names)
+
+    def start(self, name):
+        """Start profiling of the test, nested tests are profiled as
+        a part of the outer one
+        """
+        if self.active or not self.is_selected(name):
+            self.active.append(None)
+            return
+        if self.mode == 'cprofile':
+            profile = cProfile.Profile()
+        else:
+            profile = SamplingProfiler(self.interval)
+        self.active.append((name, profile, time.time(), get_cpu_time()))
+        profile.enable()
+
+    def stop(self):
+        item = self.active.pop() if self.active else None
+        if item is None:
+            return
+        name, profile, started, cpu_started = item
+        profile.disable()
+        wall = time.time() - started
+        cpu = get_cpu_time() - cpu_started
+        try:
+            self.save(name, profile, wall, cpu)
+        except Exception:
+            logger.error('Error storing profile of {0}: {1}'.format(
+                name, traceback.format_exc()))
+
+    @contextmanager
+    def profile(self, name):
+        self.start(name)
+        try:
+            yield
+        finally:
+            self.stop()
+
+    def save(self, name, profile, wall, cpu):
+        if not os.path.isdir(self.path):
+            os.makedirs(self.path)
+        ext = '.pstats' if self.mode == 'cprofile' else '.collapsed'
+        profile_path = os.path.join(self.path, get_safe_name(name) + ext)
+        profile.dump_stats(profile_path)
+        logger.info('Profile of {0} is saved to {1}: {2:.1f}s wall, {3:.1f}s '
+                    'CPU, {4:.1f}s wait'.format(name, profile_path, wall, cpu,
+                                                max(wall - cpu, 0)))
+
+        summary_path = os.path.join(self.path, SUMMARY_FILE)
+        summary = {}
+        if os.path.isfile(summary_path):
+            with open(summary_path) as f:
+                summary = json.load(f)
+        summary[name] = {
+            'mode': self.mode,
+            'profile': profile_path,
+            'wall': wall,
+            'cpu': cpu,
+            'wait': max(wall - cpu, 0),
+            'cpu_percent': 100 * cpu / wall if wall else 0,
+        }
+        tmp_path = '{0}.tmp'.format(summary_path)
+        with open(tmp_path, 'w') as f:
+            json.dump(summary, f, indent=2, sort_keys=True)
+        os.rename(tmp_path, summary_path)
+
+
+profiler = TestsProfiler(settings.PROFILE, settings.PROFILE_PATTERN,
+                         interval=settings.PROFILE_INTERVAL,
+                         path=settings.PROFILE_DIR)
@@ -12,10 +12,12 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+from contextlib import contextmanager
 import json
 import os
 import posixpath
 import re
+import threading
 import traceback
 
 from devops.helpers.helpers import wait
@@ -24,11 +26,53 @@ from paramiko import RSAKey
 import six
 
 from fuelweb_test import logger
-from fuelweb_test.helpers.metaclasses import SingletonMeta
+from fuelweb_test import settings
+from fuelweb_test.helpers.metaclasses import KeyedSingletonMeta
+from fuelweb_test.helpers.metrics import calls_recorder
+from fuelweb_test.helpers.metrics import get_command_template
+from fuelweb_test.helpers.metrics import get_path_size
 from fuelweb_test.helpers.exceptions import UnexpectedExitCode
 
+_local = threading.local()
+_default_environment = [settings.ENV_NAME]
 
-@six.add_metaclass(SingletonMeta)
+
+def get_current_environment():
+    """Return name of the environment SSHManager() is used for
+
+    It's the innermost use_environment() of the current thread or
+    the default environment
+    """
+    stack = getattr(_local, 'environments', None)
+    if stack:
+        return stack[-1]
+    return _default_environment[0]
+
+
+def set_default_environment(name):
+    """Set the environment used outside of use_environment(), it's set by
+    EnvironmentModel to the name of its devops environment
+    """
+    _default_environment[0] = name
+
+
+@contextmanager
+def use_environment(name):
+    """Make SSHManager() return the manager of the environment
+
+    Every environment has its own admin node address, credentials and
+    connections.
+    """
+    if getattr(_local, 'environments', None) is None:
+        _local.environments = []
+    _local.environments.append(name)
+    try:
+        yield SSHManager()
+    finally:
+        _local.environments.pop()
+
+
+@six.add_metaclass(KeyedSingletonMeta)
 class SSHManager(object):
 
     def __init__(self):
@@ -39,6 +83,10 @@ class SSHManager(object):
         self.login = None
         self.__password = None
 
+    @classmethod
+    def _instance_key(cls):
+        return get_current_environment()
+
     @property
     def connections(self):
         return self.__connections
@@ -138,8 +186,13 @@ class SSHManager(object):
                 ip=ip, port=port))
 
     def execute(self, ip, cmd, port=22):
-        remote = self._get_remote(ip=ip, port=port)
-        return remote.execute(cmd)
+        with calls_recorder.call('ssh', 'execute', ip,
+                                 get_command_template(cmd)) as call:
+            remote = self._get_remote(ip=ip, port=port)
+            result = remote.execute(cmd)
+            call.bytes = sum(len(line) for line in
+                             result['stdout'] + result['stderr'])
+            return result
 
     def check_call(self, ip, cmd, port=22, verbose=False):
         remote = self._get_remote(ip=ip, port=port)
@@ -242,12 +295,18 @@ class SSHManager(object):
         return remote.open(path, mode)
 
     def upload_to_remote(self, ip, source, target, port=22):
-        remote = self._get_remote(ip=ip, port=port)
-        return remote.upload(source, target)
+        with calls_recorder.call('ssh', 'upload', ip, target) as call:
+            remote = self._get_remote(ip=ip, port=port)
+            result = remote.upload(source, target)
+            call.bytes = get_path_size(os.path.expanduser(source))
+            return result
 
     def download_from_remote(self, ip, destination, target, port=22):
-        remote = self._get_remote(ip=ip, port=port)
-        return remote.download(destination, target)
+        with calls_recorder.call('ssh', 'download', ip, destination) as call:
+            remote = self._get_remote(ip=ip, port=port)
+            result = remote.download(destination, target)
+            call.bytes = get_path_size(target)
+            return result
 
     def exists_on_remote(self, ip, path, port=22):
         remote = self._get_remote(ip=ip, port=port)
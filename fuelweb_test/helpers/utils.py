@@ -14,6 +14,7 @@
 
 from __future__ import division
 
+from contextlib import contextmanager
 import copy
 # pylint: disable=no-name-in-module
 from distutils import version
@@ -24,6 +25,7 @@ import os
 import posixpath
 import re
 import signal
+import threading
 import time
 import traceback
 
@@ -313,6 +315,28 @@ class TimeStat(object):
     with TimeStat([name],[is_uniq=True]):
     """
 
+    # Names of the running system test steps, the timers started inside
+    # of the step are stored under the name of the step
+    steps = []
+    steps_lock = threading.Lock()
+
+    @classmethod
+    @contextmanager
+    def step(cls, name):
+        """Store the timers started inside the block under the step name"""
+        with cls.steps_lock:
+            cls.steps.append(name)
+        try:
+            yield
+        finally:
+            with cls.steps_lock:
+                cls.steps.remove(name)
+
+    @classmethod
+    def get_current_step(cls):
+        with cls.steps_lock:
+            return cls.steps[-1] if cls.steps else None
+
     def __init__(self, name=None, is_uniq=False):
         if name:
             self.name = name
@@ -335,8 +359,9 @@ class TimeStat(object):
         yaml_path = []
 
         # There will be a list of one or two yaml subkeys:
-        # - first key name is the method name of the test
-        method_name = get_test_method_name()
+        # - first key name is the name of the running system test step or
+        # the method name of the test
+        method_name = self.get_current_step() or get_test_method_name()
         if method_name:
             yaml_path.append(method_name)
 
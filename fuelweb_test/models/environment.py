@@ -30,7 +30,7 @@ import six
 from fuelweb_test.helpers.decorators import revert_info
 from fuelweb_test.helpers.decorators import update_rpm_packages
 from fuelweb_test.helpers.decorators import upload_manifests
-from fuelweb_test.helpers.metaclasses import SingletonMeta
+from fuelweb_test.helpers.metaclasses import KeyedSingletonMeta
 from fuelweb_test.helpers.eb_tables import Ebtables
 from fuelweb_test.helpers.fuel_actions import AdminActions
 from fuelweb_test.helpers.fuel_actions import BaseActions
@@ -39,7 +39,9 @@ from fuelweb_test.helpers.fuel_actions import NailgunActions
 from fuelweb_test.helpers.fuel_actions import PostgresActions
 from fuelweb_test.helpers.fuel_actions import NessusActions
 from fuelweb_test.helpers.fuel_actions import FuelBootstrapCliActions
-from fuelweb_test.helpers.ssh_manager import SSHManager
+from fuelweb_test.helpers.ssh_manager import get_current_environment
+from fuelweb_test.helpers.ssh_manager import set_default_environment
+from fuelweb_test.helpers.ssh_manager import use_environment
 from fuelweb_test.helpers.utils import erase_data_from_hdd
 from fuelweb_test.helpers.utils import TimeStat
 from fuelweb_test.helpers import multiple_networks_hacks
@@ -51,9 +53,14 @@ from fuelweb_test import logwrap
 from fuelweb_test import logger
 
 
-@six.add_metaclass(SingletonMeta)
+@six.add_metaclass(KeyedSingletonMeta)
 class EnvironmentModel(object):
-    """EnvironmentModel."""  # TODO documentation
+    """Model of the devops environment, there is one instance for every
+    environment name
+
+    The environment becomes the default one of SSHManager(), the model
+    and its helpers use the SSHManager of the environment.
+    """
 
     def __init__(self, config=None):
         if not hasattr(self, "_virt_env"):
@@ -61,23 +68,36 @@ class EnvironmentModel(object):
         if not hasattr(self, "_fuel_web"):
             self._fuel_web = None
         self._config = config
-        self.ssh_manager = SSHManager()
-        self.ssh_manager.initialize(
-            self.get_admin_node_ip(),
-            login=settings.SSH_CREDENTIALS['login'],
-            password=settings.SSH_CREDENTIALS['password']
-        )
-        self.admin_actions = AdminActions()
-        self.base_actions = BaseActions()
-        self.cobbler_actions = CobblerActions()
-        self.nailgun_actions = NailgunActions()
-        self.postgres_actions = PostgresActions()
-        self.fuel_bootstrap_actions = FuelBootstrapCliActions()
+        self.env_name = self._instance_key(config)
+        set_default_environment(self.env_name)
+        with use_environment(self.env_name) as ssh_manager:
+            self.ssh_manager = ssh_manager
+            self.ssh_manager.initialize(
+                self.get_admin_node_ip(),
+                login=settings.SSH_CREDENTIALS['login'],
+                password=settings.SSH_CREDENTIALS['password']
+            )
+            self.admin_actions = AdminActions()
+            self.base_actions = BaseActions()
+            self.cobbler_actions = CobblerActions()
+            self.nailgun_actions = NailgunActions()
+            self.postgres_actions = PostgresActions()
+            self.fuel_bootstrap_actions = FuelBootstrapCliActions()
+
+    @classmethod
+    def _instance_key(cls, config=None):
+        """Return name of the devops environment of the config or of the
+        current environment of SSHManager
+        """
+        if config:
+            return config['template']['devops_settings']['env_name']
+        return get_current_environment()
 
     @property
     def fuel_web(self):
         if self._fuel_web is None:
-            self._fuel_web = FuelWebClient(self)
+            with use_environment(self.env_name):
+                self._fuel_web = FuelWebClient(self)
         return self._fuel_web
 
     def __repr__(self):
@@ -210,15 +230,14 @@ class EnvironmentModel(object):
         if self._virt_env is None:
             if not self._config:
                 try:
-                    return Environment.get(name=settings.ENV_NAME)
+                    return Environment.get(name=self.env_name)
                 except Exception:
                     self._virt_env = Environment.describe_environment(
                         boot_from=settings.ADMIN_BOOT_DEVICE)
                     self._virt_env.define()
             else:
                 try:
-                    return Environment.get(name=self._config[
-                        'template']['devops_settings']['env_name'])
+                    return Environment.get(name=self.env_name)
                 except Exception:
                     self._virt_env = Environment.create_environment(
                         full_config=self._config)
@@ -300,11 +319,12 @@ class EnvironmentModel(object):
 
         logger.info('We have snapshot with such name: {:s}'.format(name))
 
-        logger.info("Reverting the snapshot '{0}' ....".format(name))
-        self.d_env.revert(name)
+        with TimeStat("revert_snapshot"):
+            logger.info("Reverting the snapshot '{0}' ....".format(name))
+            self.d_env.revert(name)
 
-        logger.info("Resuming the snapshot '{0}' ....".format(name))
-        self.resume_environment()
+            logger.info("Resuming the snapshot '{0}' ....".format(name))
+            self.resume_environment()
 
         if not skip_timesync:
             self.sync_time()
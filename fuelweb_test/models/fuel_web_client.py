@@ -1093,6 +1093,7 @@ class FuelWebClient(object):
         return self.client.verify_networks(cluster_id)
 
     @logwrap
+    @duration
     def run_ostf(self, cluster_id, test_sets=None,
                  should_fail=0, tests_must_be_passed=None,
                  timeout=None, failed_test_name=None):
@@ -1898,6 +1899,7 @@ class FuelWebClient(object):
                 ' del {1} dev {2}'.format(namespace, ip, interface))
 
     @logwrap
+    @duration
     def provisioning_cluster_wait(self, cluster_id, progress=None):
         logger.info('Start cluster #%s provisioning', cluster_id)
         task = self.client.provision_nodes(cluster_id)
@@ -481,6 +481,28 @@ TIMESTAT_PATH_YAML = os.environ.get(
     'TIMESTAT_PATH_YAML', os.path.join(
         LOGS_DIR, 'timestat_{}.yaml'.format(time.strftime("%Y%m%d"))))
 
+# Write sys_test.log in the background thread
+LOG_ASYNC = get_var_as_bool('LOG_ASYNC', True)
+# Rotate sys_test.log when it's larger than LOG_MAX_SIZE megabytes,
+# 0 to disable the rotation
+LOG_MAX_SIZE = int(os.environ.get('LOG_MAX_SIZE', 0))
+LOG_BACKUP_COUNT = int(os.environ.get('LOG_BACKUP_COUNT', 10))
+LOG_COMPRESS = get_var_as_bool('LOG_COMPRESS', True)
+# Levels of the loggers, for example 'paramiko=WARNING,keystoneclient=INFO'
+LOG_LEVELS = os.environ.get('LOG_LEVELS', '')
+
+CALLS_METRICS = get_var_as_bool('CALLS_METRICS', True)
+CALLS_METRICS_PATH = os.environ.get(
+    'CALLS_METRICS_PATH', os.path.join(LOGS_DIR, 'calls_metrics.json'))
+CALLS_METRICS_TOP = int(os.environ.get('CALLS_METRICS_TOP', 10))
+
+# Profile the tests: cprofile or sampling
+PROFILE = os.environ.get('PROFILE')
+PROFILE_PATTERN = os.environ.get('PROFILE_PATTERN')
+PROFILE_INTERVAL = float(os.environ.get('PROFILE_INTERVAL', 0.01))
+PROFILE_DIR = os.environ.get('PROFILE_DIR', os.path.join(LOGS_DIR,
+                                                         'profiles'))
+
 FUEL_PLUGIN_BUILDER_REPO = 'https://github.com/openstack/fuel-plugins.git'
 
 ###############################################################################
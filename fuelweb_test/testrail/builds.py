@@ -15,15 +15,84 @@
 from __future__ import unicode_literals
 
 import json
+from multiprocessing.pool import ThreadPool
+import os
 import re
 
 # pylint: disable=import-error
 from six.moves.urllib import request
+from six.moves.urllib.parse import quote
 # pylint: enable=import-error
 
 from fuelweb_test.testrail.settings import JENKINS
 from fuelweb_test.testrail.settings import logger
 
+# Fields of the build and test report documents used by the reporting
+# tools, Jenkins API returns only them when they are passed as 'tree'
+BUILD_TREE = ','.join([
+    'id', 'number', 'url', 'result', 'building', 'description', 'timestamp',
+    'duration', 'actions[parameters[name,value],'
+    'causes[upstreamProject,upstreamBuild]]',
+    'artifacts[fileName,relativePath]',
+    'subBuilds[jobName,buildNumber,result]',
+    'runs[number,url]',
+])
+TEST_DATA_TREE = ('suites[cases[className,name,duration,status,'
+                  'skippedMessage,errorDetails,errorStackTrace]]')
+
+
+def fetch_concurrently(func, items):
+    """Call the function for every item in the pool of threads and
+    return the results in the order of items
+    """
+    items = list(items)
+    if JENKINS['max_workers'] <= 1 or len(items) <= 1:
+        return [func(item) for item in items]
+    pool = ThreadPool(min(JENKINS['max_workers'], len(items)))
+    try:
+        return pool.map(func, items)
+    finally:
+        pool.close()
+
+
+def get_cache_path(name, number, kind):
+    """Return path to the cached document of the Jenkins build or None
+    if the cache is disabled
+    """
+    if not JENKINS['cache_dir']:
+        return None
+    return os.path.join(JENKINS['cache_dir'], quote(name, safe=''),
+                        str(number), '{0}.json'.format(kind))
+
+
+def load_cached(name, number, kind):
+    """Return the cached document of the finished Jenkins build
+    """
+    path = get_cache_path(name, number, kind)
+    if not path or not os.path.isfile(path):
+        return None
+    logger.debug("Load cached {0} of {1} #{2}".format(kind, name, number))
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_cached(name, number, kind, data):
+    """Save the document of the finished Jenkins build to the cache,
+    finished builds never change
+    """
+    path = get_cache_path(name, number, kind)
+    if not path:
+        return
+    try:
+        if not os.path.isdir(os.path.dirname(path)):
+            os.makedirs(os.path.dirname(path))
+        with open(path + '.tmp', 'w') as f:
+            json.dump(data, f)
+        os.rename(path + '.tmp', path)
+    except (IOError, OSError) as e:
+        logger.warning("Failed to cache {0} of {1} #{2}: {3}".format(
+            kind, name, number, e))
+
 
 def get_jobs_for_view(view):
     """Return list of jobs from specified view
@@ -48,22 +117,20 @@ def get_downstream_builds_from_html(url):
     opener = request.build_opener(request.HTTPHandler)
     s = opener.open(req).read()
     opener.close()
-    jobs = []
     raw_downstream_builds = re.findall(
         '.*downstream-buildview.*href="(/job/\S+/[0-9]+/).*', s)
-    for raw_build in raw_downstream_builds:
+
+    def get_downstream_build(raw_build):
         sub_job_name = raw_build.split('/')[2]
         sub_job_build = raw_build.split('/')[3]
         build = Build(name=sub_job_name, number=sub_job_build)
-        jobs.append(
-            {
-                'name': build.name,
-                'number': build.number,
-                'result': build.build_data['result']
-            }
-        )
+        return {
+            'name': build.name,
+            'number': build.number,
+            'result': build.build_data['result']
+        }
 
-    return jobs
+    return fetch_concurrently(get_downstream_build, raw_downstream_builds)
 
 
 def get_build_artifact(url, artifact):
@@ -84,6 +151,9 @@ class Build(object):
         request.
 
         If number is 'latest', get latest completed build.
+
+        Data of the finished builds is cached on disk, see
+        JENKINS['cache_dir'].
         """
 
         self.name = name
@@ -97,12 +167,22 @@ class Build(object):
         else:
             self.number = int(number)
 
-        self.build_data = self.get_build_data(depth=0)
+        self.build_data = load_cached(self.name, self.number, 'build')
+        if self.build_data is None:
+            self.build_data = self.get_build_data(depth=0, tree=BUILD_TREE)
+            if self.is_finished():
+                save_cached(self.name, self.number, 'build', self.build_data)
         self.url = self.build_data["url"]
 
+    def is_finished(self):
+        return (not self.build_data.get('building') and
+                self.build_data.get('result') is not None)
+
     def get_job_info(self, depth=1):
         job_url = "/".join([JENKINS["url"], 'job', self.name,
                             'api/json?depth={depth}'.format(depth=depth)])
+        if depth == 0:
+            job_url += '&tree=lastBuild[number],lastCompletedBuild[number]'
         logger.debug("Request job info from {}".format(job_url))
         return json.load(request.urlopen(job_url))
 
@@ -112,11 +192,13 @@ class Build(object):
         logger.debug("Request job console from {}".format(job_url))
         return request.urlopen(job_url)
 
-    def get_build_data(self, depth=1):
+    def get_build_data(self, depth=1, tree=None):
         build_url = "/".join([JENKINS["url"], 'job',
                               self.name,
                               str(self.number),
                               'api/json?depth={depth}'.format(depth=depth)])
+        if tree:
+            build_url += '&tree={0}'.format(tree)
         logger.debug("Request build data from {}".format(build_url))
         return json.load(request.urlopen(build_url))
 
@@ -126,15 +208,22 @@ class Build(object):
             test_url = "/".join(
                 [url.rstrip("/"), 'testReport'] + result_path + ['api/json'])
         else:
-            test_url = "/".join([url.rstrip("/"), 'testReport', 'api/json'])
+            test_url = "/".join([url.rstrip("/"), 'testReport',
+                                 'api/json?tree={0}'.format(TEST_DATA_TREE)])
 
         logger.debug("Request test data from {}".format(test_url))
         response = request.urlopen(test_url)
         return json.load(response)
 
     def test_data(self, result_path=None):
+        if not result_path:
+            data = load_cached(self.name, self.number, 'test_data')
+            if data is not None:
+                return data
         try:
             data = self.get_test_data(self.url, result_path)
+            if not result_path and self.is_finished():
+                save_cached(self.name, self.number, 'test_data', data)
         except Exception as e:
             logger.warning("No test data for {0}: {1}".format(
                 self.url,
@@ -28,7 +28,7 @@ from logging import CRITICAL
 from logging import DEBUG
 
 from fuelweb_test.testrail.builds import Build
-from fuelweb_test.testrail.launchpad_client import LaunchpadBug
+from fuelweb_test.testrail.launchpad_client import LaunchpadBugResolver
 from fuelweb_test.testrail.report import get_version
 from fuelweb_test.testrail.settings import GROUPS_TO_EXPAND
 from fuelweb_test.testrail.settings import LaunchpadSettings
@@ -41,12 +41,12 @@ def inspect_bug(bug):
     # Return target which matches defined in settings project/milestone and
     # has 'open' status. If there are no such targets, then just return first
     # one available target.
-    for target in bug.targets:
+    for target in bug['targets']:
         if target['project'] == LaunchpadSettings.project and \
            LaunchpadSettings.milestone in target['milestone'] and\
            target['status'] not in LaunchpadSettings.closed_statuses:
             return target
-    return bug.targets[0]
+    return bug['targets'][0]
 
 
 def generate_test_plan_name(job_name, build_number):
@@ -90,18 +90,7 @@ class TestRunStatistics(object):
         return self.run.__getitem__(item)
 
     def get_results(self):
-        results = []
-        stop = 0
-        offset = 0
-        while not stop:
-            new_results = self.project.get_results_for_run(
-                self.run['id'],
-                limit=TestRailSettings.max_results_per_request,
-                offset=offset)
-            results += new_results
-            offset += len(new_results)
-            stop = TestRailSettings.max_results_per_request - len(new_results)
-        return results
+        return self.project.get_all_results_for_run(self.run['id'])
 
     def get_test_by_group(self, group, version):
         if group in GROUPS_TO_EXPAND:
@@ -287,32 +276,32 @@ class StatisticsGenerator(object):
                 if _run_id == run_id:
                     joint_bugs_statistics = _stats
 
+        lp_bugs = LaunchpadBugResolver().resolve_all(joint_bugs_statistics)
         for bug_id in joint_bugs_statistics:
-            try:
-                lp_bug = LaunchpadBug(bug_id).get_duplicate_of()
-            except KeyError:
+            lp_bug = lp_bugs.get(int(bug_id))
+            if lp_bug is None:
                 logger.warning("Bug with ID {0} not found! Most probably it's "
                                "private or private security.".format(bug_id))
                 continue
             bug_target = inspect_bug(lp_bug)
 
-            if lp_bug.bug.id in stats:
-                stats[lp_bug.bug.id]['tests'].update(
+            if lp_bug['id'] in stats:
+                stats[lp_bug['id']]['tests'].update(
                     joint_bugs_statistics[bug_id])
             else:
-                stats[lp_bug.bug.id] = {
+                stats[lp_bug['id']] = {
                     'title': bug_target['title'],
                     'importance': bug_target['importance'],
                     'status': bug_target['status'],
                     'project': bug_target['project'],
-                    'link': lp_bug.bug.web_link,
+                    'link': lp_bug['web_link'],
                     'tests': joint_bugs_statistics[bug_id]
                 }
-            stats[lp_bug.bug.id]['failed_num'] = len(
-                [t for t, v in stats[lp_bug.bug.id]['tests'].items()
+            stats[lp_bug['id']]['failed_num'] = len(
+                [t for t, v in stats[lp_bug['id']]['tests'].items()
                  if not v['blocked']])
-            stats[lp_bug.bug.id]['blocked_num'] = len(
-                [t for t, v in stats[lp_bug.bug.id]['tests'].items()
+            stats[lp_bug['id']]['blocked_num'] = len(
+                [t for t, v in stats[lp_bug['id']]['tests'].items()
                  if v['blocked']])
 
         return OrderedDict(sorted(stats.items(),
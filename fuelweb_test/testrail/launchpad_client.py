@@ -14,17 +14,39 @@
 
 from __future__ import unicode_literals
 
+import json
+from multiprocessing.pool import ThreadPool
+import os
+import threading
+import time
+
 from launchpadlib.launchpad import Launchpad
 
+from fuelweb_test.testrail.settings import LaunchpadSettings
+from fuelweb_test.testrail.settings import logger
+
+_local = threading.local()
+
+
+def get_launchpad():
+    """Return anonymous Launchpad connection of the current thread,
+    launchpadlib objects can't be shared between threads
+    """
+    if getattr(_local, 'launchpad', None) is None:
+        _local.launchpad = Launchpad.login_anonymously('just testing',
+                                                       'production',
+                                                       '.cache')
+    return _local.launchpad
+
 
 class LaunchpadBug(object):
     """LaunchpadBug."""  # TODO documentation
 
-    def __init__(self, bug_id):
-        self.launchpad = Launchpad.login_anonymously('just testing',
-                                                     'production',
-                                                     '.cache')
-        self.bug = self.launchpad.bugs[int(bug_id)]
+    def __init__(self, bug_id, bug=None):
+        self.launchpad = get_launchpad()
+        if bug is None:
+            bug = self.launchpad.bugs[int(bug_id)]
+        self.bug = bug
 
     @property
     def targets(self):
@@ -43,7 +65,113 @@ class LaunchpadBug(object):
         while bug.duplicate_of and bug.id not in duplicates:
             duplicates.append(bug.id)
             bug = self.launchpad.load(str(bug.duplicate_of))
-        return LaunchpadBug(bug.id)
+        return LaunchpadBug(bug.id, bug=bug)
 
     def __getattr__(self, item):
         return self.bug.__getattr__(item)
+
+
+class LaunchpadBugResolver(object):
+    """Resolve bug ids to the information about the bugs they duplicate
+
+    Information is a dict with 'id', 'web_link' and 'targets' of the last
+    bug in the chain of duplicates, or None if the bug is private or doesn't
+    exist. Bugs are fetched from Launchpad in the pool of threads, results
+    are kept in the JSON file and reused until they are older than TTL.
+    """
+
+    def __init__(self, cache_file=LaunchpadSettings.cache_file,
+                 cache_ttl=LaunchpadSettings.cache_ttl,
+                 max_workers=LaunchpadSettings.max_workers):
+        self.cache_file = cache_file
+        self.cache_ttl = cache_ttl
+        self.max_workers = max_workers
+        self.cache = self.load_cache()
+
+    def load_cache(self):
+        if not self.cache_file or not os.path.isfile(self.cache_file):
+            return {}
+        try:
+            with open(self.cache_file) as f:
+                cache = json.load(f)
+        except (IOError, ValueError) as e:
+            logger.warning("Failed to load cached Launchpad bugs from "
+                           "{0}: {1}".format(self.cache_file, e))
+            return {}
+        now = time.time()
+        return {bug_id: entry for bug_id, entry in cache.items()
+                if now - entry['time'] < self.cache_ttl}
+
+    def save_cache(self):
+        if not self.cache_file:
+            return
+        try:
+            if not os.path.isdir(os.path.dirname(self.cache_file)):
+                os.makedirs(os.path.dirname(self.cache_file))
+            with open(self.cache_file + '.tmp', 'w') as f:
+                json.dump(self.cache, f)
+            os.rename(self.cache_file + '.tmp', self.cache_file)
+        except (IOError, OSError) as e:
+            logger.warning("Failed to cache Launchpad bugs to "
+                           "{0}: {1}".format(self.cache_file, e))
+
+    @staticmethod
+    def fetch(bug_id):
+        try:
+            lp_bug = LaunchpadBug(bug_id).get_duplicate_of()
+            return {'id': lp_bug.bug.id,
+                    'web_link': lp_bug.bug.web_link,
+                    'targets': lp_bug.targets}
+        except KeyError:
+            return None
+
+    def fetch_safe(self, bug_id):
+        try:
+            return bug_id, self.fetch(bug_id), True
+        except Exception:
+            logger.exception("Strange situation with '{bug_id}' "
+                             "issue".format(bug_id=bug_id))
+            return bug_id, None, False
+
+    def resolve_all(self, bug_ids):
+        """Return dict with information about every bug from bug_ids"""
+        bug_ids = set(str(int(bug_id)) for bug_id in bug_ids)
+        missing = sorted(bug_ids - set(self.cache))
+        if missing:
+            logger.debug("Fetch {0} bugs from Launchpad".format(len(missing)))
+            if self.max_workers <= 1 or len(missing) <= 1:
+                fetched = [self.fetch_safe(bug_id) for bug_id in missing]
+            else:
+                pool = ThreadPool(min(self.max_workers, len(missing)))
+                try:
+                    fetched = pool.map(self.fetch_safe, missing)
+                finally:
+                    pool.close()
+            now = time.time()
+            failed = set()
+            for bug_id, info, success in fetched:
+                if not success:
+                    failed.add(bug_id)
+                    continue
+                self.cache[bug_id] = {'time': now, 'info': info}
+                # The last bug in the chain is a duplicate of itself
+                if info is not None:
+                    self.cache.setdefault(str(info['id']),
+                                          {'time': now, 'info': info})
+            self.save_cache()
+            bug_ids -= failed
+        return {int(bug_id): self.cache[bug_id]['info'] for bug_id in bug_ids}
+
+    def resolve(self, bug_id):
+        """Return information about the bug, raise KeyError if the bug
+        is private or doesn't exist
+        """
+        bug_id = str(int(bug_id))
+        if bug_id not in self.cache:
+            info = self.fetch(bug_id)
+            self.cache[bug_id] = {'time': time.time(), 'info': info}
+            self.save_cache()
+        info = self.cache[bug_id]['info']
+        if info is None:
+            raise KeyError(bug_id)
+        return info
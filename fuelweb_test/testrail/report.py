@@ -24,10 +24,11 @@ import time
 from logging import DEBUG
 from optparse import OptionParser
 from fuelweb_test.testrail.builds import Build
+from fuelweb_test.testrail.builds import fetch_concurrently
 from fuelweb_test.testrail.builds import get_build_artifact
 from fuelweb_test.testrail.builds import get_downstream_builds_from_html
 from fuelweb_test.testrail.builds import get_jobs_for_view
-from fuelweb_test.testrail.launchpad_client import LaunchpadBug
+from fuelweb_test.testrail.launchpad_client import LaunchpadBugResolver
 from fuelweb_test.testrail.settings import JENKINS
 from fuelweb_test.testrail.settings import GROUPS_TO_EXPAND
 from fuelweb_test.testrail.settings import LaunchpadSettings
@@ -361,32 +362,36 @@ def publish_results(project, milestone_id, test_plan,
         suite_id=suite_id,
         config_id=config_id,
         limit=TestRailSettings.previous_results_depth)
-    cases = project.get_cases(suite_id=suite_id)
-    tests = project.get_tests(run_id=test_run_ids[0])
+    tests = {}
+    for test in project.get_tests(run_id=test_run_ids[0]):
+        tests.setdefault(test['custom_test_group'], test)
+    tests_results = {}
+    for test_result in project.get_all_results_for_run(test_run_ids[0]):
+        tests_results.setdefault(test_result['test_id'], []).append(
+            test_result)
+    previous_results = None
     results_to_publish = []
 
     for result in results:
-        test = project.get_test_by_group(run_id=test_run_ids[0],
-                                         group=result.group,
-                                         tests=tests)
+        test = tests.get(result.group)
         if not test:
             logger.error("Test for '{0}' group not found: {1}".format(
                 result.group, result.url))
             continue
         existing_results_versions = [r['version'] for r in
-                                     project.get_results_for_test(test['id'])]
+                                     tests_results.get(test['id'], [])]
         if result.version in existing_results_versions:
             continue
         if result.status not in ('passed', 'blocked'):
+            if previous_results is None:
+                run_ids = [run['id'] for run in previous_tests_runs[0:
+                           int(TestRailSettings.previous_results_depth)]]
+                previous_results = project.get_results_for_runs(run_ids)
+                bug_resolver = LaunchpadBugResolver()
             case_id = project.get_case_by_group(suite_id=suite_id,
-                                                group=result.group,
-                                                cases=cases)['id']
-            run_ids = [run['id'] for run in previous_tests_runs[0:
-                       int(TestRailSettings.previous_results_depth)]]
-            previous_results = project.get_all_results_for_case(
-                run_ids=run_ids,
-                case_id=case_id)
-            lp_bug = get_existing_bug_link(previous_results)
+                                                group=result.group)['id']
+            lp_bug = get_existing_bug_link(previous_results.get(case_id, []),
+                                           bug_resolver)
             if lp_bug:
                 result.launchpad_bug = lp_bug['bug_link']
         results_to_publish.append(result)
@@ -405,7 +410,9 @@ def publish_results(project, milestone_id, test_plan,
 
 
 @retry(count=3)
-def get_existing_bug_link(previous_results):
+def get_existing_bug_link(previous_results, bug_resolver=None):
+    if bug_resolver is None:
+        bug_resolver = LaunchpadBugResolver()
     results_with_bug = [result for result in previous_results if
                         result["custom_launchpad_bug"] is not None]
     if not results_with_bug:
@@ -421,7 +428,7 @@ def get_existing_bug_link(previous_results):
                 result["custom_launchpad_bug"]))
             continue
         try:
-            bug = LaunchpadBug(bug_id).get_duplicate_of()
+            bug = bug_resolver.resolve(bug_id)
         except KeyError:
             logger.warning("Bug with id '{bug_id}' is private or \
                 doesn't exist.".format(bug_id=bug_id))
@@ -431,12 +438,12 @@ def get_existing_bug_link(previous_results):
                 issue".format(bug_id=bug_id))
             continue
 
-        for target in bug.targets:
+        for target in bug['targets']:
             if target['project'] == LaunchpadSettings.project and\
                target['milestone'] == LaunchpadSettings.milestone and\
                target['status'] not in LaunchpadSettings.closed_statuses:
-                target['bug_link'] = result["custom_launchpad_bug"]
-                return target
+                # The bug is shared by the resolver cache, don't change it
+                return dict(target, bug_link=result["custom_launchpad_bug"])
 
 
 def main():
@@ -510,6 +517,7 @@ def main():
                      " or Jenkins view with system tests jobs (-w). Exiting..")
         return
 
+    builds_to_process = []
     for systest_build in tests_jobs:
         if (options.one_job_name and
                 options.one_job_name != systest_build['name']):
@@ -530,7 +538,13 @@ def main():
                 continue
         for os in tests_results.keys():
             if os in systest_build['name'].lower():
-                tests_results[os].extend(get_tests_results(systest_build, os))
+                builds_to_process.append((systest_build, os))
+
+    # Downstream builds are fetched from Jenkins concurrently
+    builds_results = fetch_concurrently(
+        lambda build_os: get_tests_results(*build_os), builds_to_process)
+    for (_, os), build_results in zip(builds_to_process, builds_results):
+        tests_results[os].extend(build_results)
 
     # STEP #3
     # Create new TestPlan in TestRail (or get existing) and add TestRuns
@@ -607,6 +621,7 @@ def main():
         ))
 
     logger.info('Report URL: {0}'.format(test_plan['url']))
+    project.client.log_stats()
 
 
 if __name__ == "__main__":
@@ -34,67 +34,70 @@ LOG = logger
 
 
 def parse_xml_report(path_to_report):
-    """This function parses the Tempest XML report and returns the list with
-    TestResult objects. Each TestResult object corresponds to one of the tests
+    """This function parses the Tempest XML report and yields TestResult
+    objects. Each TestResult object corresponds to one of the tests
     and contains all the result information for the respective test.
-    """
-
-    tree = ElementTree.parse(path_to_report)
-    test_results = []
-    for elem in tree.findall('testcase'):
-        status = 'passed'
-        description = None
-        child_elem = elem.getchildren()
-        if child_elem:
-            status = child_elem[0].tag
-            description = child_elem[0].text
 
-        test_result = report.TestResult(name=elem.get('name'),
-                                        group=elem.get('classname'),
-                                        status='failed'
-                                        if status == 'failure' else status,
-                                        description=description,
-                                        duration=1)
-        test_results.append(test_result)
+    The report is parsed incrementally and parsed elements are dropped,
+    so the memory usage doesn't depend on the size of the report.
+    """
 
-    return test_results
+    depth = 0
+    root = None
+    for event, elem in ElementTree.iterparse(path_to_report,
+                                             events=('start', 'end')):
+        if event == 'start':
+            if root is None:
+                root = elem
+            depth += 1
+            continue
+        depth -= 1
+        if depth != 1:
+            continue
+        if elem.tag == 'testcase':
+            status = 'passed'
+            description = None
+            child_elem = list(elem)
+            if child_elem:
+                status = child_elem[0].tag
+                description = child_elem[0].text
+
+            yield report.TestResult(name=elem.get('name'),
+                                    group=elem.get('classname'),
+                                    status='failed'
+                                    if status == 'failure' else status,
+                                    description=description,
+                                    duration=1)
+        root.clear()
 
 
 def mark_all_tests_as_blocked(client, tests_suite):
-    """This function marks all Tempest tests as blocked and returns the list
-    with TestResult objects. Each TestResult object corresponds to one of
+    """This function marks all Tempest tests as blocked and yields
+    TestResult objects. Each TestResult object corresponds to one of
     the tests and contains the information that the test is blocked.
     """
 
-    test_results = []
     for case in client.get_cases(tests_suite['id']):
-        test_result = report.TestResult(name=case['title'],
-                                        group=case['custom_test_group'],
-                                        status='blocked',
-                                        description=None,
-                                        duration=1)
-        test_results.append(test_result)
-
-    return test_results
+        yield report.TestResult(name=case['title'],
+                                group=case['custom_test_group'],
+                                status='blocked',
+                                description=None,
+                                duration=1)
 
 
 def mark_all_tests_as_in_progress(client, tests_suite):
-    """This function marks all Tempest tests as "in progress" and returns
-    the list with TestResult objects. Each TestResult object corresponds
-    to one of the tests and contains the information that the test is
+    """This function marks all Tempest tests as "in progress" and yields
+    TestResult objects. Each TestResult object corresponds to one of
+    the tests and contains the information that the test is
     "in progress" status.
     """
 
-    test_results = []
     for case in client.get_cases(tests_suite['id']):
-        test_result = report.TestResult(name=case['title'],
-                                        group=case['custom_test_group'],
-                                        status='in_progress',
-                                        description=None,
-                                        duration=1)
-        test_results.append(test_result)
-
-    return test_results
+        yield report.TestResult(name=case['title'],
+                                group=case['custom_test_group'],
+                                status='in_progress',
+                                description=None,
+                                duration=1)
 
 
 def find_run_by_name_and_config_in_test_plan(test_plan, run_name, config):
@@ -118,9 +121,13 @@ def find_run_by_config_in_test_plan_entry(test_plan_entry, config):
             return run
 
 
-def upload_test_results(client, test_run, suite_id, test_results):
-    """ This function allows to upload large number of test results
-        with the minimum number of APi requests to TestRail.
+def get_cases_results(client, suite_id, test_results):
+    """ This function returns the results of the test cases to upload,
+        the test results are matched to the test cases of the suite.
+
+        Only case ID and status ID are kept for every result, so the whole
+        report is read into the memory before anything is created in
+        TestRail without keeping the descriptions of the tests.
     """
 
     test_cases = client.get_cases(suite_id)
@@ -146,8 +153,28 @@ def upload_test_results(client, test_run, suite_id, test_results):
                 if test_result.name in test.get("title"):
                     results.append({"case_id": test['id'],
                                     "status_id": status_id})
+    return results
+
+
+def upload_test_results(client, test_run, results,
+                        chunk_size=TestRailSettings.results_chunk_size):
+    """ This function allows to upload large number of test results
+        with the minimum number of APi requests to TestRail.
+
+        Results are sent in chunks of chunk_size results in parallel,
+        every chunk is retried on failure separately.
+    """
+
+    chunks = [results[i:i + chunk_size]
+              for i in range(0, len(results), chunk_size)]
+
+    @report.retry(count=3)
+    def upload_chunk(chunk):
+        client.add_results_for_tempest_cases(test_run['id'], chunk)
 
-    client.add_results_for_tempest_cases(test_run['id'], results)
+    LOG.debug('Uploading {0} test results in {1} chunks'.format(
+        len(results), len(chunks)))
+    client.client.map(upload_chunk, chunks)
 
 
 def main():
@@ -205,9 +232,10 @@ def main():
     elif options.tests_in_progress:
         test_results = mark_all_tests_as_in_progress(client, tests_suite)
     else:
-        LOG.info('Parsing the test results...')
         test_results = parse_xml_report(options.path)
-        LOG.info('The test results have been parsed.')
+    # The whole report is parsed here, so the missing or malformed report
+    # fails before the test plan and the run are created
+    results = get_cases_results(client, tests_suite['id'], test_results)
 
     # STEP #3
     # Create new test plan (or find existing)
@@ -271,7 +299,7 @@ def main():
     # Upload the test results to TestRail for the specified test run
     LOG.info('Uploading the test results to TestRail...')
 
-    upload_test_results(client, run, tests_suite['id'], test_results)
+    upload_test_results(client, run, results)
 
     LOG.info('The results of Tempest tests have been uploaded.')
     LOG.info('Report URL: {0}'.format(test_plan['url']))
@@ -32,7 +32,10 @@ os.environ["ISO_PATH"] = "./fuel.iso"
 JENKINS = {
     'url': os.environ.get('JENKINS_URL', 'http://localhost/'),
     'magnet_link_artifact': os.environ.get('JENKINS_MAGNET_LINK_ARTIFACT',
-                                           'magnet_link.txt')
+                                           'magnet_link.txt'),
+    'cache_dir': os.environ.get('JENKINS_CACHE_DIR', os.path.join(
+        os.path.expanduser('~'), '.cache', 'fuel-qa', 'jenkins')),
+    'max_workers': int(os.environ.get('JENKINS_MAX_WORKERS', 10)),
 }
 
 GROUPS_TO_EXPAND = [
@@ -49,6 +52,10 @@ class LaunchpadSettings(object):
         os.environ.get('LAUNCHPAD_RELEASED_STATUS', 'Fix Released'),
         os.environ.get('LAUNCHPAD_INVALID_STATUS', 'Invalid')
     ]
+    cache_file = os.environ.get('LAUNCHPAD_CACHE_FILE', os.path.join(
+        os.path.expanduser('~'), '.cache', 'fuel-qa', 'launchpad_bugs.json'))
+    cache_ttl = int(os.environ.get('LAUNCHPAD_CACHE_TTL', 3600))
+    max_workers = int(os.environ.get('LAUNCHPAD_MAX_WORKERS', 10))
 
 
 class TestRailSettings(object):
@@ -80,3 +87,7 @@ class TestRailSettings(object):
         'blocked': ['blocked']
     }
     max_results_per_request = 250
+    results_chunk_size = int(os.environ.get('TESTRAIL_RESULTS_CHUNK_SIZE',
+                                            500))
+    max_workers = int(os.environ.get('TESTRAIL_MAX_WORKERS', 10))
+    rate_limit = float(os.environ.get('TESTRAIL_RATE_LIMIT', 0))
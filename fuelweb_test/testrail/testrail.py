@@ -23,56 +23,91 @@
 # Copyright Gurock Software GmbH. See license.md for details.
 #
 
+from __future__ import division
 from __future__ import unicode_literals
 
-import base64
 import json
+from multiprocessing.pool import ThreadPool
+import threading
 import time
 
-# pylint: disable=import-error
-from six.moves.urllib.request import urlopen
-from six.moves.urllib.request import Request
-from six.moves.urllib.error import HTTPError
-# pylint: enable=import-error
+import requests
+from requests.adapters import HTTPAdapter
 
 from fuelweb_test.testrail.settings import logger
 
 
-def request_retry(codes):
-    log_msg = "Got {0} Error! Waiting {1} seconds and trying again..."
-
-    def retry_request(func):
-        def wrapper(*args, **kwargs):
-            iter_number = 0
-            while True:
-                try:
-                    response = func(*args, **kwargs)
-                except HTTPError as e:
-                    if e.code in codes:
-                        if iter_number < codes[e.code]:
-                            wait = 5
-                            if 'Retry-After' in e.hdrs:
-                                wait = int(e.hdrs['Retry-after'])
-                            logger.debug(log_msg.format(e.code, wait))
-                            time.sleep(wait)
-                            iter_number += 1
-                            continue
-                    raise
-                else:
-                    return response
-        return wrapper
-    return retry_request
+class RateLimiter(object):
+    """Token bucket limiting the rate of the API requests.
+
+    The rate is halved and all requests are held for 'Retry-After'
+    seconds when TestRail responds with 429 code. After every successful
+    request the rate is slowly restored up to the configured maximum.
+    Zero rate disables the limit, but 429 responses are still respected.
+    """
+
+    def __init__(self, rate=0, min_rate=0.5):
+        self.max_rate = rate
+        self.rate = rate
+        self.min_rate = min(min_rate, rate) if rate else min_rate
+        self.tokens = 1
+        self.updated = time.time()
+        self.blocked_until = 0
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.time()
+                wait = self.blocked_until - now
+                if self.rate:
+                    capacity = max(1, self.rate)
+                    self.tokens = min(
+                        capacity,
+                        self.tokens + (now - self.updated) * self.rate)
+                    self.updated = now
+                    if self.tokens < 1:
+                        wait = max(wait, (1 - self.tokens) / self.rate)
+                if wait <= 0:
+                    self.tokens -= 1
+                    return
+            time.sleep(wait)
+
+    def throttle(self, retry_after):
+        with self.lock:
+            if self.rate:
+                self.rate = max(self.min_rate, self.rate / 2)
+                self.tokens = 0
+            self.blocked_until = max(self.blocked_until,
+                                     time.time() + retry_after)
+
+    def relax(self):
+        with self.lock:
+            if self.rate:
+                self.rate = min(self.max_rate,
+                                self.rate + self.max_rate / 100)
 
 
 class APIClient(object):
     """APIClient."""  # TODO documentation
 
-    def __init__(self, base_url):
+    retry_codes = {429: 3}
+
+    def __init__(self, base_url, max_workers=10, rate_limit=0):
         self.user = ''
         self.password = ''
         if not base_url.endswith('/'):
             base_url += '/'
         self.__url = base_url + 'index.php?/api/v2/'
+        self.max_workers = max_workers
+        self.limiter = RateLimiter(rate=rate_limit)
+        self.session = requests.Session()
+        self.session.mount(base_url, HTTPAdapter(pool_connections=1,
+                                                 pool_maxsize=max_workers))
+        self.session.headers['Content-Type'] = 'application/json'
+        self.stats = {}
+        self.__stats_lock = threading.Lock()
+        self.__pool = None
 
     #
     # Send Get
@@ -104,41 +139,85 @@ class APIClient(object):
     def send_post(self, uri, data):
         return self.__send_request('POST', uri, data)
 
-    def __send_request(self, method, uri, data):
-        retry_codes = {429: 3}
+    #
+    # Map
+    #
+    # Calls the function for every item in the pool of threads sharing
+    # this client and returns the results in the order of items. Number
+    # of threads is limited by 'max_workers', so is the number of
+    # concurrent connections to TestRail.
+    #
+    def map(self, func, items):
+        items = list(items)
+        if self.max_workers <= 1 or len(items) <= 1:
+            return [func(item) for item in items]
+        if self.__pool is None:
+            self.__pool = ThreadPool(self.max_workers)
+        return self.__pool.map(func, items)
+
+    @staticmethod
+    def endpoint(uri):
+        return uri.split('/')[0].split('&')[0]
+
+    def __add_stats(self, uri, elapsed, status_code, retries):
+        endpoint = self.endpoint(uri)
+        with self.__stats_lock:
+            stats = self.stats.setdefault(endpoint, {
+                'count': 0, 'errors': 0, 'retries': 0,
+                'total_time': 0.0, 'max_time': 0.0})
+            stats['count'] += 1
+            stats['retries'] += retries
+            stats['total_time'] += elapsed
+            stats['max_time'] = max(stats['max_time'], elapsed)
+            if status_code >= 400:
+                stats['errors'] += 1
+
+    def log_stats(self):
+        for endpoint, stats in sorted(self.stats.items(),
+                                      key=lambda x: -x[1]['total_time']):
+            logger.debug(
+                'TestRail API {0}: {1} requests ({2} errors, {3} retries), '
+                'avg {4:.3f}s, max {5:.3f}s, total {6:.1f}s'.format(
+                    endpoint, stats['count'], stats['errors'],
+                    stats['retries'], stats['total_time'] / stats['count'],
+                    stats['max_time'], stats['total_time']))
 
-        @request_retry(codes=retry_codes)
-        def __get_response(_request):
-            return urlopen(_request).read()
+    def __send_request(self, method, uri, data):
+        log_msg = "Got {0} Error! Waiting {1} seconds and trying again..."
 
         url = self.__url + uri
-        request = Request(url)
-        if method == 'POST':
-            request.add_data(json.dumps(data))
-        auth = base64.encodestring(
-            '{0}:{1}'.format(self.user, self.password)).strip()
-        request.add_header('Authorization', 'Basic {}'.format(auth))
-        request.add_header('Content-Type', 'application/json')
-
-        e = None
-        try:
-            response = __get_response(request)
-        except HTTPError as e:
-            response = e.read()
-
-        if response:
-            result = json.loads(response)
+        body = json.dumps(data) if method == 'POST' else None
+        retries = 0
+        started = time.time()
+        while True:
+            self.limiter.acquire()
+            response = self.session.request(
+                method, url, data=body, auth=(self.user, self.password))
+            code = response.status_code
+            if code in self.retry_codes and \
+                    retries < self.retry_codes[code]:
+                wait = int(response.headers.get('Retry-After', 5))
+                logger.debug(log_msg.format(code, wait))
+                self.limiter.throttle(wait)
+                retries += 1
+                continue
+            break
+        self.__add_stats(uri, time.time() - started, code, retries)
+
+        if response.content:
+            result = response.json()
         else:
             result = {}
 
-        if e is not None:
+        if code >= 400:
             if result and 'error' in result:
                 error = '"' + result['error'] + '"'
             else:
                 error = 'No additional error message received'
             raise APIError('TestRail API returned HTTP %s (%s)' %
-                           (e.code, error))
+                           (code, error))
 
+        self.limiter.relax()
         return result
 
 
@@ -14,7 +14,10 @@
 
 from __future__ import unicode_literals
 
+import threading
+
 from fuelweb_test.testrail.settings import logger
+from fuelweb_test.testrail.settings import TestRailSettings
 from fuelweb_test.testrail.testrail import APIClient
 from fuelweb_test.testrail.testrail import APIError
 
@@ -23,11 +26,62 @@ class TestRailProject(object):
     """TestRailProject."""  # TODO documentation
 
     def __init__(self, url, user, password, project):
-        self.client = APIClient(base_url=url)
+        self.client = APIClient(base_url=url,
+                                max_workers=TestRailSettings.max_workers,
+                                rate_limit=TestRailSettings.rate_limit)
         self.client.user = user
         self.client.password = password
+        self._cache = {}
+        self._cache_lock = threading.Lock()
+        self._cache_generation = 0
         self.project = self._get_project(project)
 
+    def _get_cached(self, key, getter):
+        """Return the cached result of the API call, call it only once
+
+        :param key: tuple, the first item is the name of the cached data
+        :param getter: function doing the API call
+        """
+        with self._cache_lock:
+            if key in self._cache:
+                return self._cache[key]
+            generation = self._cache_generation
+        # The API is called without the lock, the cache is used by the
+        # threads adding and updating the items in parallel. The result is
+        # not cached if the cache was invalidated during the call.
+        value = getter()
+        with self._cache_lock:
+            if generation == self._cache_generation:
+                self._cache[key] = value
+        return value
+
+    def _get_index(self, key, getter, field):
+        """Return the dictionary of the cached items indexed by the field
+
+        The first item wins if several items have the same field value,
+        like during the linear search.
+        """
+        index_key = key + ('by', field)
+
+        def get_index():
+            index = {}
+            for item in self._get_cached(key, getter):
+                index.setdefault(item[field], item)
+            return index
+
+        return self._get_cached(index_key, get_index)
+
+    def invalidate_cache(self, name=None):
+        """Drop the cached data with the given name or all cached data"""
+        with self._cache_lock:
+            self._cache_generation += 1
+            if name is None:
+                self._cache.clear()
+                return
+            for key in list(self._cache.keys()):
+                if key[0] == name:
+                    self._cache.pop(key, None)
+
     def _get_project(self, project_name):
         projects_uri = 'get_projects'
         projects = self.client.send_get(uri=projects_uri)
@@ -70,18 +124,20 @@ class TestRailProject(object):
     def get_configs(self):
         configs_uri = 'get_configs/{project_id}'.format(
             project_id=self.project['id'])
-        return self.client.send_get(configs_uri)
+        return self._get_cached(('configs',),
+                                lambda: self.client.send_get(configs_uri))
 
     def get_config(self, config_id):
-        for configs in self.get_configs():
-            for config in configs['configs']:
-                if config['id'] == int(config_id):
-                    return config
+        configs = self._get_cached(
+            ('configs', 'by', 'config_id'),
+            lambda: {config['id']: config
+                     for configs in self.get_configs()
+                     for config in configs['configs']})
+        return configs.get(int(config_id))
 
     def get_config_by_name(self, name):
-        for config in self.get_configs():
-            if config['name'] == name:
-                return config
+        return self._get_index(('configs',), self.get_configs,
+                               'name').get(name)
 
     def get_priorities(self):
         priorities_uri = 'get_priorities'
@@ -90,7 +146,9 @@ class TestRailProject(object):
     def get_milestones(self):
         milestones_uri = 'get_milestones/{project_id}'.format(
             project_id=self.project['id'])
-        return self.client.send_get(uri=milestones_uri)
+        return self._get_cached(
+            ('milestones',),
+            lambda: self.client.send_get(uri=milestones_uri))
 
     def get_milestone(self, milestone_id):
         milestone_uri = 'get_milestone/{milestone_id}'.format(
@@ -98,49 +156,59 @@ class TestRailProject(object):
         return self.client.send_get(uri=milestone_uri)
 
     def get_milestone_by_name(self, name):
-        for milestone in self.get_milestones():
-            if milestone['name'] == name:
-                return self.get_milestone(milestone_id=milestone['id'])
+        return self._get_index(('milestones',), self.get_milestones,
+                               'name').get(name)
 
     def get_suites(self):
         suites_uri = 'get_suites/{project_id}'.format(
             project_id=self.project['id'])
-        return self.client.send_get(uri=suites_uri)
+        return self._get_cached(('suites',),
+                                lambda: self.client.send_get(uri=suites_uri))
 
     def get_suite(self, suite_id):
+        suite = self._get_index(('suites',), self.get_suites,
+                                'id').get(int(suite_id))
+        if suite:
+            return suite
         suite_uri = 'get_suite/{suite_id}'.format(suite_id=suite_id)
         return self.client.send_get(uri=suite_uri)
 
     def get_suite_by_name(self, name):
-        for suite in self.get_suites():
-            if suite['name'] == name:
-                return self.get_suite(suite_id=suite['id'])
+        return self._get_index(('suites',), self.get_suites,
+                               'name').get(name)
 
     def get_sections(self, suite_id):
         sections_uri = 'get_sections/{project_id}&suite_id={suite_id}'.format(
             project_id=self.project['id'],
             suite_id=suite_id
         )
-        return self.client.send_get(sections_uri)
+        return self._get_cached(
+            ('sections', suite_id),
+            lambda: self.client.send_get(sections_uri))
 
     def get_section(self, section_id):
         section_uri = 'get_section/{section_id}'.format(section_id=section_id)
         return self.client.send_get(section_uri)
 
     def get_section_by_name(self, suite_id, section_name):
-        for section in self.get_sections(suite_id=suite_id):
-            if section['name'] == section_name:
-                return self.get_section(section_id=section['id'])
+        return self._get_index(
+            ('sections', suite_id),
+            lambda: self.get_sections(suite_id=suite_id),
+            'name').get(section_name)
 
     def create_section(self, suite_id, name, parent_id=None):
+        self.invalidate_cache('sections')
         return self.client.send_post('add_section/' + str(self.project['id']),
                                      dict(suite_id=suite_id, name=name,
                                           parent_id=parent_id))
 
     def delete_section(self, section_id):
+        self.invalidate_cache('sections')
+        self.invalidate_cache('cases')
         return self.client.send_post('delete_section/' + str(section_id), {})
 
     def create_suite(self, name, description=None):
+        self.invalidate_cache('suites')
         return self.client.send_post('add_suite/' + str(self.project['id']),
                                      dict(name=name, description=description))
 
@@ -153,27 +221,43 @@ class TestRailProject(object):
             cases_uri = '{0}&section_id={section_id}'.format(
                 cases_uri, section_id=section_id
             )
-        return self.client.send_get(cases_uri)
+        return self._get_cached(('cases', suite_id, section_id),
+                                lambda: self.client.send_get(cases_uri))
 
     def get_case(self, case_id):
         case_uri = 'get_case/{case_id}'.format(case_id=case_id)
         return self.client.send_get(case_uri)
 
     def get_case_by_name(self, suite_id, name, cases=None):
-        for case in cases or self.get_cases(suite_id):
+        if cases is None:
+            return self._get_index(('cases', suite_id, None),
+                                   lambda: self.get_cases(suite_id),
+                                   'title').get(name)
+        for case in cases:
             if case['title'] == name:
-                return self.get_case(case_id=case['id'])
+                return case
 
     def get_case_by_group(self, suite_id, group, cases=None):
-        for case in cases or self.get_cases(suite_id):
+        if cases is None:
+            return self._get_index(('cases', suite_id, None),
+                                   lambda: self.get_cases(suite_id),
+                                   'custom_test_group').get(group)
+        for case in cases:
             if case['custom_test_group'] == group:
-                return self.get_case(case_id=case['id'])
+                return case
 
     def add_case(self, section_id, case):
         add_case_uri = 'add_case/{section_id}'.format(section_id=section_id)
+        self.invalidate_cache('cases')
         return self.client.send_post(add_case_uri, case)
 
+    def update_case(self, case_id, fields):
+        update_case_uri = 'update_case/{case_id}'.format(case_id=case_id)
+        self.invalidate_cache('cases')
+        return self.client.send_post(update_case_uri, fields)
+
     def delete_case(self, case_id):
+        self.invalidate_cache('cases')
         return self.client.send_post('delete_case/' + str(case_id), None)
 
     def get_case_fields(self):
@@ -306,12 +390,12 @@ class TestRailProject(object):
 
     def get_statuses(self):
         statuses_uri = 'get_statuses'
-        return self.client.send_get(statuses_uri)
+        return self._get_cached(('statuses',),
+                                lambda: self.client.send_get(statuses_uri))
 
     def get_status(self, name):
-        for status in self.get_statuses():
-            if status['name'] == name:
-                return status
+        return self._get_index(('statuses',), self.get_statuses,
+                               'name').get(name)
 
     def get_tests(self, run_id, status_id=None):
         tests_uri = 'get_tests/{run_id}'.format(run_id=run_id)
@@ -374,6 +458,42 @@ class TestRailProject(object):
             results_run_uri += '&status_id={}'.format(status_id)
         return self.client.send_get(results_run_uri)
 
+    def get_all_results_for_run(self, run_id):
+        results = []
+        limit = TestRailSettings.max_results_per_request
+        while True:
+            new_results = self.get_results_for_run(run_id, limit=limit,
+                                                   offset=len(results))
+            results += new_results
+            if len(new_results) < limit:
+                return results
+
+    def get_results_for_runs(self, run_ids):
+        """Get all results of the runs using two bulk requests per run
+
+        :param run_ids: list of test runs ids, runs are fetched in parallel
+        :return: dict, lists of results indexed by case id
+        """
+        def get_run_results(run_id):
+            try:
+                tests = self.get_tests(run_id)
+                results = self.get_all_results_for_run(run_id)
+            except APIError as e:
+                logger.error("[{0}], run_id={1}".format(e, run_id))
+                return {}
+            tests_cases = {test['id']: test['case_id'] for test in tests}
+            run_results = {}
+            for result in results:
+                case_id = tests_cases.get(result['test_id'])
+                run_results.setdefault(case_id, []).append(result)
+            return run_results
+
+        all_results = {}
+        for run_results in self.client.map(get_run_results, run_ids):
+            for case_id, results in run_results.items():
+                all_results.setdefault(case_id, []).extend(results)
+        return all_results
+
     def get_results_for_case(self, run_id, case_id):
         results_case_uri = 'get_results_for_case/{run_id}/{case_id}'.format(
             run_id=run_id, case_id=case_id)
@@ -414,11 +534,9 @@ class TestRailProject(object):
         add_results_test_uri = 'add_results_for_cases/{run_id}'.format(
             run_id=run_id)
         new_results = {'results': []}
-        tests_cases = self.get_cases(suite_id)
         for results in tests_results:
             case = self.get_case_by_group(suite_id=suite_id,
-                                          group=results.group,
-                                          cases=tests_cases)
+                                          group=results.group)
             case_id = case['id']
             new_result = {
                 'case_id': case_id,
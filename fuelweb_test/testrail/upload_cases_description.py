@@ -14,6 +14,8 @@
 
 from __future__ import unicode_literals
 
+import hashlib
+import json
 import re
 
 from logging import DEBUG
@@ -33,6 +35,14 @@ from system_test import tests_directory
 from system_test import get_basepath
 from system_test.tests.base import ActionTest
 
+# Fields of the test case generated from the test which are kept in sync
+# with TestRail, other fields may be changed in TestRail manually
+CASE_SYNC_FIELDS = ('title', 'estimate', 'custom_test_case_description',
+                    'custom_test_case_steps')
+# Seconds of the units of the TestRail estimate timespan
+TIMESPAN_UNITS = {'w': 7 * 24 * 3600, 'd': 24 * 3600, 'h': 3600, 'm': 60,
+                  's': 1}
+
 
 def get_tests_descriptions(milestone_id, tests_include, tests_exclude, groups,
                            default_test_priority):
@@ -44,6 +54,7 @@ def get_tests_descriptions(milestone_id, tests_include, tests_exclude, groups,
     all_plan_tests = plan.tests[:]
 
     tests = []
+    tests_groups = set()
 
     for jenkins_suffix in groups:
         group = groups[jenkins_suffix]
@@ -60,7 +71,7 @@ def get_tests_descriptions(milestone_id, tests_include, tests_exclude, groups,
             if issubclass(parent_home, ActionTest):
                 case_name = parent_home.__name__
                 test_group = parent_home.__name__
-                if any([x['custom_test_group'] == test_group for x in tests]):
+                if test_group in tests_groups:
                     continue
             else:
                 case_name = home.func_name
@@ -117,8 +128,9 @@ def get_tests_descriptions(milestone_id, tests_include, tests_exclude, groups,
                 "custom_test_case_steps": steps
             }
 
-            if not any([x['custom_test_group'] == test_group for x in tests]):
+            if test_group not in tests_groups:
                 tests.append(test_case)
+                tests_groups.add(test_group)
             else:
                 logger.warning("Testcase '{0}' run in multiple Jenkins jobs!"
                                .format(test_group))
@@ -128,14 +140,124 @@ def get_tests_descriptions(milestone_id, tests_include, tests_exclude, groups,
     return tests
 
 
+def get_estimate_seconds(estimate):
+    """Return seconds of the estimate, TestRail returns it normalized
+    ('90m' is stored as '1h 30m')
+    """
+    if not estimate:
+        return None
+    return sum(int(value) * TIMESPAN_UNITS[unit] for value, unit in
+               re.findall(r'(\d+)\s*([wdhms])', estimate.lower()))
+
+
+def strip_text(text):
+    """Return the text without the trailing whitespaces of the lines"""
+    return '\n'.join(line.rstrip() for line in (text or '').split('\n')
+                     ).rstrip()
+
+
+def get_case_hash(case):
+    """Return hash of the test case fields which are kept in sync"""
+    data = [case.get(field) for field in CASE_SYNC_FIELDS]
+    data[0] = strip_text(data[0])
+    data[1] = get_estimate_seconds(data[1])
+    data[2] = strip_text(data[2])
+    data[-1] = [[strip_text(step.get('content')),
+                 strip_text(step.get('expected'))]
+                for step in data[-1] or []]
+    return hashlib.sha1(
+        json.dumps(data, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+def get_cases_changes(tests, existing_cases, section_id, delete_obsolete):
+    """Compare generated test cases with the existing ones
+
+    :return: tuple of lists, cases to add, (case_id, fields) to update and
+        ids of the cases to delete
+    """
+    existing_by_group = {}
+    for case in existing_cases:
+        existing_by_group.setdefault(case['custom_test_group'], case)
+
+    to_add, to_update = [], []
+    for test_case in tests:
+        case = existing_by_group.get(test_case['custom_test_group'])
+        if case is None:
+            to_add.append(test_case)
+        elif get_case_hash(case) != get_case_hash(test_case):
+            to_update.append((case['id'], {field: test_case[field]
+                                           for field in CASE_SYNC_FIELDS}))
+        else:
+            logger.debug('Skipping uploading "{0}" test case because it '
+                         'already exists in "{1}" tests suite and is up to '
+                         'date.'.format(test_case['custom_test_group'],
+                                        TestRailSettings.tests_suite))
+
+    to_delete = []
+    if delete_obsolete:
+        tests_groups = set(test_case['custom_test_group']
+                           for test_case in tests)
+        to_delete = [case['id'] for case in existing_cases
+                     if case['section_id'] == section_id and
+                     case['custom_test_group'] not in tests_groups]
+    return to_add, to_update, to_delete
+
+
 def upload_tests_descriptions(testrail_project, section_id,
-                              tests, check_all_sections):
+                              tests, check_all_sections,
+                              delete_obsolete=False):
     tests_suite = testrail_project.get_suite_by_name(
         TestRailSettings.tests_suite)
     check_section = None if check_all_sections else section_id
-    existing_cases = [case['custom_test_group'] for case in
-                      testrail_project.get_cases(suite_id=tests_suite['id'],
-                                                 section_id=check_section)]
+    existing_cases = testrail_project.get_cases(suite_id=tests_suite['id'],
+                                                section_id=check_section)
+    to_add, to_update, to_delete = get_cases_changes(
+        tests, existing_cases, section_id, delete_obsolete)
+    logger.info('Test cases to add: {0}, to update: {1}, to delete: {2}, '
+                'up to date: {3}'.format(len(to_add), len(to_update),
+                                         len(to_delete),
+                                         len(tests) - len(to_add) -
+                                         len(to_update)))
+    if not (to_add or to_update or to_delete):
+        return
+
+    custom_cases_fields = {}
+    if to_add:
+        custom_cases_fields = get_custom_cases_fields(testrail_project)
+
+    def add_case(test_case):
+        for case_field, default_value in custom_cases_fields.items():
+            if case_field not in test_case:
+                test_case[case_field] = default_value
+
+        logger.debug('Uploading test "{0}" to TestRail project "{1}", '
+                     'suite "{2}", section "{3}"'.format(
+                         test_case["custom_test_group"],
+                         TestRailSettings.project,
+                         TestRailSettings.tests_suite,
+                         TestRailSettings.tests_section))
+        testrail_project.add_case(section_id=section_id, case=test_case)
+
+    def update_case(change):
+        case_id, fields = change
+        logger.debug('Updating test case "{0}" (id {1}) in TestRail '
+                     'project "{2}"'.format(fields['title'], case_id,
+                                            TestRailSettings.project))
+        testrail_project.update_case(case_id=case_id, fields=fields)
+
+    def delete_case(case_id):
+        logger.debug('Deleting obsolete test case with id {0} from '
+                     'TestRail project "{1}"'.format(
+                         case_id, TestRailSettings.project))
+        testrail_project.delete_case(case_id=case_id)
+
+    testrail_project.client.map(add_case, to_add)
+    testrail_project.client.map(update_case, to_update)
+    testrail_project.client.map(delete_case, to_delete)
+
+
+def get_custom_cases_fields(testrail_project):
+    """Return default values of the required custom fields of test cases"""
     custom_cases_fields = {}
     for field in testrail_project.get_case_fields():
         for config in field['configs']:
@@ -151,26 +273,7 @@ def upload_tests_descriptions(testrail_project, section_id,
                                  "field '{0}', setting '1' (index)!".format(
                                      field['system_name']))
                     custom_cases_fields[field['system_name']] = 1
-
-    for test_case in tests:
-        if test_case['custom_test_group'] in existing_cases:
-            logger.debug('Skipping uploading "{0}" test case because it '
-                         'already exists in "{1}" tests section.'.format(
-                             test_case['custom_test_group'],
-                             TestRailSettings.tests_suite))
-            continue
-
-        for case_field, default_value in custom_cases_fields.items():
-            if case_field not in test_case:
-                test_case[case_field] = default_value
-
-        logger.debug('Uploading test "{0}" to TestRail project "{1}", '
-                     'suite "{2}", section "{3}"'.format(
-                         test_case["custom_test_group"],
-                         TestRailSettings.project,
-                         TestRailSettings.tests_suite,
-                         TestRailSettings.tests_section))
-        testrail_project.add_case(section_id=section_id, case=test_case)
+    return custom_cases_fields
 
 
 def get_tests_groups_from_jenkins(runner_name, build_number, distros):
@@ -227,6 +330,11 @@ def main():
                       dest='check_one_section', default=False,
                       help='Look for existing test case only in specified '
                            'section of test suite.')
+    parser.add_option('-d', '--delete-obsolete', action="store_true",
+                      dest='delete_obsolete', default=False,
+                      help='Delete test cases which are not generated '
+                           'from the tests anymore from the specified '
+                           'section of test suite.')
 
     (options, _) = parser.parse_args()
 
@@ -268,6 +376,13 @@ def main():
     if options.job_name and not tests_groups:
         return
 
+    # Tests of the other Jenkins jobs are not generated in this case, so
+    # their test cases can't be treated as obsolete
+    if options.job_name and options.delete_obsolete:
+        logger.warning('Deleting of obsolete test cases is disabled because '
+                       'tests are taken from the Jenkins job build')
+        options.delete_obsolete = False
+
     tests_descriptions = get_tests_descriptions(
         milestone_id=testrail_milestone['id'],
         tests_include=TestRailSettings.tests_include,
@@ -279,7 +394,8 @@ def main():
     upload_tests_descriptions(testrail_project=project,
                               section_id=testrail_section['id'],
                               tests=tests_descriptions,
-                              check_all_sections=not options.check_one_section)
+                              check_all_sections=not options.check_one_section,
+                              delete_obsolete=options.delete_obsolete)
 
 if __name__ == '__main__':
     main()
@@ -1,31 +1,226 @@
 #!/usr/bin/env python
 
+from __future__ import print_function
+
+import glob
+import hashlib
+import json
+import os
+import re
 import sys
 import argparse
 
-from proboscis import TestProgram
-from proboscis import register
-
-from fuelweb_test.helpers.utils import pretty_log
-
-from gates_tests.helpers.utils import map_test_review_in_fuel_library
-
-from system_test import register_system_test_cases
-from system_test import get_groups
-from system_test import define_custom_groups
-from system_test import discover_import_tests
-from system_test import tests_directory
-from system_test import collect_yamls
-from system_test import get_path_to_config
-from system_test import get_list_confignames
-from system_test import get_basepath
-
-from system_test.core.repository import split_group_config
+# Tests modules import clients of all the services and devops, so the test
+# framework is imported lazily, listing commands are answered from the
+# manifest of discovered tests without importing anything
+
+basedir = os.path.dirname(os.path.abspath(__file__))
+
+MANIFEST_PATH = os.environ.get(
+    'SYSTEM_TEST_MANIFEST',
+    os.path.join(basedir, '.system_test_manifest.json'))
+MANIFEST_VERSION = 1
+# Files which define groups or steps of the tests out of the tests
+# directories
+MANIFEST_EXTRA_PATHS = ['system_test/core/config.py',
+                        'system_test/actions',
+                        'system_test/tests_templates']
+
+# Estimate of the test without recorded timings and duration in docstring
+DEFAULT_TEST_DURATION = 3 * 60
+
+LISTING_COMMANDS = ('show-all-groups', 'show-fuelweb-groups',
+                    'show-systest-groups', 'show-systest-configs')
+
+
+def split_group_config(group):
+    """Same as system_test.core.repository.split_group_config, but doesn't
+    require the tests framework to be imported
+    """
+    m = re.search('([\w\.]*)\((\w*)\)', group)
+    if m:
+        return m.groups()
+
+
+def get_file_digest(path):
+    sha1 = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(65536), b''):
+            sha1.update(chunk)
+    return sha1.hexdigest()
+
+
+def get_manifest_files(dirs):
+    """Return paths of the files the manifest is built from, groups are
+    defined in the helpers of the tests too, so all the python files are
+    taken
+    """
+    ret = []
+    for path in dirs + MANIFEST_EXTRA_PATHS:
+        full_path = os.path.join(basedir, path)
+        if os.path.isfile(full_path):
+            ret.append(path)
+        for r, _, f in os.walk(full_path):
+            for one in f:
+                if os.path.splitext(one)[1] in ('.py', '.yaml', '.yml'):
+                    ret.append(os.path.relpath(os.path.join(r, one),
+                                               basedir))
+    return sorted(ret)
+
+
+def get_files_state(files, known=None):
+    """Return mtime and digest of the files, digest is calculated only
+    if mtime differs from the known one
+    """
+    known = known or {}
+    state = {}
+    for path in files:
+        full_path = os.path.join(basedir, path)
+        mtime = os.path.getmtime(full_path)
+        if path in known and known[path]['mtime'] == mtime:
+            state[path] = known[path]
+        else:
+            state[path] = {'mtime': mtime,
+                           'sha1': get_file_digest(full_path)}
+    return state
+
+
+def load_manifest():
+    """Return the manifest of discovered tests or None if it's missing
+    or any of tests files was changed since it was built
+    """
+    if not MANIFEST_PATH or not os.path.isfile(MANIFEST_PATH):
+        return None
+    try:
+        with open(MANIFEST_PATH) as f:
+            manifest = json.load(f)
+        if manifest['version'] != MANIFEST_VERSION:
+            return None
+        files = get_manifest_files(manifest['dirs'])
+        if files != sorted(manifest['files']):
+            return None
+        state = get_files_state(files, manifest['files'])
+    except (IOError, OSError, ValueError, KeyError):
+        return None
+    if any(state[path]['sha1'] != manifest['files'][path]['sha1']
+           for path in files):
+        return None
+    if state != manifest['files']:
+        # Files were touched, but not changed
+        manifest['files'] = state
+        save_manifest(manifest)
+    return manifest
+
+
+def save_manifest(manifest):
+    try:
+        with open(MANIFEST_PATH + '.tmp', 'w') as f:
+            json.dump(manifest, f)
+        os.rename(MANIFEST_PATH + '.tmp', MANIFEST_PATH)
+    except (IOError, OSError):
+        pass
+
+
+def get_entry_module(home):
+    """Return name of the module under basedir the test belongs to"""
+    module = sys.modules.get(getattr(home, '__module__', None))
+    path = getattr(module, '__file__', None)
+    if path and os.path.abspath(path).startswith(basedir + os.sep):
+        return module.__name__
+
+
+def get_groups_modules():
+    """Return modules which have to be imported to run every group,
+    including the modules with the groups they depend on
+    """
+    from proboscis.decorators import DEFAULT_REGISTRY
+    from system_test import Repository
+
+    groups_modules = {}
+    modules_deps = {}
+
+    def add_deps(module, info):
+        deps = modules_deps.setdefault(module, set())
+        for group in (list(getattr(info, 'depends_on_groups', [])) +
+                      list(getattr(info, 'runs_after_groups', []))):
+            deps.add(('group', group))
+        for home in (list(getattr(info, 'depends_on', [])) +
+                     list(getattr(info, 'depends_on_classes', [])) +
+                     list(getattr(info, 'runs_after', []))):
+            deps.add(('module', get_entry_module(home)))
+
+    for name, group in DEFAULT_REGISTRY.groups.items():
+        modules = groups_modules.setdefault(name, set())
+        for entry in group.entries:
+            module = get_entry_module(entry.home)
+            modules.add(module)
+            add_deps(module, entry.info)
+    for name, cases in Repository.index.items():
+        for case in cases:
+            groups_modules.setdefault(name, set()).add(
+                get_entry_module(case))
+
+    def resolve(group, seen):
+        if split_group_config(group):
+            group = split_group_config(group)[0]
+        if group in seen:
+            return set()
+        seen.add(group)
+        modules = set(groups_modules.get(group, []))
+        queue = list(modules)
+        while queue:
+            module = queue.pop()
+            for kind, dep in modules_deps.get(module, []):
+                new = resolve(dep, seen) if kind == 'group' else {dep}
+                queue.extend(new - modules)
+                modules.update(new)
+        return modules
+
+    return {group: sorted(m for m in resolve(group, set()) if m)
+            for group in groups_modules}
+
+
+def build_manifest(dirs):
+    """Build the manifest from the imported tests"""
+    return {
+        'version': MANIFEST_VERSION,
+        'dirs': dirs,
+        'files': get_files_state(get_manifest_files(dirs)),
+        'groups': get_groups_modules(),
+        'listings': {command: LISTINGS[command]()
+                     for command in LISTING_COMMANDS},
+    }
+
+
+def import_tests(manifest, command, groups):
+    """Import only the modules needed for the groups if they are known,
+    otherwise discover and import all tests modules
+    """
+    from system_test import discover_import_tests
+    from system_test import tests_directory
+
+    if manifest and command in ('run', 'explain-group', 'shard',
+                                'run-pool'):
+        modules = set()
+        for group in groups:
+            base_group = (split_group_config(group)[0]
+                          if split_group_config(group) else group)
+            if base_group not in manifest['groups']:
+                break
+            modules.update(manifest['groups'][base_group])
+        else:
+            for module in sorted(modules):
+                __import__(module)
+            return manifest
 
-basedir = get_basepath()
+    discover_import_tests(basedir, tests_directory)
+    return None
 
 
 def print_explain(names):
+    from fuelweb_test.helpers.utils import pretty_log
+    from system_test import get_groups
+
     groups_nums = get_groups()
     if not isinstance(names, list):
         names = [names]
@@ -50,6 +245,16 @@ def clean_argv():
     if '--explain' in argv:
         idx = argv.index('--explain')
         argv.pop(idx)
+    if '--snapshot-order' in argv:
+        idx = argv.index('--snapshot-order')
+        argv.pop(idx)
+    for option in ('--profile', '--profile-pattern', '--profile-group'):
+        while option in argv:
+            idx = argv.index(option)
+            argv.pop(idx)
+            argv.pop(idx)
+        argv[:] = [arg for arg in argv
+                   if arg.split('=', 1)[0] != option]
 
     return argv
 
@@ -75,8 +280,32 @@ def cli():
                               "Will not start Proboscis.")
     cli_run.add_argument("--show-plan", default=False, action="store_true",
                          help="Show Proboscis test plan.")
+    cli_run.add_argument("--snapshot-order", default=False,
+                         action="store_true", dest="snapshot_order",
+                         help="Order tests to run the tests reverting the "
+                              "same snapshot one after another. With "
+                              "--show-plan shows the plan with estimated "
+                              "time and doesn't run tests.")
+    cli_run.add_argument("--profile", default=None,
+                         choices=('cprofile', 'sampling'),
+                         help="Profile every test and system test step, "
+                              "write .pstats (cprofile) or flamegraph "
+                              "collapsed stacks (sampling) and CPU/wait "
+                              "time summary to LOGS_DIR/profiles. "
+                              "PROFILE environment variable does the same.")
+    cli_run.add_argument("--profile-pattern", default=None,
+                         dest="profile_pattern",
+                         help="Profile only tests and steps with names "
+                              "(method name or CaseClass.step_name) "
+                              "matching the regular expression.")
+    cli_run.add_argument("--profile-group", default=None, action="append",
+                         dest="profile_groups",
+                         help="Profile only tests of the group, can be "
+                              "used several times.")
     cli_run.add_argument("--with-xunit", default=False, action="store_true",
                          help="Use xuint report.")
+    cli_run.add_argument("--xunit-file", default=None, dest="xunit_file",
+                         help="Path of xunit report.")
     cli_run.add_argument("--nologcapture", default=False, action="store_true",
                          help="Disable log capture for Proboscis.")
     cli_run.add_argument("-q", default=False, action="store_true",
@@ -97,6 +326,47 @@ def cli():
     cli_explain_group.add_argument("name",
                                    help="Group name.")
 
+    cli_pool = commands.add_parser(
+        "run-pool",
+        help="Run tests in a pool of environments",
+        description="Run system test cases for every config and other "
+                    "groups at the same time, each one in a separate "
+                    "process using its own environment")
+    cli_pool.add_argument("run_groups", nargs='+',
+                          help="Groups to run.")
+    cli_pool.add_argument("--envs", nargs='+', required=True,
+                          help="Prefixes of environments names, one group "
+                               "is run in every environment at a time.")
+    cli_pool.add_argument("--with-config", default=None, type=str,
+                          action="store", dest="config_name",
+                          help="Select name of yaml config.")
+    cli_pool.add_argument("--xunit-file", default='nosetests.xml',
+                          dest="xunit_file",
+                          help="Path of the merged xunit report.")
+    cli_pool.add_argument("--keep-envs", default=False, action="store_true",
+                          dest="keep_envs",
+                          help="Don't erase the environments after their "
+                               "groups are run. Every prefix may leave a "
+                               "full environment for every config, it "
+                               "needs the disk space of prefixes x configs "
+                               "environments with their snapshots.")
+
+    cli_shard = commands.add_parser(
+        "shard",
+        help="Show groups of one shard",
+        description="Split groups into shards with the same estimated "
+                    "duration and show groups of the selected shard")
+    cli_shard.add_argument("run_groups", nargs='+',
+                           help="Groups to split.")
+    cli_shard.add_argument("--shards", type=int, required=True,
+                           help="Number of shards.")
+    cli_shard.add_argument("--index", type=int, required=True,
+                           help="Index of the shard to show, from 0.")
+    cli_shard.add_argument("--timestat", default=None, action="append",
+                           help="Path or glob of the yaml file with "
+                                "recorded tests timings, "
+                                "LOGS_DIR/timestat_*.yaml by default.")
+
     commands.add_parser("show-all-groups",
                         help="Show all Proboscis groups")
     commands.add_parser("show-fuelweb-groups",
@@ -114,6 +384,11 @@ def cli():
 
 
 def run(**kwargs):
+    from proboscis import TestProgram
+    from proboscis import register
+    from system_test import get_groups
+    from system_test import register_system_test_cases
+
     config_name = kwargs.get('config_name', None)
     groups = kwargs.get('run_groups', [])
     old_groups = kwargs.get('groups', None)
@@ -131,59 +406,353 @@ def run(**kwargs):
             register_system_test_cases(groups=[g])
             groups_to_run.append(g)
     if not set([split_group_config(i)[0] if split_group_config(i) else i
-               for i in groups_to_run]) < set(get_groups()):
+               for i in groups_to_run]) <= set(get_groups()):
         sys.exit('There are no cases mapped to current group, '
                  'please be sure that you put right test group name.')
     if explain:
         print_explain(groups)
+        return
+    configure_profiler(kwargs.get('profile'), kwargs.get('profile_pattern'),
+                       kwargs.get('profile_groups'))
+    register(groups=["run_system_test"], depends_on_groups=groups_to_run)
+    if kwargs.get('snapshot_order'):
+        from proboscis import TestPlan
+        from proboscis.decorators import DEFAULT_REGISTRY
+        from system_test.core.scheduler import get_timeline
+        from system_test.core.scheduler import ScheduledTestProgram
+
+        if kwargs.get('show_plan'):
+            plan = TestPlan.create_from_registry(DEFAULT_REGISTRY)
+            plan.filter(group_names=['run_system_test'])
+            history = load_default_timestat_durations()
+            for line in get_timeline(
+                    plan.tests, lambda c: get_case_duration(c, history)):
+                print(line)
+            return
+        ScheduledTestProgram(groups=['run_system_test'],
+                             argv=clean_argv()).run_and_exit()
     else:
-        register(groups=["run_system_test"], depends_on_groups=groups_to_run)
         TestProgram(groups=['run_system_test'],
                     argv=clean_argv()).run_and_exit()
 
 
+def get_tests_names(cases):
+    """Return names the tests and the system test steps are profiled with,
+    the steps are named 'Case_<test>__Config_<config>.Step<N>_<action>'
+    """
+    return set(case.entry.home.__name__ for case in cases)
+
+
+def configure_profiler(mode=None, pattern=None, groups=None):
+    """Override PROFILE settings with the options of the run command,
+    the groups must be registered already
+    """
+    if not (mode or pattern or groups):
+        return
+    from fuelweb_test.helpers.profiler import profiler
+    from fuelweb_test import settings
+
+    names = None
+    if groups:
+        from proboscis.decorators import DEFAULT_REGISTRY
+
+        unknown = [g for g in groups if g not in DEFAULT_REGISTRY.groups]
+        if unknown:
+            sys.exit('There are no cases mapped to the profiled groups {0}, '
+                     'please be sure that you put right test group '
+                     'names.'.format(', '.join(unknown)))
+        names = set()
+        for tests in get_groups_tests(groups, register=False).values():
+            names.update(get_tests_names(tests))
+    profiler.configure(mode or profiler.mode or 'cprofile',
+                       pattern or settings.PROFILE_PATTERN, names)
+
+
+def parse_duration(doc):
+    """Return duration in seconds from 'Duration Nm' in docstring"""
+    m = re.search(r'Duration\s+(\d+)\s*([smh]?)\b', doc or '')
+    if m:
+        return int(m.group(1)) * {'s': 1, 'h': 3600}.get(m.group(2), 60)
+
+
+def load_timestat_durations(paths):
+    """Return average duration of the tests recorded by TimeStat
+
+    Every file contains the timings of the tests run once, the duration of
+    the test is a sum of the timings recorded in it.
+    """
+    import yaml
+
+    class TimeStatLoader(yaml.SafeLoader):
+        """Loader which doesn't construct python objects used as keys"""
+
+    TimeStatLoader.add_multi_constructor(
+        'tag:yaml.org,2002:python/', lambda loader, suffix, node: suffix)
+
+    durations = {}
+    for path in paths:
+        try:
+            with open(path) as f:
+                data = yaml.load(f, Loader=TimeStatLoader) or {}
+        except (IOError, yaml.YAMLError):
+            continue
+        for method, timings in data.items():
+            if not isinstance(timings, dict):
+                continue
+            total = 0
+            for value in timings.values():
+                try:
+                    total += float(value)
+                except (TypeError, ValueError):
+                    pass
+            durations.setdefault(str(method), []).append(total)
+    return {k: sum(v) / len(v) for k, v in durations.items()}
+
+
+def load_default_timestat_durations(patterns=None):
+    """Load durations from the files matching the patterns or from
+    timestat_*.yaml in LOGS_DIR
+    """
+    if not patterns:
+        from fuelweb_test.settings import LOGS_DIR
+        patterns = [os.path.join(LOGS_DIR, 'timestat_*.yaml')]
+    return load_timestat_durations(
+        sorted(set(path for pattern in patterns
+                   for path in glob.glob(pattern))))
+
+
+def get_case_duration(case, history):
+    """Return key and duration of the test case, steps of the system test
+    case have the same key and duration of the whole case
+    """
+    home = case.entry.home
+    name = getattr(home, '__name__', str(home))
+    if name in history:
+        return name, history[name]
+    duration = parse_duration(getattr(home, '__doc__', None))
+    if duration is not None:
+        return name, duration
+    if hasattr(case.entry, 'parent'):
+        parent_home = case.entry.parent.home
+        duration = parse_duration(getattr(parent_home, '__doc__', None))
+        if duration is not None:
+            return parent_home, duration
+    return name, DEFAULT_TEST_DURATION
+
+
+def get_groups_tests(groups, register=True):
+    """Return tests of every group including tests it depends on
+
+    :param register: register system test cases of the groups, it must be
+        done once
+    """
+    from proboscis import TestPlan
+    from proboscis.decorators import DEFAULT_REGISTRY
+    from system_test import register_system_test_cases
+
+    if register:
+        for group in groups:
+            register_system_test_cases(groups=[group])
+    plan = TestPlan.create_from_registry(DEFAULT_REGISTRY)
+    all_plan_tests = plan.tests[:]
+
+    groups_tests = {}
+    for group in groups:
+        plan.filter(group_names=[group])
+        groups_tests[group] = plan.tests[:]
+        plan.tests = all_plan_tests[:]
+    return groups_tests
+
+
+def get_shards_units(groups_tests, history):
+    """Return list of (duration, groups), groups depending on each other
+    are kept in one unit to run their common tests once
+    """
+    entries = {group: set(case.entry for case in tests)
+               for group, tests in groups_tests.items()}
+    parents = {group: group for group in groups_tests}
+
+    def find(group):
+        while parents[group] != group:
+            group = parents[group]
+        return group
+
+    groups = sorted(groups_tests)
+    for i, one in enumerate(groups):
+        for other in groups[i + 1:]:
+            if (entries[one] and entries[other] and
+                    (entries[one] <= entries[other] or
+                     entries[other] <= entries[one])):
+                parents[find(other)] = find(one)
+
+    units = {}
+    for group in groups:
+        units.setdefault(find(group), []).append(group)
+
+    ret = []
+    for unit_groups in units.values():
+        cases = {}
+        for group in unit_groups:
+            for case in groups_tests[group]:
+                key, duration = get_case_duration(case, history)
+                cases[key] = duration
+        ret.append((sum(cases.values()), unit_groups))
+    return ret
+
+
+def split_shards(units, shards):
+    """Assign every unit to the least loaded shard, the longest first
+
+    :return: list of (duration, groups) for every shard
+    """
+    loads = [[0, i, []] for i in range(shards)]
+    for duration, groups in sorted(units, key=lambda u: (-u[0], u[1])):
+        load = min(loads)
+        load[0] += duration
+        load[2].extend(groups)
+    return [(load[0], sorted(load[2]))
+            for load in sorted(loads, key=lambda l: l[1])]
+
+
+def shard(**kwargs):
+    """Show groups of one shard"""
+    groups = sorted(set(kwargs.get('run_groups')))
+    shards = kwargs.get('shards')
+    index = kwargs.get('index')
+    if shards < 1 or not 0 <= index < shards:
+        sys.exit('Shard index should be from 0 to {0}'.format(shards - 1))
+
+    history = load_default_timestat_durations(kwargs.get('timestat'))
+
+    groups_tests = get_groups_tests(groups)
+    unknown = [group for group in groups if not groups_tests[group]]
+    if unknown:
+        sys.exit('There are no cases mapped to groups {0}, please be sure '
+                 'that you put right test group names.'.format(unknown))
+
+    result = split_shards(get_shards_units(groups_tests, history), shards)
+    for i, (duration, shard_groups) in enumerate(result):
+        print('Shard {0}: {1}m, {2}'.format(
+            i, int(duration // 60), ' '.join(shard_groups)), file=sys.stderr)
+    for group in result[index][1]:
+        print(group)
+
+
+def get_pool_groups(groups, config_name=None):
+    """Split system test groups into groups for every config"""
+    from system_test import Repository
+    from system_test.core.discover import config_filter
+
+    configs = sorted(config_filter([config_name] if config_name else None))
+    ret = []
+    for group in groups:
+        if split_group_config(group) or group not in Repository.index:
+            ret.append(group)
+        else:
+            ret.extend('{0}({1})'.format(group, config) for config in configs)
+    return ret
+
+
+def run_pool(**kwargs):
+    """Run tests in a pool of environments"""
+    from fuelweb_test.helpers.utils import pretty_log
+    from fuelweb_test.settings import LOGS_DIR
+    from system_test.core.pool import EnvironmentsPool
+    from system_test.core.pool import merge_xunit
+
+    groups = get_pool_groups(sorted(set(kwargs.get('run_groups'))),
+                             kwargs.get('config_name'))
+    command = [sys.executable, os.path.join(basedir, 'run_system_test.py'),
+               'run', '-q', '--nologcapture', '--with-xunit']
+    pool = EnvironmentsPool(kwargs.get('envs'),
+                            os.path.join(LOGS_DIR, 'pool'), command,
+                            kwargs.get('keep_envs'))
+    results = pool.run(groups)
+    totals = merge_xunit([r['xunit_file'] for r in results],
+                         kwargs.get('xunit_file'))
+    print(pretty_log(totals))
+    failed = [r['group'] for r in results if r['code'] != 0]
+    if failed:
+        sys.exit('Failed groups: {0}'.format(' '.join(failed)))
+
+
 def explain_group(**kwargs):
     """Explain selected group."""
     name = kwargs.get('name', None)
     print_explain(name)
 
 
-def show_all_groups(**kwargs):
-    """Show all Proboscis groups"""
+def all_groups_listing():
+    from fuelweb_test.helpers.utils import pretty_log
+    from system_test import get_groups
+
     groups_nums = get_groups()
     out = {k: len(v) for k, v in groups_nums.items()}
-    print(pretty_log(out))
+    return pretty_log(out)
 
 
-def show_fuelweb_groups(**kwargs):
-    """Show Proboscis groups defined in fuelweb suite"""
-    groups_nums = get_groups()
+def fuelweb_groups_listing():
+    from fuelweb_test.helpers.utils import pretty_log
+    from system_test import get_groups
 
+    groups_nums = get_groups()
     out = {k: len(v) for k, v in groups_nums.items()
            if not k.startswith('system_test')}
-    print(pretty_log(out))
+    return pretty_log(out)
 
 
-def show_systest_groups(**kwargs):
-    """Show Proboscis groups defined in Systest suite"""
-    groups_nums = get_groups()
+def systest_groups_listing():
+    from fuelweb_test.helpers.utils import pretty_log
+    from system_test import get_groups
 
+    groups_nums = get_groups()
     out = {k: len(v) for k, v in groups_nums.items()
            if k.startswith('system_test')}
-    print(pretty_log(out))
+    return pretty_log(out)
+
+
+def systest_configs_listing():
+    from system_test import collect_yamls
+    from system_test import get_path_to_config
+    from system_test import get_list_confignames
+
+    tests_configs = collect_yamls(get_path_to_config())
+    return '\n'.join(get_list_confignames(tests_configs))
+
+
+def show_all_groups(**kwargs):
+    """Show all Proboscis groups"""
+    print(all_groups_listing())
+
+
+def show_fuelweb_groups(**kwargs):
+    """Show Proboscis groups defined in fuelweb suite"""
+    print(fuelweb_groups_listing())
+
+
+def show_systest_groups(**kwargs):
+    """Show Proboscis groups defined in Systest suite"""
+    print(systest_groups_listing())
 
 
 def show_systest_configs(**kwargs):
     """Show configurations for Systest suite"""
-    tests_configs = collect_yamls(get_path_to_config())
+    print(systest_configs_listing())
 
-    for c in get_list_confignames(tests_configs):
-        print(c)
+
+LISTINGS = {
+    "show-all-groups": all_groups_listing,
+    "show-fuelweb-groups": fuelweb_groups_listing,
+    "show-systest-groups": systest_groups_listing,
+    "show-systest-configs": systest_configs_listing
+}
 
 
 COMMAND_MAP = {
     "run": run,
     "explain-group": explain_group,
+    "shard": shard,
+    "run-pool": run_pool,
     "show-all-groups": show_all_groups,
     "show-fuelweb-groups": show_fuelweb_groups,
     "show-systest-groups": show_systest_groups,
@@ -193,8 +762,24 @@ COMMAND_MAP = {
 
 def shell():
     args = cli()
-    discover_import_tests(basedir, tests_directory)
+    manifest = load_manifest()
+    if manifest and args.command in LISTING_COMMANDS:
+        print(manifest['listings'][args.command])
+        return
+
+    groups = (getattr(args, 'run_groups', None) or []) + \
+        (getattr(args, 'groups', None) or [])
+    if getattr(args, 'name', None):
+        groups.append(args.name)
+    manifest = import_tests(manifest, args.command, groups)
+
+    from gates_tests.helpers.utils import map_test_review_in_fuel_library
+    from system_test import define_custom_groups
+    from system_test import tests_directory
+
     define_custom_groups()
+    if manifest is None and MANIFEST_PATH:
+        save_manifest(build_manifest(tests_directory))
     map_test_review_in_fuel_library(**vars(args))
     COMMAND_MAP[args.command](**vars(args))
 
@@ -56,44 +56,104 @@ def collect_yamls(path):
     return ret
 
 
-def load_yaml(path):
-    """Load yaml file from path"""
-    def yaml_include(loader, node):
-        file_name = os.path.join(get_path_to_template(), node.value)
-        if not os.path.isfile(file_name):
-            raise ValueError(
-                "Cannot load the template {0} : include file {1} "
-                "doesn't exist.".format(path, file_name))
-        return yaml.load(open(file_name))
-
-    def yaml_get_env_variable(loader, node):
-        if not node.value.strip():
-            raise ValueError("Environment variable is required after {tag} in "
-                             "{filename}".format(tag=node.tag,
-                                                 filename=loader.name))
-        node_value = node.value.split(',', 1)
-        # Get the name of environment variable
-        env_variable = node_value[0].strip()
-
-        # Get the default value for environment variable if it exists in config
-        if len(node_value) > 1:
-            default_val = node_value[1].strip()
-        else:
-            default_val = None
+class OsEnvValue(object):
+    """Value of the environment variable, which is taken on use"""
 
-        value = os.environ.get(env_variable, default_val)
+    def __init__(self, variable, default, filename):
+        self.variable = variable
+        self.default = default
+        self.filename = filename
+
+    def resolve(self):
+        value = os.environ.get(self.variable, self.default)
         if value is None:
             raise ValueError("Environment variable {var} is not set from shell"
                              " environment! No default value provided in file "
-                             "{filename}".format(var=env_variable,
-                                                 filename=loader.name))
-
-        return yaml.load(value)
+                             "{filename}".format(var=self.variable,
+                                                 filename=self.filename))
+
+        return yaml.load(value, Loader=ConfigLoader)
+
+
+class ConfigLoader(getattr(yaml, 'CLoader', yaml.Loader)):
+    """Loader of the tests templates"""
+
+    path = None
+
+
+def yaml_include(loader, node):
+    file_name = os.path.join(get_path_to_template(), node.value)
+    if not os.path.isfile(file_name):
+        raise ValueError(
+            "Cannot load the template {0} : include file {1} "
+            "doesn't exist.".format(loader.path, file_name))
+    return load_yaml_template(file_name)
+
+
+def yaml_get_env_variable(loader, node):
+    if not node.value.strip():
+        raise ValueError("Environment variable is required after {tag} in "
+                         "{filename}".format(tag=node.tag,
+                                             filename=loader.path))
+    node_value = node.value.split(',', 1)
+    # Get the name of environment variable
+    env_variable = node_value[0].strip()
+
+    # Get the default value for environment variable if it exists in config
+    if len(node_value) > 1:
+        default_val = node_value[1].strip()
+    else:
+        default_val = None
+
+    return OsEnvValue(env_variable, default_val, loader.path)
+
+
+ConfigLoader.add_constructor("!include", yaml_include)
+ConfigLoader.add_constructor("!os_env", yaml_get_env_variable)
+
+_templates = {}
+
+
+def load_yaml_template(path):
+    """Load yaml file from path once, included files are loaded in place
+    and environment variables are left unresolved
+    """
+    if path not in _templates:
+        with open(path) as f:
+            loader = ConfigLoader(f)
+            loader.path = path
+            try:
+                _templates[path] = loader.get_single_data()
+            finally:
+                loader.dispose()
+    return _templates[path]
+
+
+def resolve_template(data, memo=None):
+    """Return a copy of the loaded template with environment variables
+    resolved, objects referenced several times by anchors stay shared
+    """
+    if memo is None:
+        memo = {}
+    if id(data) in memo:
+        return memo[id(data)]
+    if isinstance(data, OsEnvValue):
+        return data.resolve()
+    if isinstance(data, dict):
+        ret = memo[id(data)] = {}
+        for key, value in data.items():
+            ret[key] = resolve_template(value, memo)
+    elif isinstance(data, list):
+        ret = memo[id(data)] = []
+        ret.extend(resolve_template(value, memo) for value in data)
+    else:
+        ret = data
+    return ret
 
-    yaml.add_constructor("!include", yaml_include)
-    yaml.add_constructor("!os_env", yaml_get_env_variable)
 
-    return yaml.load(open(path))
+def load_yaml(path):
+    """Load yaml file from path"""
+    return resolve_template(load_yaml_template(path))
 
 
 def find_duplicates(yamls):
@@ -107,20 +167,27 @@ def find_duplicates(yamls):
     return {k: v for k, v in dup.items() if len(v) > 1}
 
 
+_configs = {}
+
+
 def get_configs():
     """Return list of dict environment configurations"""
-    yamls = collect_yamls(get_path_to_config())
-    dup = find_duplicates(yamls)
-    if dup:
-        raise NameError(
-            "Found duplicate files in templates. "
-            "Name of template should be unique. Errors: {}".format(dup))
-    return {get_configname(y): y for y in yamls}
+    path = get_path_to_config()
+    if path not in _configs:
+        yamls = collect_yamls(path)
+        dup = find_duplicates(yamls)
+        if dup:
+            raise NameError(
+                "Found duplicate files in templates. "
+                "Name of template should be unique. Errors: {}".format(dup))
+        _configs[path] = {get_configname(y): y for y in yamls}
+    return dict(_configs[path])
 
 
 def config_filter(configs=None):
     if configs is None:
         return get_configs()
+    configs = set(configs)
     return {k: v for k, v in get_configs().items() if k in configs}
 
 
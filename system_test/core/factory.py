@@ -21,6 +21,8 @@ from proboscis import after_class
 from proboscis import before_class
 from proboscis import test
 
+from fuelweb_test.helpers.metrics import calls_recorder
+from fuelweb_test.helpers.profiler import profiler
 from fuelweb_test.helpers.utils import TimeStat
 
 from system_test import logger
@@ -29,7 +31,10 @@ from system_test import logger
 def step_start_stop(func):
     @functools.wraps(func)
     def wrapper(*args, **kwargs):
-        with TimeStat(func) as timer:
+        # Steps are named 'Case_<test>__Config_<config>.Step<N>_<action>'
+        test_name = func.__name__
+        with TimeStat(test_name) as timer, TimeStat.step(test_name), \
+                calls_recorder.test(test_name), profiler.profile(test_name):
             step_name = getattr(func, '_step_name')
             start_step = '[ START {} ]'.format(step_name)
             header = "<<< {:-^142} >>>".format(start_step)
@@ -76,7 +81,27 @@ class ActionsFactory(object):
 
     @classmethod
     def get_actions_order(cls):
-        """Get order of actions"""
+        """Get order of actions, it's calculated once for every class"""
+        # Look only at own attributes, subclasses may have other actions
+        if '_actions_order_steps_' not in cls.__dict__:
+            cls._actions_order_steps_ = cls._get_actions_order()
+        return cls._actions_order_steps_
+
+    @classmethod
+    def get_steps(cls):
+        """Get list of (action name, method, step name) in order of actions,
+        it's calculated once for every class
+        """
+        if '_steps_' not in cls.__dict__:
+            cls._steps_ = [
+                (action['action'].replace("_action_", ""),
+                 action['method'],
+                 getattr(action['method'], "__doc__").splitlines()[0])
+                for action in cls.get_actions_order()]
+        return cls._steps_
+
+    @classmethod
+    def _get_actions_order(cls):
         if getattr(cls, 'actions_order', None) is None:
             raise LookupError("Actions order doesn't exist")
 
@@ -128,17 +153,16 @@ class ActionsFactory(object):
 
         #  Make methods for new testcase class, following by order
         scenario.append("    Scenario:")
-        for step, action in enumerate(cls.get_actions_order()):
-            n_action = action['action'].replace("_action_", "")
-            #  Generate human readable method name, if was method docstring not
-            #  described, use generated name. Used when method failed
-            step_method_name = "{}.Step{:03d}_{}".format(class_name,
-                                                         step,
-                                                         n_action)
-
-            method = copy_func(action['method'], step_method_name)
-            _step_name = getattr(action['method'],
-                                 "__doc__").splitlines()[0]
+        steps = cls.get_steps()
+        #  Generate human readable method names, if was method docstring not
+        #  described, use generated name. Used when method failed
+        steps_methods_names = [
+            "{}.Step{:03d}_{}".format(class_name, step, n_action)
+            for step, (n_action, _, _) in enumerate(steps)]
+        for step, (n_action, action_method, _step_name) in enumerate(steps):
+            step_method_name = steps_methods_names[step]
+
+            method = copy_func(action_method, step_method_name)
             setattr(method, "_step_name", "Step {:03d}. {}".format(step,
                                                                    _step_name))
             setattr(method, "_step_num", step)
@@ -154,12 +178,7 @@ class ActionsFactory(object):
 
             #  if not first step make dependency
             if step > 0:
-                prev_step_name = "{}.Step{:03d}_{}".format(
-                    class_name,
-                    step - 1,
-                    cls.get_actions_order()[step - 1]['action'].replace(
-                        "_action_", ""))
-                depends = [test_steps[prev_step_name]]
+                depends = [test_steps[steps_methods_names[step - 1]]]
             else:
                 depends = None
 
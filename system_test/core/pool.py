@@ -0,0 +1,159 @@
+#    Copyright 2016 Mirantis, Inc.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import os
+import re
+import subprocess
+import sys
+import threading
+from xml.etree import ElementTree
+
+
+def get_env_name(prefix, group):
+    """Return name of the environment for the group, groups with the same
+    config reuse the environment and its snapshots
+    """
+    m = re.search(r'\((\w*)\)$', group)
+    if m:
+        return '{0}_{1}'.format(prefix, m.group(1))
+    return prefix
+
+
+def get_safe_name(name):
+    return re.sub(r'[^\w.-]+', '_', name).strip('_')
+
+
+class EnvironmentsPool(object):
+    """Run test groups at the same time in separate processes, every
+    process uses its own devops environment, so it has its own
+    EnvironmentModel and SSHManager
+
+    Every prefix keeps one environment at a time: it takes the groups of
+    the config of its environment first and erases the environment when
+    it switches to another config and when all the groups are done. With
+    keep_envs the environments are left for debugging, every prefix may
+    leave a full environment with its snapshots for every config.
+
+    :param prefixes: names prefixes of the environments, one group is run
+        for every prefix at the same time
+    :param logs_dir: directory for logs and xunit reports of the groups
+    :param command: command running one group, the group name and the path
+        to xunit report are appended to it
+    :param keep_envs: don't erase the environments
+    """
+
+    def __init__(self, prefixes, logs_dir, command, keep_envs=False):
+        self.prefixes = prefixes
+        self.logs_dir = logs_dir
+        self.command = command
+        self.keep_envs = keep_envs
+        self.results = []
+        self.pending = []
+        self.lock = threading.Lock()
+
+    def run_group(self, prefix, group):
+        env_name = get_env_name(prefix, group)
+        logs_dir = os.path.join(self.logs_dir, get_safe_name(env_name),
+                                get_safe_name(group))
+        if not os.path.isdir(logs_dir):
+            os.makedirs(logs_dir)
+        xunit_file = os.path.join(logs_dir, 'nosetests.xml')
+        env = dict(os.environ, ENV_NAME=env_name, LOGS_DIR=logs_dir)
+        with open(os.path.join(logs_dir, 'console.log'), 'w') as log:
+            code = subprocess.call(
+                self.command + [group,
+                                '--xunit-file={0}'.format(xunit_file)],
+                stdout=log, stderr=subprocess.STDOUT, env=env)
+        sys.stdout.write('{0} in {1}: {2}\n'.format(
+            group, env_name, 'OK' if code == 0 else 'FAILED'))
+        return {'group': group, 'env_name': env_name, 'code': code,
+                'xunit_file': xunit_file}
+
+    def erase_environment(self, env_name):
+        if self.keep_envs:
+            return
+        logs_dir = os.path.join(self.logs_dir, get_safe_name(env_name))
+        if not os.path.isdir(logs_dir):
+            os.makedirs(logs_dir)
+        with open(os.path.join(logs_dir, 'erase.log'), 'a') as log:
+            code = subprocess.call(['dos.py', 'erase', env_name],
+                                   stdout=log, stderr=subprocess.STDOUT)
+        if code != 0:
+            sys.stdout.write('Failed to erase {0}, see {1}\n'.format(
+                env_name, log.name))
+
+    def take_group(self, prefix, env_name):
+        """Return the next group, the groups using the environment first,
+        or None if all the groups are taken
+        """
+        with self.lock:
+            if not self.pending:
+                return None
+            for group in self.pending:
+                if get_env_name(prefix, group) == env_name:
+                    break
+            else:
+                group = self.pending[0]
+            self.pending.remove(group)
+            return group
+
+    def worker(self, prefix):
+        env_name = None
+        while True:
+            group = self.take_group(prefix, env_name)
+            if group is None:
+                break
+            if env_name and get_env_name(prefix, group) != env_name:
+                self.erase_environment(env_name)
+            env_name = get_env_name(prefix, group)
+            result = self.run_group(prefix, group)
+            with self.lock:
+                self.results.append(result)
+        if env_name:
+            self.erase_environment(env_name)
+
+    def run(self, groups):
+        """Run the groups and return the results in order of the groups"""
+        self.pending = list(groups)
+        threads = [threading.Thread(target=self.worker, args=(prefix,))
+                   for prefix in self.prefixes]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        order = {group: i for i, group in enumerate(groups)}
+        return sorted(self.results, key=lambda r: order[r['group']])
+
+
+def merge_xunit(paths, output):
+    """Merge xunit reports into one test suite"""
+    counters = ('tests', 'errors', 'failures', 'skip')
+    totals = dict.fromkeys(counters, 0)
+    merged = ElementTree.Element('testsuite', name='nosetests')
+    for path in paths:
+        if not os.path.isfile(path):
+            continue
+        try:
+            suite = ElementTree.parse(path).getroot()
+        except ElementTree.ParseError:
+            continue
+        for counter in counters:
+            totals[counter] += int(suite.get(counter, 0))
+        for case in suite.findall('testcase'):
+            merged.append(case)
+    for counter in counters:
+        merged.set(counter, str(totals[counter]))
+    ElementTree.ElementTree(merged).write(output, encoding='UTF-8',
+                                          xml_declaration=True)
+    return totals
@@ -0,0 +1,224 @@
+#    Copyright 2016 Mirantis, Inc.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Order of tests which keeps tests reverting the same snapshot together
+
+Tests of one class are kept together in their original order. Tests are
+moved only within the limits of the dependencies declared in proboscis and
+the snapshots made and reverted by the tests (only snapshots with literal
+names are known).
+"""
+
+import inspect
+import re
+
+from proboscis import TestProgram
+
+REVERT_RE = re.compile(r'revert_snapshot\(\s*[\'"]([^\'"]+)[\'"]')
+MAKE_RE = re.compile(r'make_snapshot\(\s*[\'"]([^\'"]+)[\'"]')
+
+
+def get_source(home):
+    try:
+        return inspect.getsource(home)
+    except (IOError, TypeError):
+        return ''
+
+
+class TestsBlock(object):
+    """Tests which are run one after another"""
+
+    def __init__(self, index):
+        self.index = index
+        self.cases = []
+        self.reverts = []
+        self.makes = []
+        self.deps = set()
+
+    @property
+    def revert(self):
+        """Snapshot the block starts from"""
+        return self.reverts[0] if self.reverts else None
+
+    @property
+    def state(self):
+        """Snapshot of the environment after the block"""
+        if self.makes:
+            return self.makes[-1]
+        return self.revert
+
+    @property
+    def name(self):
+        entry = self.cases[0].entry
+        home = entry.parent.home if hasattr(entry, 'parent') else entry.home
+        return getattr(home, '__name__', str(home))
+
+    def add(self, case):
+        self.cases.append(case)
+        source = get_source(case.entry.home)
+        self.reverts.extend(REVERT_RE.findall(source))
+        self.makes.extend(MAKE_RE.findall(source))
+
+
+def get_info_items(info, *names):
+    items = []
+    for name in names:
+        items.extend(getattr(info, name, None) or [])
+    return items
+
+
+def get_infos(entry):
+    infos = [entry.info]
+    if hasattr(entry, 'parent'):
+        infos.append(entry.parent.info)
+    return infos
+
+
+def get_blocks(cases):
+    """Split tests into blocks and find the blocks every block depends on"""
+    blocks = {}
+    case_blocks = []
+    for index, case in enumerate(cases):
+        entry = case.entry
+        key = entry.parent if hasattr(entry, 'parent') else entry
+        if key not in blocks:
+            blocks[key] = TestsBlock(index)
+        blocks[key].add(case)
+        case_blocks.append(blocks[key])
+
+    by_group = {}
+    by_home = {}
+    for case, block in zip(cases, case_blocks):
+        for info in get_infos(case.entry):
+            for group in get_info_items(info, 'groups'):
+                by_group.setdefault(group, set()).add(block)
+        by_home.setdefault(case.entry.home, set()).add(block)
+        if hasattr(case.entry, 'parent'):
+            by_home.setdefault(case.entry.parent.home, set()).add(block)
+
+    makers = {}
+    for block in sorted(set(case_blocks), key=lambda b: b.index):
+        for snapshot in block.makes:
+            makers.setdefault(snapshot, block)
+
+    for case, block in zip(cases, case_blocks):
+        for info in get_infos(case.entry):
+            for group in get_info_items(info, 'depends_on_groups',
+                                        'runs_after_groups'):
+                block.deps.update(by_group.get(group, []))
+            for home in get_info_items(info, 'depends_on',
+                                       'depends_on_classes', 'runs_after'):
+                block.deps.update(by_home.get(home, []))
+    for block in set(case_blocks):
+        for snapshot in block.reverts:
+            if snapshot in makers and makers[snapshot].index < block.index:
+                block.deps.add(makers[snapshot])
+        block.deps.discard(block)
+    return sorted(set(case_blocks), key=lambda b: b.index)
+
+
+def schedule_blocks(blocks):
+    """Order the blocks so the next block reverts the snapshot of the
+    environment left by the previous one, if the dependencies allow it,
+    otherwise keep the original order
+
+    :return: ordered list of blocks or None if dependencies have a loop
+    """
+    pending = set(blocks)
+    done = set()
+    ordered = []
+    state = None
+    while pending:
+        ready = [b for b in pending if b.deps <= done]
+        if not ready:
+            return None
+        block = min(ready, key=lambda b: (
+            not (b.revert is not None and b.revert == state), b.index))
+        pending.remove(block)
+        done.add(block)
+        ordered.append(block)
+        state = block.state
+    return ordered
+
+
+def schedule(cases):
+    """Return tests ordered to reuse snapshots or the original order if
+    it can't be changed safely
+    """
+    ordered = schedule_blocks(get_blocks(cases))
+    if ordered is None:
+        return list(cases)
+    return [case for block in ordered for case in block.cases]
+
+
+def count_revert_hits(blocks):
+    """Return number of blocks reverting the snapshot left by the previous
+    block and number of blocks reverting any known snapshot
+    """
+    hits = reverts = 0
+    state = None
+    for block in blocks:
+        if block.revert is not None:
+            reverts += 1
+            if block.revert == state:
+                hits += 1
+        state = block.state
+    return hits, reverts
+
+
+def get_timeline(cases, get_duration):
+    """Return lines of the plan of the tests with estimated start time
+
+    :param get_duration: function returning key and duration in seconds of
+        the test case, duration of the tests with the same key is counted
+        once
+    """
+    original = get_blocks(cases)
+    ordered = schedule_blocks(original) or original
+    lines = []
+    start = 0
+    counted = set()
+    for block in ordered:
+        duration = 0
+        for case in block.cases:
+            key, case_duration = get_duration(case)
+            if key not in counted:
+                counted.add(key)
+                duration += case_duration
+        lines.append('+{0:02d}:{1:02d} {2:<60} {3:>4}m  revert: {4}  '
+                     'make: {5}'.format(int(start // 3600),
+                                        int(start % 3600 // 60),
+                                        block.name, int(duration // 60),
+                                        block.revert or '-',
+                                        ', '.join(block.makes) or '-'))
+        start += duration
+    hits, reverts = count_revert_hits(ordered)
+    original_hits, _ = count_revert_hits(original)
+    lines.append('Estimated duration: {0}h {1:02d}m, tests blocks: {2}, '
+                 'snapshot reverts continuing the previous test: {3} of {4} '
+                 '(original order: {5})'.format(
+                     int(start // 3600), int(start % 3600 // 60),
+                     len(ordered), hits, reverts, original_hits))
+    return lines
+
+
+class ScheduledTestProgram(TestProgram):
+    """TestProgram running the tests in the order of schedule()"""
+
+    def create_test_suite_from_entries(self, config, cases):
+        # TestProgram builds the plan and the suite in __init__, the plan
+        # is reordered right before the suite is created from it
+        self.plan.tests = self.cases = schedule(cases)
+        return super(ScheduledTestProgram,
+                     self).create_test_suite_from_entries(config, self.cases)
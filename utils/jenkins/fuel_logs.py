@@ -18,7 +18,8 @@ This tool can extract the useful lines from Astute and Puppet logs
 within the Fuel log snapshot or on the live Fuel Master node.
 
 usage: fuel_logs [-h] [--astute] [--puppet] [--clear] [--sort] [--evals]
-                 [--mcagent] [--less]
+                 [--mcagent] [--less] [--full] [--jobs JOBS] [--index]
+                 [--follow]
                  [SNAPSHOT [SNAPSHOT ...]]
 
 positional arguments:
@@ -33,6 +34,13 @@ optional arguments:
   --evals, -e    Show Puppet evaltrace lines
   --mcagent, -m  Show Astute MCAgent calls debug
   --less, -l     Redirect data to the "less" pager
+  --full, -f     Full output without filters
+  --jobs, -j     Parse Puppet logs in this number of processes,
+                 0 to use all CPU cores
+  --index, -i    Use the persistent index of the snapshot logs,
+                 build it if it is missing
+  --follow, -F   Keep reading the new lines of the logs
+                 on the Fuel Master node
 
 Using anywhere to view Fuel snapshot data:
 
@@ -52,17 +60,40 @@ fuel_logs.py -c Truncates Astute and Puppet logs. Respects -a and -p options.
 It you are running and debugging many deployments on a single Fuel Master
 node, you may want to truncate the logs from the previous deployments.
 Using -l option is also recommended for interactive use.
+
+fuel_logs.py -F keeps showing the new lines of the logs during the
+deployment. Rotated and truncated logs are followed too.
+
+fuel_logs.py -i parses the snapshot once into the index file next to
+the snapshot, so the next runs with any filters read the index only.
+
+fuel_logs.py -p -j 0 parses Puppet logs of the large deployments
+using all CPU cores.
 """
 
 import argparse
+import collections
 from datetime import datetime
+import hashlib
+import heapq
+import multiprocessing
 import os
+import pickle
 import re
+import sqlite3
 import sys
 import tarfile
+import tempfile
+from time import sleep
 
 PUPPET_LOG = 'puppet-apply.log'
 ASTUTE_LOG = 'astute.log'
+SORT_SPILL_SIZE = 100000
+PARSE_CHUNK_SIZE = 10000
+READ_CHUNK_SIZE = 1024 * 1024
+INDEX_SUFFIX = '.index'
+INDEX_VERSION = '1'
+FOLLOW_INTERVAL = 2
 
 
 class IO(object):
@@ -92,23 +123,27 @@ class IO(object):
             if not os.path.isfile(snapshot):
                 continue
 
-            with FuelSnapshot(snapshot) as fuel_snapshot:
-
-                if cls.args.astute:
-                    fuel_snapshot.parse_astute_log(
-                        show_mcagent=cls.args.mcagent,
-                        show_full=cls.args.full,
-
-                    )
-
-                cls.separator()
+            if cls.args.index:
+                SnapshotIndex(snapshot).parse_logs(
+                    parse_astute=cls.args.astute,
+                    parse_puppet=cls.args.puppet,
+                    show_mcagent=cls.args.mcagent,
+                    enable_sort=cls.args.sort,
+                    show_evals=cls.args.evals,
+                    show_full=cls.args.full,
+                )
+                continue
 
-                if cls.args.puppet:
-                    fuel_snapshot.parse_puppet_logs(
-                        enable_sort=cls.args.sort,
-                        show_evals=cls.args.evals,
-                        show_full=cls.args.full,
-                    )
+            with FuelSnapshot(snapshot) as fuel_snapshot:
+                fuel_snapshot.parse_logs(
+                    parse_astute=cls.args.astute,
+                    parse_puppet=cls.args.puppet,
+                    show_mcagent=cls.args.mcagent,
+                    enable_sort=cls.args.sort,
+                    show_evals=cls.args.evals,
+                    show_full=cls.args.full,
+                    jobs=cls.args.jobs,
+                )
 
     @classmethod
     def process_logs(cls):
@@ -117,6 +152,16 @@ class IO(object):
         :return:
         """
         fuel_logs = FuelLogs()
+        if cls.args.follow and not cls.args.clear:
+            fuel_logs.follow_logs(
+                parse_astute=cls.args.astute,
+                parse_puppet=cls.args.puppet,
+                show_mcagent=cls.args.mcagent,
+                show_evals=cls.args.evals,
+                show_full=cls.args.full,
+            )
+            return
+
         if cls.args.astute:
             if cls.args.clear:
                 fuel_logs.clear_astute_logs()
@@ -136,6 +181,7 @@ class IO(object):
                     enable_sort=cls.args.sort,
                     show_evals=cls.args.evals,
                     show_full=cls.args.full,
+                    jobs=cls.args.jobs,
                 )
 
     @classmethod
@@ -230,6 +276,21 @@ class IO(object):
                             action="store_true",
                             default=False,
                             help='Full output without filters')
+        parser.add_argument("--jobs", "-j",
+                            type=int,
+                            default=1,
+                            help='Parse Puppet logs in this number of '
+                                 'processes, 0 to use all CPU cores')
+        parser.add_argument("--index", "-i",
+                            action="store_true",
+                            default=False,
+                            help='Use the persistent index of the snapshot '
+                                 'logs, build it if it is missing')
+        parser.add_argument("--follow", "-F",
+                            action="store_true",
+                            default=False,
+                            help='Keep reading the new lines of the logs '
+                                 'on the Fuel Master node')
         parser.add_argument('snapshots',
                             metavar='SNAPSHOT',
                             type=str,
@@ -289,24 +350,48 @@ class AbstractLog(object):
         if match:
             self.add_record(record)
 
+    @staticmethod
+    def decode_line(line):
+        """
+        Convert a raw line read from the log stream to the text
+        without the trailing line break
+        :param line: raw log line
+        :type line: bytes, str
+        :return: decoded line
+        :rtype: str
+        """
+        if isinstance(line, bytes):
+            line = line.decode(errors='replace')
+        return line.rstrip('\r\n')
+
     def each_record(self):
         """
         Abstract record iterator that iterates
         through the content lines
         :return: iter
         """
-        for record in self.content:
-            yield record.decode()
+        for line in self.content:
+            yield self.decode_line(line)
 
     def parse(self, content):
         """
         Abstract parser that adds every line
-        :param content: Input log content
-        :type content: str
+        :param content: Input log lines stream
+        :type content: iter
         :return:
         """
-        self.content = content.splitlines()
-        for record in self.each_record():
+        self.content = content
+        self.handle_records(self.each_record())
+        self.content = []
+
+    def handle_records(self, records):
+        """
+        Abstract handler that adds every record
+        :param records: log records
+        :type records: iter
+        :return:
+        """
+        for record in records:
             self.add_record(record)
 
     def output(self):
@@ -314,7 +399,16 @@ class AbstractLog(object):
         Output the parsed log content
         :return:
         """
-        for record in self.log:
+        self.output_records(self.log)
+
+    def output_records(self, records):
+        """
+        Output the given log records
+        :param records: iterable of the records
+        :type records: iter
+        :return:
+        """
+        for record in records:
             IO.output(record)
 
     @staticmethod
@@ -349,6 +443,7 @@ class AstuteLog(AbstractLog):
     Attributes:
         show_mcagent    enable or disable MCAgent debug strings
     """
+    date_regexp = re.compile(r'^\d+-\d+-\S+\s')
 
     def __init__(self):
         self.show_mcagent = False
@@ -357,24 +452,49 @@ class AstuteLog(AbstractLog):
 
     def parse(self, content):
         """
-        Parse the string containing the log content
-        :param content: the log file content
-        :type content: str
+        Parse the stream of the log lines
+        :param content: the log file lines stream
+        :type content: iter
         :return:
         """
-        self.content = content.splitlines()
-        for record in self.each_record():
+        self.content = content
+        self.handle_records(self.each_record())
+        self.content = []
+
+    def handle_records(self, records):
+        """
+        Pass the complete records to the enabled record handlers
+        :param records: log records
+        :type records: iter
+        :return:
+        """
+        record_handlers = self.record_handlers()
+        for record in records:
             if self.show_full:
                 self.add_record(record)
             else:
-                self.rpc_call(record)
-                self.rpc_cast(record)
-                self.task_status(record)
-                self.task_run(record)
-                self.hook_run(record)
-                if self.show_mcagent:
-                    self.cmd_exec(record)
-                    self.mc_agent_results(record)
+                for handler in record_handlers:
+                    handler(record)
+
+    def record_handlers(self):
+        """
+        Get the list of record handlers enabled by the options
+        :return: list of methods
+        :rtype: list
+        """
+        handlers = [
+            self.rpc_call,
+            self.rpc_cast,
+            self.task_status,
+            self.task_run,
+            self.hook_run,
+        ]
+        if self.show_mcagent:
+            handlers += [
+                self.cmd_exec,
+                self.mc_agent_results,
+            ]
+        return handlers
 
     def each_record(self):
         """
@@ -382,10 +502,9 @@ class AstuteLog(AbstractLog):
         :return: iter
         """
         record = ''
-        date_regexp = re.compile(r'^\d+-\d+-\S+\s')
-        for bline in self.content:
-            line = bline.decode()
-            if re.match(date_regexp, line):
+        for raw_line in self.content:
+            line = self.decode_line(raw_line)
+            if self.date_regexp.match(line):
                 yield record
                 record = line
             else:
@@ -473,6 +592,10 @@ class PuppetLog(AbstractLog):
         log_name    name for logger
         show_evals  show of Puppet evaltrace lines
         enable_sort sorting log lines by event time
+        spill_size  number of the sorted records kept in memory
+                    before they are spilled to the disk
+        run         records of the currently parsed log
+        runs        list of the time-ordered record runs to be merged
     """
 
     def __init__(self):
@@ -480,26 +603,90 @@ class PuppetLog(AbstractLog):
         self.show_evals = False
         self.enable_sort = False
         self.show_full = False
+        self.spill_size = SORT_SPILL_SIZE
+        self.run = []
+        self.runs = []
         super(PuppetLog, self).__init__()
 
+    def clear(self):
+        """
+        Clear the parsed and raw log contents and
+        drop the collected record runs
+        :return:
+        """
+        super(PuppetLog, self).clear()
+        for run in self.runs:
+            if hasattr(run, 'close'):
+                run.close()
+        self.run = []
+        self.runs = []
+
     def parse(self, content):
         """
-        Parse the sting with Puppet log content
-        :param content: Puppet log
-        :type content: str
+        Parse the stream of the Puppet log lines
+        :param content: Puppet log lines stream
+        :type content: iter
+        :return:
+        """
+        self.content = content
+        self.handle_records(self.each_record())
+        self.content = []
+        self.finish_run()
+
+    def handle_records(self, records):
+        """
+        Pass the log lines matching any marker
+        to the enabled record handlers
+        :param records: log lines
+        :type records: iter
         :return:
         """
-        self.content = content.splitlines()
-        for record in self.each_record():
+        record_filter = self.record_filter()
+        record_handlers = self.record_handlers()
+        for record in records:
             if self.show_full:
                 self.add_record(record)
-            else:
-                self.err_line(record)
-                self.catalog_start(record)
-                self.catalog_end(record)
-                self.catalog_modular(record)
-                if self.show_evals:
-                    self.resource_evaluation(record)
+            elif record_filter.search(record):
+                for handler in record_handlers:
+                    handler(record)
+
+    def record_handlers(self):
+        """
+        Get the list of record handlers enabled by the options
+        :return: list of methods
+        :rtype: list
+        """
+        handlers = [
+            self.err_line,
+            self.catalog_start,
+            self.catalog_end,
+            self.catalog_modular,
+        ]
+        if self.show_evals:
+            handlers += [
+                self.resource_evaluation,
+            ]
+        return handlers
+
+    def record_filter(self):
+        """
+        Build the single regular expression matching any of the markers
+        caught by the record handlers, so the lines without them are
+        skipped by one search instead of running every handler
+        :return: compiled regular expression
+        """
+        markers = [
+            'err:',
+            'Compiled catalog for',
+            'Finished catalog run',
+            'MODULAR',
+        ]
+        if self.show_evals:
+            markers += [
+                'Starting to evaluate the resource',
+                'Evaluated in',
+            ]
+        return re.compile('|'.join(re.escape(marker) for marker in markers))
 
     @staticmethod
     def node_name(string):
@@ -527,10 +714,20 @@ class PuppetLog(AbstractLog):
         them if enabled
         :return:
         """
+        records = self.log
         if self.enable_sort:
-            self.sort_log()
+            records = self.sort_log()
+        self.output_records(records)
+
+    def output_records(self, records):
+        """
+        Output the given Puppet log records
+        :param records: iterable of the records
+        :type records: iter
+        :return:
+        """
         previous_log = None
-        for record in self.log:
+        for record in records:
             log = record.get('log', None)
             if log and not self.enable_sort and previous_log != log:
                 IO.output("Log file: '{0}'".format(log))
@@ -545,13 +742,78 @@ class PuppetLog(AbstractLog):
                 line=line
             ))
 
-    def sort_log(self):
+    @staticmethod
+    def record_time(record):
+        """
+        Get the sorting key of the log record
+        :param record: log record
+        :type record: dict
+        :return: event time
+        :rtype: datetime
+        """
+        return record.get('time', None)
+
+    @staticmethod
+    def spill_run(run):
+        """
+        Save the sorted run of records to a temporary file
+        :param run: list of records
+        :type run: list
+        :return: opened temporary file
         """
-        Sort the collected log lines bu the event date and time
+        spill = tempfile.TemporaryFile()
+        for record in run:
+            pickle.dump(record, spill, pickle.HIGHEST_PROTOCOL)
+        spill.seek(0)
+        return spill
+
+    @staticmethod
+    def each_run_record(run):
+        """
+        Iterate through the records of the run kept either
+        in memory or in a spilled temporary file
+        :param run: list of records or the spill file
+        :type run: list, file
+        :return: iter
+        """
+        if isinstance(run, list):
+            for record in run:
+                yield record
+            return
+        while True:
+            try:
+                yield pickle.load(run)
+            except EOFError:
+                break
+
+    def finish_run(self):
+        """
+        Sort the records of the current log and add them as a new run.
+        Every node log is already mostly time-ordered, so this sort is
+        cheap. The runs are spilled to the disk if there are too many
+        records to keep them in memory.
         :return:
         """
-        self.log = sorted(self.log,
-                          key=lambda record: record.get('time', None))
+        if not self.run:
+            return
+        self.run.sort(key=self.record_time)
+        self.runs.append(self.run)
+        self.run = []
+        in_memory = [run for run in self.runs if isinstance(run, list)]
+        if sum(len(run) for run in in_memory) < self.spill_size:
+            return
+        self.runs = [self.spill_run(run) if isinstance(run, list) else run
+                     for run in self.runs]
+
+    def sort_log(self):
+        """
+        Merge the sorted record runs of every log by the event date and
+        time. Only the head record of every run is kept in memory.
+        :return: iter
+        """
+        self.finish_run()
+        runs = [self.each_run_record(run) for run in self.runs]
+        return heapq.merge(*runs, key=self.record_time)
 
     def convert_record(self, line):
         """
@@ -585,7 +847,22 @@ class PuppetLog(AbstractLog):
         """
         record = self.convert_record(record)
         if record:
+            self.collect(record)
+
+    def collect(self, record):
+        """
+        Save the converted record either to the result log
+        or to the current run of records to be sorted
+        :param record: log record
+        :type record: dict
+        :return:
+        """
+        if not self.enable_sort:
             self.log.append(record)
+            return
+        self.run.append(record)
+        if len(self.run) >= self.spill_size:
+            self.finish_run()
 
     def err_line(self, record):
         """
@@ -642,6 +919,134 @@ class PuppetLog(AbstractLog):
         self.catch_record(record, include_markers)
 
 
+def parse_puppet_chunk(options, log_name, content):
+    """
+    Parse the Puppet log lines in the worker process
+    :param options: PuppetLog attributes
+    :type options: dict
+    :param log_name: name of the parsed log
+    :type log_name: str
+    :param content: log lines or path to the log file
+    :type content: list, str
+    :return: list of the log records
+    :rtype: list
+    """
+    puppet_log = PuppetLog()
+    for option, value in options.items():
+        setattr(puppet_log, option, value)
+    puppet_log.log_name = log_name
+    if isinstance(content, list):
+        puppet_log.parse(content)
+    else:
+        with open(content, 'rb') as log:
+            puppet_log.parse(log)
+    return puppet_log.log
+
+
+class PuppetLogPool(object):
+    """
+    This class parses the Puppet logs in the pool of worker processes
+    and collects the records to the PuppetLog object in the input order.
+    It can be used instead of the PuppetLog object as a parser.
+    Attributes:
+        log_name    name of the currently parsed log
+        puppet_log  PuppetLog object collecting the records
+        pool        pool of the worker processes
+        pending     queue of the submitted chunks
+        max_pending maximum number of the chunks being processed
+        chunk_size  number of lines sent to a worker at once
+    """
+
+    def __init__(self, puppet_log, jobs=0, chunk_size=PARSE_CHUNK_SIZE):
+        self.log_name = None
+        self.puppet_log = puppet_log
+        self.pool = multiprocessing.Pool(jobs or None)
+        self.pending = collections.deque()
+        self.max_pending = (jobs or multiprocessing.cpu_count()) * 2
+        self.chunk_size = chunk_size
+
+    def close(self):
+        """
+        Stop the worker processes
+        :return:
+        """
+        self.pool.terminate()
+        self.pool.join()
+
+    def options(self):
+        """
+        Get the PuppetLog options to be passed to the workers
+        :return: options
+        :rtype: dict
+        """
+        return {
+            'show_evals': self.puppet_log.show_evals,
+            'show_full': self.puppet_log.show_full,
+        }
+
+    def submit(self, content):
+        """
+        Send the log lines or the log file to a worker. Wait for
+        the oldest chunks if there are too many of them in progress
+        to keep the memory use bounded.
+        :param content: log lines or path to the log file
+        :type content: list, str
+        :return:
+        """
+        while len(self.pending) >= self.max_pending:
+            self.collect()
+        result = self.pool.apply_async(
+            parse_puppet_chunk, (self.options(), self.log_name, content))
+        self.pending.append((self.log_name, result))
+
+    def collect(self):
+        """
+        Wait for the oldest submitted chunk and save its records
+        :return:
+        """
+        log_name, result = self.pending.popleft()
+        if log_name != self.puppet_log.log_name:
+            self.puppet_log.finish_run()
+            self.puppet_log.log_name = log_name
+        for record in result.get():
+            self.puppet_log.collect(record)
+
+    def wait(self):
+        """
+        Wait for all submitted chunks
+        :return:
+        """
+        while self.pending:
+            self.collect()
+        self.puppet_log.finish_run()
+
+    def parse(self, content):
+        """
+        Split the log lines stream to chunks and parse them in the pool
+        :param content: log lines stream
+        :type content: iter
+        :return:
+        """
+        chunk = []
+        for line in content:
+            chunk.append(line)
+            if len(chunk) >= self.chunk_size:
+                self.submit(chunk)
+                chunk = []
+        if chunk:
+            self.submit(chunk)
+
+    def parse_file(self, log_file):
+        """
+        Parse the whole log file in a worker process
+        :param log_file: path to the log file
+        :type log_file: str
+        :return:
+        """
+        self.log_name = log_file
+        self.submit(log_file)
+
+
 class FuelSnapshot(object):
     """
     This class extracts data from the Fuel log snapshot
@@ -667,12 +1072,13 @@ class FuelSnapshot(object):
 
     def open_fuel_snapshot(self, snapshot):
         """
-        Open the Fuel log snapshot file
+        Open the Fuel log snapshot file as a sequential stream
+        so the archive is decompressed only once
         :param snapshot: path to file
         :type snapshot: str
         :return:
         """
-        self.snapshot = tarfile.open(snapshot)
+        self.snapshot = tarfile.open(snapshot, 'r|*')
 
     def close_fuel_snapshot(self):
         """
@@ -682,79 +1088,534 @@ class FuelSnapshot(object):
         if self.snapshot:
             self.snapshot.close()
 
-    def astute_logs(self):
+    def log_files(self):
         """
-        Find the Astute logs in the snapshot archive
+        Iterate through the files of the snapshot archive
+        in a single sequential pass
         :return: iter
         """
-        for log in self.snapshot.getmembers():
+        for log in self.snapshot:
             if not log.isfile():
                 continue
-            if log.name.endswith(ASTUTE_LOG):
-                yield log
-
-    def puppet_logs(self):
-        """
-        Find the Puppet logs inside the snapshot archive
-        :return: iter
-        """
-        for log in self.snapshot.getmembers():
-            if not log.isfile():
-                continue
-            if log.name.endswith(PUPPET_LOG):
-                yield log
+            yield log
 
     def parse_log(self, log_file, parser):
         """
         Extract from the snapshot and parse the log
-        using a given parser object
+        using a given parser object. The log is passed to
+        the parser as a lines stream and is never read whole.
         :param log_file Path to the log file in the archive
         :type log_file str
         :param parser Parser object
         :type parser PuppetLog, AstuteLog
         """
         log = self.snapshot.extractfile(log_file)
-        content = log.read()
-        parser.parse(content)
-
-    def parse_astute_log(self,
-                         show_mcagent=False,
-                         show_full=False):
-        """
-        Parse the Astute log from the archive
+        try:
+            parser.parse(log)
+        finally:
+            log.close()
+
+    def parse_logs(self,
+                   parse_astute=False,
+                   parse_puppet=False,
+                   show_mcagent=False,
+                   enable_sort=False,
+                   show_evals=False,
+                   show_full=False,
+                   jobs=1):
+        """
+        Parse the Astute and Puppet logs found inside the archive
+        during the single pass through it
+        :param parse_astute: parse Astute logs
+        :type parse_astute: bool
+        :param parse_puppet: parse Puppet logs
+        :type parse_puppet: bool
         :param show_mcagent: show or hide MCAgent debug
         :type show_mcagent: bool
+        :param enable_sort: enable sorting of logs by date
+        :type enable_sort: bool
+        :param show_evals: show evaltrace lines in the logs
+        :type show_evals: bool
+        :param jobs: number of processes parsing Puppet logs
+        :type jobs: int
         :return:
         """
         astute_logs = AstuteLog()
         astute_logs.show_mcagent = show_mcagent
         astute_logs.show_full = show_full
-        for astute_log in self.astute_logs():
-            self.parse_log(astute_log, astute_logs)
-        astute_logs.output()
-        astute_logs.clear()
+        puppet_logs = PuppetLog()
+        puppet_logs.show_evals = show_evals
+        puppet_logs.enable_sort = enable_sort
+        puppet_logs.show_full = show_full
+        puppet_parser = puppet_logs
+        if parse_puppet and jobs != 1:
+            puppet_parser = PuppetLogPool(puppet_logs, jobs)
 
-    def parse_puppet_logs(self,
-                          enable_sort=False,
-                          show_evals=False,
-                          show_full=False):
+        try:
+            for log in self.log_files():
+                if parse_astute and log.name.endswith(ASTUTE_LOG):
+                    self.parse_log(log, astute_logs)
+                elif parse_puppet and log.name.endswith(PUPPET_LOG):
+                    puppet_parser.log_name = log.name
+                    self.parse_log(log, puppet_parser)
+            if puppet_parser is not puppet_logs:
+                puppet_parser.wait()
+        finally:
+            if puppet_parser is not puppet_logs:
+                puppet_parser.close()
+
+        if parse_astute:
+            astute_logs.output()
+            astute_logs.clear()
+
+        IO.separator()
+
+        if parse_puppet:
+            puppet_logs.output()
+            puppet_logs.clear()
+
+
+class DigestReader(object):
+    """
+    This file object wrapper calculates the digest
+    of the data while it is being read
+    """
+
+    def __init__(self, fileobj):
+        self.fileobj = fileobj
+        self.digest = hashlib.sha1()
+
+    def read(self, size=-1):
         """
-        Parse the Puppet logs found inside the archive
+        Read the data from the file and update the digest
+        :param size: number of bytes to read
+        :type size: int
+        :return: data
+        :rtype: bytes
+        """
+        data = self.fileobj.read(size)
+        self.digest.update(data)
+        return data
+
+    def hexdigest(self):
+        """
+        Read the rest of the file and get the digest of the whole file
+        :return: digest
+        :rtype: str
+        """
+        while self.read(READ_CHUNK_SIZE):
+            pass
+        return self.digest.hexdigest()
+
+
+class SnapshotIndex(object):
+    """
+    This class keeps the parsed records of the Fuel log snapshot in the
+    SQLite index file next to the snapshot. The index is built once by
+    the full parsing of the snapshot, and any filters and sorting are
+    applied to the stored records later.
+    Every record has the bit mask of the parser record handlers which
+    have caught it, so the filters can be applied without parsing.
+    Attributes:
+        snapshot    path to the snapshot file
+        index_file  path to the index file
+    """
+    level_regexp = re.compile(r'^\S+\s+(\w+):')
+
+    def __init__(self, snapshot, index_file=None):
+        if not os.path.isfile(snapshot):
+            raise RuntimeError('File "%s" is not found!' % snapshot)
+        self.snapshot = snapshot
+        self.index_file = index_file or snapshot + INDEX_SUFFIX
+
+    def connect(self, path=None):
+        """
+        Open the connection to the index database
+        :param path: path to the database file
+        :type path: str
+        :return: connection
+        """
+        return sqlite3.connect(path or self.index_file)
+
+    @staticmethod
+    def file_digest(path):
+        """
+        Calculate the digest of the whole file
+        :param path: path to file
+        :type path: str
+        :return: digest
+        :rtype: str
+        """
+        with open(path, 'rb') as data:
+            return DigestReader(data).hexdigest()
+
+    def is_actual(self):
+        """
+        Check if the index exists and is built from this snapshot.
+        The snapshot digest is calculated only if its size is
+        the same but the modification time has changed.
+        :return: the index can be used
+        :rtype: bool
+        """
+        if not os.path.isfile(self.index_file):
+            return False
+        connection = self.connect()
+        try:
+            meta = dict(connection.execute('SELECT key, value FROM meta'))
+            stat = os.stat(self.snapshot)
+            if meta.get('version') != INDEX_VERSION:
+                return False
+            if meta.get('size') != str(stat.st_size):
+                return False
+            if meta.get('mtime') == str(stat.st_mtime):
+                return True
+            if meta.get('digest') != self.file_digest(self.snapshot):
+                return False
+            with connection:
+                connection.execute(
+                    'UPDATE meta SET value = ? WHERE key = ?',
+                    (str(stat.st_mtime), 'mtime'))
+            return True
+        except sqlite3.DatabaseError:
+            return False
+        finally:
+            connection.close()
+
+    @staticmethod
+    def record_markers(parser, record):
+        """
+        Get the bit mask of the record handlers catching this record
+        :param parser: parser object with all handlers enabled
+        :type parser: AstuteLog, PuppetLog
+        :param record: log record
+        :type record: str
+        :return: bit mask
+        :rtype: int
+        """
+        markers = 0
+        for bit, handler in enumerate(parser.record_handlers()):
+            count = len(parser.log)
+            handler(record)
+            if len(parser.log) > count:
+                markers |= 1 << bit
+        parser.log = []
+        return markers
+
+    @staticmethod
+    def enabled_markers(parser):
+        """
+        Get the bit mask of the record handlers enabled by the
+        parser options. The optional handlers are always the last.
+        :param parser: parser object
+        :type parser: AstuteLog, PuppetLog
+        :return: bit mask
+        :rtype: int
+        """
+        return (1 << len(parser.record_handlers())) - 1
+
+    def level(self, record):
+        """
+        Extract the log level from the record
+        :param record: log record
+        :type record: str
+        :return: log level
+        :rtype: str
+        """
+        match = self.level_regexp.match(record)
+        if match:
+            return match.group(1)
+
+    def astute_rows(self, log_name, content):
+        """
+        Parse the Astute log to the index rows
+        :param log_name: name of the log in the snapshot
+        :type log_name: str
+        :param content: log lines stream
+        :type content: iter
+        :return: iter
+        """
+        parser = AstuteLog()
+        parser.show_mcagent = True
+        parser.content = content
+        for record in parser.each_record():
+            fields = record.split(None, 1)
+            yield (
+                'astute', None, log_name, fields[0] if fields else None,
+                self.level(record), self.record_markers(parser, record),
+                parser.normalize_record(record),
+            )
+
+    def puppet_rows(self, log_name, content):
+        """
+        Parse the Puppet log to the index rows
+        :param log_name: name of the log in the snapshot
+        :type log_name: str
+        :param content: log lines stream
+        :type content: iter
+        :return: iter
+        """
+        parser = PuppetLog()
+        parser.show_evals = True
+        parser.log_name = log_name
+        parser.content = content
+        record_filter = parser.record_filter()
+        node = parser.node_name(log_name)
+        for record in parser.each_record():
+            converted = parser.convert_record(record)
+            if not converted:
+                continue
+            markers = 0
+            if record_filter.search(record):
+                markers = self.record_markers(parser, record)
+            yield (
+                'puppet', node, log_name,
+                converted['time'].strftime('%Y-%m-%dT%H:%M:%S.%f'),
+                self.level(record), markers, converted['line'],
+            )
+
+    def build(self):
+        """
+        Parse the snapshot in a single pass and save all records to a new
+        index file. The digest of the snapshot is calculated on the fly.
+        :return:
+        """
+        IO.output('Build index: %s' % self.index_file)
+        stat = os.stat(self.snapshot)
+        index_tmp = self.index_file + '.tmp'
+        if os.path.isfile(index_tmp):
+            os.remove(index_tmp)
+        connection = self.connect(index_tmp)
+        try:
+            with connection:
+                connection.execute(
+                    'CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT)')
+                connection.execute(
+                    'CREATE TABLE records ('
+                    'id INTEGER PRIMARY KEY, log_type TEXT, node TEXT, '
+                    'log TEXT, time TEXT, level TEXT, markers INTEGER, '
+                    'message TEXT)')
+                with open(self.snapshot, 'rb') as snapshot_file:
+                    reader = DigestReader(snapshot_file)
+                    archive = tarfile.open(fileobj=reader, mode='r|*')
+                    for log in archive:
+                        if not log.isfile():
+                            continue
+                        if log.name.endswith(ASTUTE_LOG):
+                            rows = self.astute_rows
+                        elif log.name.endswith(PUPPET_LOG):
+                            rows = self.puppet_rows
+                        else:
+                            continue
+                        content = archive.extractfile(log)
+                        connection.executemany(
+                            'INSERT INTO records (log_type, node, log, time, '
+                            'level, markers, message) '
+                            'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                            rows(log.name, content))
+                        content.close()
+                    archive.close()
+                    digest = reader.hexdigest()
+                connection.execute(
+                    'CREATE INDEX records_time ON records (log_type, time)')
+                connection.executemany(
+                    'INSERT INTO meta (key, value) VALUES (?, ?)', [
+                        ('version', INDEX_VERSION),
+                        ('digest', digest),
+                        ('size', str(stat.st_size)),
+                        ('mtime', str(stat.st_mtime)),
+                    ])
+        finally:
+            connection.close()
+        os.rename(index_tmp, self.index_file)
+
+    def query(self, connection, log_type, markers=None, enable_sort=False):
+        """
+        Select the records of the given log type from the index
+        :param connection: index database connection
+        :param log_type: 'astute' or 'puppet'
+        :type log_type: str
+        :param markers: bit mask of the enabled record handlers,
+                        all records are selected if not set
+        :type markers: int
+        :param enable_sort: order the records by time
+        :type enable_sort: bool
+        :return: iter of (log, time, markers, message) rows
+        """
+        sql = 'SELECT log, time, markers, message FROM records ' \
+              'WHERE log_type = ?'
+        parameters = [log_type]
+        if markers is not None:
+            sql += ' AND markers & ? != 0'
+            parameters.append(markers)
+        sql += ' ORDER BY time, id' if enable_sort else ' ORDER BY id'
+        for log, time, record_markers, message in connection.execute(
+                sql, parameters):
+            count = 1
+            if markers is not None:
+                count = bin(record_markers & markers).count('1')
+            for _ in range(count):
+                yield log, time, message
+
+    def parse_logs(self,
+                   parse_astute=False,
+                   parse_puppet=False,
+                   show_mcagent=False,
+                   enable_sort=False,
+                   show_evals=False,
+                   show_full=False):
+        """
+        Output the Astute and Puppet logs of the snapshot from the index,
+        the index is built first if it is missing or outdated
+        :param parse_astute: output Astute logs
+        :type parse_astute: bool
+        :param parse_puppet: output Puppet logs
+        :type parse_puppet: bool
+        :param show_mcagent: show or hide MCAgent debug
+        :type show_mcagent: bool
         :param enable_sort: enable sorting of logs by date
         :type enable_sort: bool
         :param show_evals: show evaltrace lines in the logs
         :type show_evals: bool
         :return:
         """
+        if not self.is_actual():
+            self.build()
+
+        astute_logs = AstuteLog()
+        astute_logs.show_mcagent = show_mcagent
         puppet_logs = PuppetLog()
         puppet_logs.show_evals = show_evals
         puppet_logs.enable_sort = enable_sort
-        puppet_logs.show_full = show_full
-        for puppet_log in self.puppet_logs():
-            puppet_logs.log_name = puppet_log.name
-            self.parse_log(puppet_log, puppet_logs)
-        puppet_logs.output()
-        puppet_logs.clear()
+
+        connection = self.connect()
+        try:
+            if parse_astute:
+                markers = None
+                if not show_full:
+                    markers = self.enabled_markers(astute_logs)
+                astute_logs.output_records(
+                    message for _, _, message in self.query(
+                        connection, 'astute', markers))
+
+            IO.separator()
+
+            if parse_puppet:
+                markers = None
+                if not show_full:
+                    markers = self.enabled_markers(puppet_logs)
+                puppet_logs.output_records(
+                    {
+                        'log': log,
+                        'time': datetime.strptime(
+                            time, "%Y-%m-%dT%H:%M:%S.%f"),
+                        'line': message,
+                    } for log, time, message in self.query(
+                        connection, 'puppet', markers, enable_sort))
+        finally:
+            connection.close()
+
+
+class LogFollower(object):
+    """
+    This class follows the growing log file and passes only the new
+    complete records to the parser. The rotated and truncated logs
+    are detected and read again from the beginning.
+    Attributes:
+        path        path to the log file
+        parser      parser object
+        multiline   the log has multi line records
+        log         opened log file
+        tail        the incomplete last line
+        record      the incomplete last multi line record
+    """
+
+    def __init__(self, path, parser, multiline=False):
+        self.path = path
+        self.parser = parser
+        self.multiline = multiline
+        self.log = None
+        self.tail = b''
+        self.record = None
+
+    def close(self):
+        """
+        Close the log file
+        :return:
+        """
+        if self.log:
+            self.log.close()
+            self.log = None
+
+    def reopen(self):
+        """
+        Open the log file again if it was rotated or truncated.
+        The rest of the rotated log is read before it is closed.
+        :return: lines read from the rotated log
+        :rtype: list
+        """
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return []
+        lines = []
+        if self.log:
+            if os.fstat(self.log.fileno()).st_ino == stat.st_ino:
+                if stat.st_size >= self.log.tell():
+                    return []
+                self.log.seek(0)
+                self.tail = b''
+                return []
+            lines = self.read_lines()
+            self.close()
+        self.log = open(self.path, 'rb')
+        self.tail = b''
+        return lines
+
+    def read_lines(self):
+        """
+        Read the new complete lines from the log file
+        :return: decoded lines
+        :rtype: list
+        """
+        data = self.tail + self.log.read()
+        lines = data.split(b'\n')
+        self.tail = lines.pop()
+        return [self.parser.decode_line(line) for line in lines]
+
+    def records(self, lines):
+        """
+        Assemble the complete records from the lines. The last multi
+        line record is complete only when the next one starts or when
+        there are no new lines.
+        :param lines: decoded log lines
+        :type lines: list
+        :return: log records
+        :rtype: list
+        """
+        if not self.multiline:
+            return lines
+        records = []
+        if not lines and self.record is not None:
+            records.append(self.record)
+            self.record = None
+        for line in lines:
+            if self.parser.date_regexp.match(line):
+                if self.record is not None:
+                    records.append(self.record)
+                self.record = line
+            else:
+                self.record = (self.record or '') + line
+        return records
+
+    def poll(self):
+        """
+        Parse the new records of the log
+        :return:
+        """
+        lines = self.reopen()
+        if self.log:
+            lines += self.read_lines()
+        self.parser.handle_records(self.records(lines))
 
 
 class FuelLogs(object):
@@ -810,14 +1671,13 @@ class FuelLogs(object):
     @staticmethod
     def parse_log(log_file, parser):
         """
-        Read the log file and parse it using the given parser object
+        Parse the log file as a lines stream using the given parser object
         :param log_file Opened file object
         :type log_file FileIO
         :param parser Parser object
         :type parser PuppetLog, AstuteLog
         """
-        content = log_file.read()
-        parser.parse(content)
+        parser.parse(log_file)
 
     def parse_astute_logs(self,
                           show_mcagent=False,
@@ -832,7 +1692,7 @@ class FuelLogs(object):
         astute_logs.show_mcagent = show_mcagent
         astute_logs.show_full = show_full
         for astute_log in self.astute_logs():
-            with open(astute_log, 'r') as log:
+            with open(astute_log, 'rb') as log:
                 self.parse_log(log, astute_logs)
         astute_logs.output()
         astute_logs.clear()
@@ -840,26 +1700,93 @@ class FuelLogs(object):
     def parse_puppet_logs(self,
                           enable_sort=False,
                           show_evals=False,
-                          show_full=False):
+                          show_full=False,
+                          jobs=1):
         """
         Parse Puppet logs on the Fuel Master system
         :param enable_sort: sort log files by date
         :type enable_sort: bool
         :param show_evals: show evaltrace lines
         :type show_evals: bool
+        :param jobs: number of processes parsing the logs
+        :type jobs: int
         :return:
         """
         puppet_logs = PuppetLog()
         puppet_logs.show_evals = show_evals
         puppet_logs.enable_sort = enable_sort
         puppet_logs.show_full = show_full
-        for puppet_log in self.puppet_logs():
-            with open(puppet_log, 'r') as log:
-                puppet_logs.log_name = puppet_log
-                self.parse_log(log, puppet_logs)
+        if jobs == 1:
+            for puppet_log in self.puppet_logs():
+                with open(puppet_log, 'rb') as log:
+                    puppet_logs.log_name = puppet_log
+                    self.parse_log(log, puppet_logs)
+        else:
+            pool = PuppetLogPool(puppet_logs, jobs)
+            try:
+                for puppet_log in self.puppet_logs():
+                    pool.parse_file(puppet_log)
+                pool.wait()
+            finally:
+                pool.close()
         puppet_logs.output()
         puppet_logs.clear()
 
+    def follow_logs(self,
+                    parse_astute=False,
+                    parse_puppet=False,
+                    show_mcagent=False,
+                    show_evals=False,
+                    show_full=False,
+                    interval=FOLLOW_INTERVAL):
+        """
+        Keep parsing the new records of Astute and Puppet logs on the
+        Fuel Master system until interrupted. The new log files are
+        found on every poll.
+        :param parse_astute: follow Astute logs
+        :type parse_astute: bool
+        :param parse_puppet: follow Puppet logs
+        :type parse_puppet: bool
+        :param show_mcagent: show MCAgent call debug
+        :type show_mcagent: bool
+        :param show_evals: show evaltrace lines
+        :type show_evals: bool
+        :param interval: seconds between the polls
+        :type interval: int
+        :return:
+        """
+        astute_logs = AstuteLog()
+        astute_logs.show_mcagent = show_mcagent
+        astute_logs.show_full = show_full
+        puppet_logs = PuppetLog()
+        puppet_logs.show_evals = show_evals
+        puppet_logs.show_full = show_full
+        followers = collections.OrderedDict()
+        try:
+            while True:
+                if parse_astute:
+                    for astute_log in self.astute_logs():
+                        if astute_log not in followers:
+                            followers[astute_log] = LogFollower(
+                                astute_log, astute_logs, multiline=True)
+                if parse_puppet:
+                    for puppet_log in self.puppet_logs():
+                        if puppet_log not in followers:
+                            followers[puppet_log] = LogFollower(
+                                puppet_log, puppet_logs)
+                for follower in followers.values():
+                    if follower.parser is puppet_logs:
+                        puppet_logs.log_name = follower.path
+                    follower.poll()
+                    follower.parser.output()
+                    follower.parser.clear()
+                sleep(interval)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            for follower in followers.values():
+                follower.close()
+
     def clear_logs(self, iterator):
         """
         Clear all the logs found by the iterator_function
@@ -0,0 +1,325 @@
+#!/usr/bin/env python
+
+#    Copyright 2016 Mirantis, Inc.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+"""
+This tool keeps the history of the TimeStat timings of the builds and
+reports the steps which became slower.
+
+usage: timestat_history.py [-h] {ingest,builds,report} ...
+
+  ingest   Store the timestat_*.yaml files of the build in the database
+  builds   List the stored builds
+  report   Compare the timings of the build with the previous builds
+
+The timings are keyed by the build, test, config and step. The timings of
+the system tests steps 'Case_<test>__Config_<config>.Step<N>_<action>' are
+split into the test, config and step. The timers started inside of the step
+are stored under its name and get the step '<step>.<timer name>', the other
+timings are stored with the test method name as the test and the timer name
+as the step.
+
+Store the timings of the Jenkins build, the build and the ISO are taken from
+BUILD_TAG and ISO_PATH if they are not set:
+
+timestat_history.py ingest --db timings.sqlite logs/timestat_*.yaml
+
+Report the steps of the last build which are slower than the previous
+20 builds, the exit code is 1 if any are found:
+
+timestat_history.py report --db timings.sqlite --baseline 20
+
+The slowdown is reported when the timing is out of the one-sided prediction
+interval of the Student's t-distribution of the baseline timings with the
+significance level --alpha, and it's longer than the baseline mean by
+--threshold and --min-seconds. Only deployment, provisioning, OSTF and
+snapshot revert steps are checked unless --steps or --all-steps is used.
+"""
+
+from __future__ import division
+from __future__ import print_function
+
+import argparse
+import math
+import os
+import re
+import sqlite3
+import sys
+import time
+
+import yaml
+
+STEP_RE = re.compile(r'^Case_(?P<test>.+?)__Config_(?P<config>.+)\.'
+                     r'(?P<step>Step\d+_\w+?)(?:_\d{2})?$')
+DEFAULT_STEPS = r'deploy|provision|ostf|revert|snapshot'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS builds (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    build TEXT UNIQUE NOT NULL,
+    iso TEXT,
+    ingested REAL
+);
+CREATE TABLE IF NOT EXISTS timings (
+    build_id INTEGER NOT NULL REFERENCES builds(id),
+    test TEXT NOT NULL,
+    config TEXT NOT NULL,
+    step TEXT NOT NULL,
+    seconds REAL NOT NULL,
+    UNIQUE (build_id, test, config, step)
+);
+CREATE INDEX IF NOT EXISTS timings_key ON timings (test, config, step);
+"""
+
+
+class TimeStatLoader(yaml.SafeLoader):
+    """Loader which doesn't construct python objects used as keys"""
+
+
+TimeStatLoader.add_multi_constructor(
+    'tag:yaml.org,2002:python/', lambda loader, suffix, node: suffix)
+
+
+def connect(path):
+    db = sqlite3.connect(path)
+    db.executescript(SCHEMA)
+    return db
+
+
+def parse_timings(data):
+    """Return (test, config, step, seconds) of the TimeStat YAML data"""
+    timings = []
+    for method, steps in (data or {}).items():
+        if not isinstance(steps, dict):
+            continue
+        for name, value in steps.items():
+            try:
+                seconds = float(value)
+            except (TypeError, ValueError):
+                continue
+            match = STEP_RE.match(str(name))
+            parent = STEP_RE.match(str(method))
+            if match:
+                timings.append((match.group('test'), match.group('config'),
+                                match.group('step'), seconds))
+            elif parent:
+                timings.append((parent.group('test'), parent.group('config'),
+                                '{0}.{1}'.format(parent.group('step'), name),
+                                seconds))
+            else:
+                timings.append((str(method), '', str(name), seconds))
+    return timings
+
+
+def ingest(db, build, iso, paths):
+    """Store the timings of the files as the timings of the build,
+    the timings of the same build stored before are replaced
+    """
+    timings = []
+    for path in paths:
+        with open(path) as f:
+            timings.extend(parse_timings(yaml.load(f, Loader=TimeStatLoader)))
+    with db:
+        db.execute('INSERT OR IGNORE INTO builds (build) VALUES (?)',
+                   (build,))
+        db.execute('UPDATE builds SET iso = coalesce(?, iso), ingested = ? '
+                   'WHERE build = ?', (iso, time.time(), build))
+        build_id = db.execute('SELECT id FROM builds WHERE build = ?',
+                              (build,)).fetchone()[0]
+        db.executemany(
+            'INSERT OR REPLACE INTO timings '
+            '(build_id, test, config, step, seconds) VALUES (?, ?, ?, ?, ?)',
+            [(build_id,) + timing for timing in timings])
+    return len(timings)
+
+
+def betacf(a, b, x):
+    """Continued fraction of the incomplete beta function (Lentz)"""
+    tiny = 1e-300
+    c = 1.0
+    d = 1.0 - (a + b) * x / (a + 1.0)
+    d = 1.0 / (d if abs(d) > tiny else tiny)
+    result = d
+    for m in range(1, 201):
+        for numerator in (
+                m * (b - m) * x / ((a + 2 * m - 1) * (a + 2 * m)),
+                -(a + m) * (a + b + m) * x / ((a + 2 * m) * (a + 2 * m + 1))):
+            d = 1.0 + numerator * d
+            d = 1.0 / (d if abs(d) > tiny else tiny)
+            c = 1.0 + numerator / c
+            c = c if abs(c) > tiny else tiny
+            result *= c * d
+        if abs(c * d - 1.0) < 1e-12:
+            break
+    return result
+
+
+def betainc(a, b, x):
+    """Regularized incomplete beta function I_x(a, b)"""
+    if x <= 0:
+        return 0.0
+    if x >= 1:
+        return 1.0
+    front = math.exp(math.lgamma(a + b) - math.lgamma(a) - math.lgamma(b) +
+                     a * math.log(x) + b * math.log(1 - x))
+    if x < (a + 1) / (a + b + 2):
+        return front * betacf(a, b, x) / a
+    return 1.0 - front * betacf(b, a, 1 - x) / b
+
+
+def t_sf(t, df):
+    """Probability of the Student's t-distribution value greater than t"""
+    tail = 0.5 * betainc(df / 2, 0.5, df / (df + t * t))
+    return tail if t > 0 else 1 - tail
+
+
+def check_slowdown(seconds, baseline):
+    """Return (mean, stdev, p-value) of the timing against the baseline
+
+    The p-value is the probability of the new timing which is the same or
+    longer if the timings of the step didn't change.
+    """
+    n = len(baseline)
+    mean = sum(baseline) / n
+    stdev = math.sqrt(sum((x - mean) ** 2 for x in baseline) / (n - 1))
+    if stdev == 0:
+        return mean, stdev, 0.0 if seconds > mean else 1.0
+    t = (seconds - mean) / (stdev * math.sqrt(1 + 1 / n))
+    return mean, stdev, t_sf(t, n - 1)
+
+
+def get_build(db, build=None):
+    if build:
+        row = db.execute('SELECT id, build, iso FROM builds WHERE build = ?',
+                         (build,)).fetchone()
+    else:
+        row = db.execute('SELECT id, build, iso FROM builds '
+                         'ORDER BY id DESC LIMIT 1').fetchone()
+    if row is None:
+        raise LookupError('Build {0} is not found'.format(build or ''))
+    return row
+
+
+def report(db, build=None, baseline=20, min_history=5, alpha=0.05,
+           threshold=0.1, min_seconds=30, steps=DEFAULT_STEPS):
+    """Return the build and the list of the slowdowns of its steps"""
+    build_id, build, iso = get_build(db, build)
+    steps_re = re.compile(steps, re.I) if steps else None
+    slowdowns = []
+    for test, config, step, seconds in db.execute(
+            'SELECT test, config, step, seconds FROM timings '
+            'WHERE build_id = ?', (build_id,)).fetchall():
+        if steps_re is not None and not steps_re.search(step):
+            continue
+        history = [row[0] for row in db.execute(
+            'SELECT seconds FROM timings WHERE test = ? AND config = ? AND '
+            'step = ? AND build_id < ? ORDER BY build_id DESC LIMIT ?',
+            (test, config, step, build_id, baseline))]
+        if len(history) < max(min_history, 2):
+            continue
+        mean, stdev, p_value = check_slowdown(seconds, history)
+        if (p_value < alpha and seconds > mean * (1 + threshold) and
+                seconds - mean >= min_seconds):
+            slowdowns.append({
+                'test': test, 'config': config, 'step': step,
+                'seconds': seconds, 'mean': mean, 'stdev': stdev,
+                'builds': len(history), 'p_value': p_value,
+                'percent': 100 * (seconds / mean - 1) if mean else 100})
+    slowdowns.sort(key=lambda s: (s['p_value'], s['mean'] - s['seconds']))
+    return (build, iso), slowdowns
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='History of the TimeStat timings of the builds')
+    subparsers = parser.add_subparsers(dest='command')
+    subparsers.required = True
+
+    ingest_parser = subparsers.add_parser(
+        'ingest', help='Store the TimeStat files of the build')
+    ingest_parser.add_argument('--db', required=True,
+                               help='SQLite database file')
+    ingest_parser.add_argument(
+        '--build', default=os.environ.get('BUILD_TAG') or
+        os.environ.get('BUILD_NUMBER'),
+        help='Build name, BUILD_TAG or BUILD_NUMBER by default')
+    ingest_parser.add_argument(
+        '--iso', default=os.path.basename(os.environ.get('ISO_PATH', '')) or
+        None, help='ISO name, the name of ISO_PATH by default')
+    ingest_parser.add_argument('files', metavar='FILE', nargs='+',
+                               help='TimeStat YAML files')
+
+    builds_parser = subparsers.add_parser(
+        'builds', help='List the stored builds')
+    builds_parser.add_argument('--db', required=True,
+                               help='SQLite database file')
+
+    report_parser = subparsers.add_parser(
+        'report', help='Report the steps of the build which became slower')
+    report_parser.add_argument('--db', required=True,
+                               help='SQLite database file')
+    report_parser.add_argument('--build', default=None,
+                               help='Build to check, the last one by default')
+    report_parser.add_argument('--baseline', type=int, default=20,
+                               help='Number of the previous builds to '
+                                    'compare with')
+    report_parser.add_argument('--min-history', type=int, default=5,
+                               help='Minimal number of the previous timings '
+                                    'of the step to check it')
+    report_parser.add_argument('--alpha', type=float, default=0.05,
+                               help='Significance level')
+    report_parser.add_argument('--threshold', type=float, default=0.1,
+                               help='Minimal slowdown relative to the mean')
+    report_parser.add_argument('--min-seconds', type=float, default=30,
+                               help='Minimal slowdown in seconds')
+    report_parser.add_argument('--steps', default=DEFAULT_STEPS,
+                               help='Check only the steps matching the '
+                                    'regular expression')
+    report_parser.add_argument('--all-steps', action='store_true',
+                               help='Check all the steps')
+    args = parser.parse_args()
+
+    db = connect(args.db)
+    if args.command == 'ingest':
+        if not args.build:
+            parser.error('--build is required if BUILD_TAG is not set')
+        count = ingest(db, args.build, args.iso, args.files)
+        print('Stored {0} timings of the build {1}'.format(count,
+                                                           args.build))
+    elif args.command == 'builds':
+        for build, iso, count in db.execute(
+                'SELECT build, iso, count(timings.build_id) FROM builds '
+                'LEFT JOIN timings ON timings.build_id = builds.id '
+                'GROUP BY builds.id ORDER BY builds.id'):
+            print('{0:<40} {1:<50} {2:>6}'.format(build, iso or '-', count))
+    else:
+        try:
+            (build, iso), slowdowns = report(
+                db, args.build, args.baseline, args.min_history, args.alpha,
+                args.threshold, args.min_seconds,
+                None if args.all_steps else args.steps)
+        except LookupError as e:
+            sys.exit(str(e))
+        print('Build {0} ({1}): {2} slowdowns'.format(build, iso or '-',
+                                                      len(slowdowns)))
+        for s in slowdowns:
+            print('{test} {config} {step}: {seconds:.0f}s, mean {mean:.0f}s '
+                  '+- {stdev:.0f}s of {builds} builds, +{percent:.0f}%, '
+                  'p={p_value:.4f}'.format(**s))
+        if slowdowns:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()